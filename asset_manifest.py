@@ -0,0 +1,189 @@
+"""
+One-pass index of the creative assets in CREATIVES_FOLDER.
+
+Creative creation used to list the folder again for every size, companion image
+(600x250, 320x250, 450x600) and NWP extension, matching sizes as filename substrings.
+get_asset_manifest() lists the folder once and indexes each file by the sizes in its
+name, its type and its 2x / ai / nolp markers, with the file size and SHA-256 of its
+content. The manifest is rebuilt only when a file is added, removed or rewritten (name,
+size or mtime changed), and unchanged files keep their hash, so every line of a campaign
+sees the same assets in the same order.
+"""
+
+import hashlib
+import os
+import re
+import threading
+
+from config import CREATIVES_FOLDER
+
+IMAGE_EXTENSIONS = ('.png', '.jpeg', '.jpg', '.webp', '.gif')
+SCRIPT_EXTENSIONS = ('.html', '.xlsx', '.xls')
+
+# A size token like "300x250"; digits on either side belong to a different size ("1300x250", "320x500")
+_SIZE_RE = re.compile(r'(?<!\d)(\d+)x(\d+)(?!\d)')
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+_stats = {'builds': 0, 'hits': 0, 'hashed_files': 0}
+
+
+def _asset_kind(extension):
+    if extension in IMAGE_EXTENSIONS:
+        return 'image'
+    if extension == '.html':
+        return 'html'
+    if extension in ('.xlsx', '.xls'):
+        return 'sheet'
+    return 'other'
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CreativeAsset:
+    """One file of the creatives folder"""
+
+    __slots__ = ('name', 'path', 'extension', 'kind', 'sizes', 'is_2x', 'is_ai', 'is_nolp',
+                 'file_size', 'mtime_ns', 'sha256')
+
+    def __init__(self, name, path, file_size, mtime_ns, sha256):
+        name_lower = name.lower()
+        self.name = name
+        self.path = path
+        self.extension = os.path.splitext(name_lower)[1]
+        self.kind = _asset_kind(self.extension)
+        self.sizes = tuple(dict.fromkeys(f"{width}x{height}" for width, height in _SIZE_RE.findall(name_lower)))
+        # Markers are read from the name without its size tokens, so "972x250" is not a 2x asset
+        markers = _SIZE_RE.sub(' ', name_lower)
+        self.is_2x = '2x' in markers
+        self.is_ai = 'ai' in markers
+        self.is_nolp = 'nolp' in markers
+        self.file_size = file_size
+        self.mtime_ns = mtime_ns
+        self.sha256 = sha256
+
+    def read_bytes(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def __repr__(self):
+        return f"CreativeAsset({self.name!r}, sizes={self.sizes}, kind={self.kind!r}, {self.file_size} bytes)"
+
+
+class AssetManifest:
+    """Assets of one folder version, indexed by size"""
+
+    def __init__(self, folder, assets):
+        self.folder = folder
+        self.assets = sorted(assets, key=lambda asset: asset.name)
+        self._by_size = {}
+        for asset in self.assets:
+            for size in asset.sizes:
+                self._by_size.setdefault(size, []).append(asset)
+
+    def files_for_size(self, size, extensions=None):
+        """Assets whose name contains the size ("300x250"), optionally limited to some extensions"""
+        assets = self._by_size.get(str(size).lower(), [])
+        if extensions is None:
+            return list(assets)
+        return [asset for asset in assets if asset.extension in extensions]
+
+    def first_image(self, size):
+        """First image of the given size, or None"""
+        images = self.files_for_size(size, IMAGE_EXTENSIONS)
+        return images[0] if images else None
+
+    def sizes(self):
+        return sorted(self._by_size)
+
+    def stats(self):
+        return {
+            'folder': self.folder,
+            'files': len(self.assets),
+            'sizes': len(self._by_size),
+            'bytes': sum(asset.file_size for asset in self.assets),
+        }
+
+
+def _scan(folder):
+    """Return {name: (path, size, mtime_ns)} for the regular files in folder"""
+    if not os.path.isdir(folder):
+        return {}
+    entries = {}
+    with os.scandir(folder) as it:
+        for entry in it:
+            # Hidden files (.DS_Store, editor swap files) are never creatives
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat = entry.stat()
+                entries[entry.name] = (entry.path, stat.st_size, stat.st_mtime_ns)
+    return entries
+
+
+def get_asset_manifest(folder=CREATIVES_FOLDER):
+    """
+    Return the manifest of a creatives folder, rebuilt only if its files changed.
+
+    Args:
+        folder: Folder to index (defaults to CREATIVES_FOLDER)
+
+    Returns:
+        AssetManifest: Manifest of the folder's current files
+    """
+    folder = os.path.abspath(folder)
+    entries = _scan(folder)
+    with _manifests_lock:
+        cached = _manifests.get(folder)
+        if cached is not None and cached[0] == entries:
+            _stats['hits'] += 1
+            return cached[1]
+
+        previous = {asset.name: asset for asset in cached[1].assets} if cached is not None else {}
+        assets = []
+        for name, (path, file_size, mtime_ns) in entries.items():
+            old = previous.get(name)
+            if old is not None and (old.file_size, old.mtime_ns) == (file_size, mtime_ns):
+                sha256 = old.sha256
+            else:
+                try:
+                    sha256 = _sha256_file(path)
+                except OSError as e:
+                    print(f"⚠️ Could not read creative asset {name}: {e}")
+                    continue
+                _stats['hashed_files'] += 1
+            assets.append(CreativeAsset(name, path, file_size, mtime_ns, sha256))
+
+        manifest = AssetManifest(folder, assets)
+        _manifests[folder] = (entries, manifest)
+        _stats['builds'] += 1
+        print(f"🗂️ Indexed {len(manifest.assets)} creative asset(s) in {folder} ({len(manifest.sizes())} size(s))")
+        return manifest
+
+
+def invalidate_asset_manifest(folder=None):
+    """Forget the manifest of one folder, or of every folder"""
+    with _manifests_lock:
+        if folder is None:
+            _manifests.clear()
+        else:
+            _manifests.pop(os.path.abspath(folder), None)
+
+
+def asset_manifest_stats():
+    with _manifests_lock:
+        return dict(_stats)
+
+
+if __name__ == "__main__":
+    # Example usage
+    manifest = get_asset_manifest()
+    for asset in manifest.assets:
+        flags = [flag for flag, enabled in (('2x', asset.is_2x), ('ai', asset.is_ai), ('nolp', asset.is_nolp)) if enabled]
+        print(f"  - {asset.name}: {', '.join(asset.sizes) or 'no size'} [{asset.kind}] {asset.file_size} bytes "
+              f"sha256 {asset.sha256[:12]}… {' '.join(flags)}")
+    print(f"📊 {manifest.stats()}")
@@ -0,0 +1,268 @@
+"""
+Micro-benchmarks for the hot paths of line creation.
+
+Usage:
+    python benchmarks.py placements --rows 50000
+    python benchmarks.py placements --catalog-sheet "TOI + ETIMES"   # real rows from the offline catalog
+    python benchmarks.py tags --rows 2000
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import re
+import time
+
+import pandas as pd
+
+from placement_catalog import get_placement_catalog
+from placements_for_creatives import PlacementFrame, PlacementIndex, map_placement_columns, parse_placement_rows
+from tag_reader import build_tag_dict, find_tag_columns
+
+PLACEMENT_HEADERS = ["Site", "Platform", "Ad Type", "Section", "Placement ID", "Ad slot ID"]
+BENCH_SITES = ["TOI", "ETIMES", "ET", "NBT", "MT", "VK", "EIS", "IAG", "TLG", "TML", "MS", "NBT HINDI"]
+BENCH_PLATFORMS = ["WEB", "MWEB", "AMP", "WEB, MWEB", "MWEB, AMP", "WEB, MWEB, AMP"]
+BENCH_SECTIONS = ["ROS", "HP", "HOME", "ROS_HP", "ARTICLESHOW", "VIDEOSHOW"]
+BENCH_ADTYPES = ["MREC", "MREC_1", "MREC_2", "BTF MREC", "LEADERBOARD", "INTERSTITIAL", "BOTTOM OVERLAY",
+                 "FLYING_CARPET", "TOWER", "SLUG1", "TOPBANNER", "SKIN_OOP"]
+
+# Same shape as the adtype filters single_line passes for a standard banner line
+BENCH_ADTYPE_FILTERS = {
+    "300x250": {"adtypes": ["MREC_ALL", "MREC", "MREC_1", "MREC_2", "BTF MREC"], "sections": ["ROS", "HP", "HOME"]},
+    "320x50": {"adtypes": ["BOTTOMOVERLAY", "BOTTOM OVERLAY"], "sections": ["ROS", "HP", "HOME"]},
+    "300x600": {"adtypes": ["FLYINGCARPET", "FLYING_CARPET", "TOWER"], "sections": ["ROS", "HP", "HOME"]},
+    "728x90": {"adtypes": ["LEADERBOARD"], "sections": ["ROS", "HP", "HOME"]},
+    "320x480": {"adtypes": ["INTERSTITIAL"], "sections": ["ROS", "HP", "HOME"]},
+    "1260x570": {"adtypes": ["INTERSTITIAL"], "sections": ["ROS", "HP", "HOME"]},
+}
+
+
+def synthetic_placement_rows(row_count, seed=42):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(row_count):
+        rows.append({
+            "Site": rng.choice(BENCH_SITES),
+            "Platform": rng.choice(BENCH_PLATFORMS),
+            "Ad Type": rng.choice(BENCH_ADTYPES),
+            "Section": rng.choice(BENCH_SECTIONS),
+            "Placement ID": str(30000000 + i) if rng.random() > 0.05 else "",
+            "Ad slot ID": str(23000000 + i),
+        })
+    return rows
+
+
+def _platform_terms(adtype, platforms):
+    if adtype == "1260x570":
+        return ["WEB"]
+    if adtype == "320x480":
+        return ["AMP", "MWEB"]
+    return platforms
+
+
+def _row_scan(headers, rows, site_filter, section_values, adtype_values, platforms):
+    """Baseline: the per-row dict scan fetch_placements_ids used before the index"""
+    column_mapping = map_placement_columns(headers)
+    placement_ids = []
+    for row in rows:
+        row_site = str(row.get(column_mapping['site'], '')).upper()
+        row_platform = str(row.get(column_mapping['platform'], '')).upper()
+        row_section = str(row.get(column_mapping['section'], '')).upper()
+        row_adtype = str(row.get(column_mapping['adtype'], '')).upper()
+        row_placement = str(row.get(column_mapping['placement'], '')).strip()
+        if not row_placement:
+            continue
+        row_platforms = [p.strip() for p in row_platform.split(',')]
+        if (any(site in row_site for site in site_filter)
+                and any(p.strip().upper() in row_platforms for p in platforms)
+                and any(section in row_section for section in section_values)
+                and any(ad in row_adtype for ad in adtype_values)):
+            placement_ids.append(row_placement)
+    return placement_ids
+
+
+def _time(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def catalog_placement_rows(sheet_name):
+    """Rows of one worksheet from the offline placement catalog (no network)"""
+    catalog = get_placement_catalog()
+    print(f"📦 Loading '{sheet_name}' from placement catalog v{catalog.version} ({catalog.manifest['exported_at']})")
+    return parse_placement_rows(catalog.values(sheet_name))
+
+
+def bench_placements(row_count, repeat, catalog_sheet=None):
+    if catalog_sheet:
+        headers, rows = catalog_placement_rows(catalog_sheet)
+    else:
+        print(f"🧪 Building synthetic placement sheet with {row_count:,} rows...")
+        headers, rows = PLACEMENT_HEADERS, synthetic_placement_rows(row_count)
+    site_filter = ["TOI", "ETIMES", "NBT"]
+    platforms = ["WEB", "MWEB", "AMP"]
+
+    def run(engine):
+        results = {}
+        for adtype, filters in BENCH_ADTYPE_FILTERS.items():
+            results[adtype] = engine(site_filter, filters["sections"], filters["adtypes"], _platform_terms(adtype, platforms))
+        return results
+
+    scan_time, expected = _time(lambda: run(lambda *args: _row_scan(headers, rows, *args)), repeat)
+
+    index_build, index = _time(lambda: PlacementIndex(headers, rows), 1)
+    # Fresh index per repeat would hide the term cache; measure cold and warm queries separately
+    index_cold, index_result = _time(lambda: run(index.query), 1)
+    index_warm, _ = _time(lambda: run(index.query), repeat)
+
+    frame_build, frame = _time(lambda: PlacementFrame(headers, rows), 1)
+    frame_query, frame_result = _time(lambda: run(frame.query), repeat)
+
+    print(f"\n📊 Placement filtering ({len(BENCH_ADTYPE_FILTERS)} adtypes, best of {repeat}):")
+    print(f"  - Row scan (baseline):  {scan_time * 1000:9.1f} ms")
+    print(f"  - Index build:          {index_build * 1000:9.1f} ms")
+    print(f"  - Index query (cold):   {index_cold * 1000:9.1f} ms")
+    print(f"  - Index query (warm):   {index_warm * 1000:9.1f} ms")
+    print(f"  - Frame build:          {frame_build * 1000:9.1f} ms")
+    print(f"  - Vectorized query:     {frame_query * 1000:9.1f} ms")
+
+    matches = sum(len(ids) for ids in expected.values())
+    identical = index_result == expected and frame_result == expected
+    print(f"\n{'✅' if identical else '❌'} Results identical across engines ({matches:,} placement IDs)")
+    return identical
+
+
+BENCH_TAG_SIZES = ["300x250", "320x50", "728x90", "300x600", "320x480", "970x250"]
+BENCH_TAG_TEMPLATES = [
+    # Plain third-party JavaScript
+    '<script src="https://ads.example.com/serve.js?size={size}&cb=%%CACHEBUSTER%%&id={i}"></script>',
+    # Flashtalking with a <noscript> click-through
+    '<script src="https://servedby.flashtalking.com/imp/{i};{size}"></script><noscript><a href="https://servedby.flashtalking.com/click/{i}" target="_blank"><img src="https://servedby.flashtalking.com/imp/{i}.gif"/></a></noscript>',
+    # DoubleClick <ins> tag
+    "<ins class='dcmads' style='display:inline-block;width:300px' data-dcm-placement='N{i}.123/B{i}.{i}' data-dcm-rendering-mode='script'><script src='https://www.googletagservices.com/dcm/dcmads.js'></script></ins>",
+]
+
+
+def synthetic_tag_frame(row_count, seed=42):
+    """Tag sheet mixing JavaScript, Flashtalking, DoubleClick and impression/click rows"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(row_count):
+        size = rng.choice(BENCH_TAG_SIZES)
+        impression = click = None
+        if rng.random() < 0.2:
+            impression = f"https://ad.example.com/imp/{i}.gif"
+            click = f"https://ad.example.com/click/{i}"
+        rows.append({
+            "Dimensions": rng.choice([size, f" {size} ", f"Banner {size} ROS", f"{size}_MREC"]) if rng.random() > 0.02 else None,
+            "JavaScript Tag": rng.choice(BENCH_TAG_TEMPLATES).format(size=size, i=i),
+            "Impression Tag": impression,
+            "Click Tag": click,
+        })
+    return pd.DataFrame(rows)
+
+
+def _legacy_tag_rows(df, dimension_col, tag_col, impression_tag_col, click_tag_col):
+    """Baseline: the iterrows loop with per-row uncompiled regexes read_tag_file used before"""
+    tag_dict = {}
+    for index, row in df.iterrows():
+        if not pd.notnull(row[dimension_col]):
+            continue
+        dimension = str(row[dimension_col]).strip()
+        if impression_tag_col and click_tag_col and pd.notnull(row[impression_tag_col]) and pd.notnull(row[click_tag_col]):
+            impression_tag = str(row[impression_tag_col]).strip()
+            click_tag = str(row[click_tag_col]).strip()
+            if not dimension or not impression_tag or not click_tag:
+                continue
+            if 'x' in dimension:
+                dimension_match = re.search(r'(\d+x\d+)', dimension)
+                if dimension_match:
+                    dimension = dimension_match.group(1)
+            tag_dict[dimension] = {'type': 'impression_click', 'impression_tag': impression_tag, 'click_tag': click_tag}
+            print(f"Added impression/click tags for dimension: {dimension}")
+        elif tag_col and pd.notnull(row[tag_col]):
+            js_tag = str(row[tag_col]).strip()
+            if not dimension or not js_tag:
+                continue
+            if 'x' in dimension:
+                dimension_match = re.search(r'(\d+x\d+)', dimension)
+                if dimension_match:
+                    dimension = dimension_match.group(1)
+            if '<noscript>' in js_tag.lower() and '<a href' in js_tag.lower():
+                print(f"Detected noscript/a href tag for dimension: {dimension}")
+                if '%%CLICK_URL_UNESC%%' not in js_tag:
+                    js_tag = re.sub(r'(<a\s+[^>]*?href=")([^"]*)"', r'\1%%CLICK_URL_UNESC%%\2"', js_tag, flags=re.IGNORECASE)
+            is_doubleclick = False
+            if ('dcmads' in js_tag.lower() or 'data-dcm' in js_tag.lower()) and ('<ins' in js_tag.lower() or '<div' in js_tag.lower()):
+                is_doubleclick = True
+                print(f"Detected DoubleClick tag for dimension: {dimension}")
+                if 'data-dcm-click-tracker' not in js_tag:
+                    modified_tag = re.sub(r'(<ins|<div)([^>]*?)(\s+class=)', r"\1\2 data-dcm-click-tracker='%%CLICK_URL_UNESC%%'\3", js_tag, flags=re.IGNORECASE)
+                    if modified_tag == js_tag:
+                        modified_tag = re.sub(r'(<ins|<div)(\s)', r"\1 data-dcm-click-tracker='%%CLICK_URL_UNESC%%'\2", js_tag, flags=re.IGNORECASE)
+                    js_tag = modified_tag
+            if 'x' in dimension and len(js_tag.strip()) > 10:
+                dimension_key = dimension
+                if dimension in tag_dict:
+                    counter = 1
+                    while f"{dimension}_{counter}" in tag_dict:
+                        counter += 1
+                    dimension_key = f"{dimension}_{counter}"
+                tag_dict[dimension_key] = {'type': 'doubleclick' if is_doubleclick else 'javascript', 'js_tag': js_tag}
+                print(f"Added tag for dimension: {dimension}")
+    return tag_dict
+
+
+def bench_tags(row_count, repeat):
+    print(f"🧪 Building synthetic tag sheet with {row_count:,} rows...")
+    df = synthetic_tag_frame(row_count)
+    with contextlib.redirect_stdout(io.StringIO()):
+        columns = find_tag_columns(df.columns)
+
+    # Both engines log per row like read_tag_file does; keep the log out of the terminal, not out of the timing
+    def quiet(func):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func(df, *columns)
+
+    legacy_time, expected = _time(lambda: quiet(_legacy_tag_rows), repeat)
+    new_time, result = _time(lambda: quiet(build_tag_dict), repeat)
+
+    print(f"\n📊 Tag sheet normalization (best of {repeat}):")
+    print(f"  - iterrows loop (baseline): {legacy_time * 1000:9.1f} ms")
+    print(f"  - Column-wise + compiled:   {new_time * 1000:9.1f} ms")
+
+    identical = result == expected
+    print(f"\n{'✅' if identical else '❌'} Tag dictionaries identical ({len(expected):,} tags)")
+    return identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Line creation micro-benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    placements_parser = subparsers.add_parser('placements', help='Placement sheet filtering engines')
+    placements_parser.add_argument('--rows', type=int, default=50000, help='Synthetic sheet rows')
+    placements_parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions')
+    placements_parser.add_argument('--catalog-sheet', help='Benchmark a worksheet from the offline placement catalog instead of synthetic rows')
+
+    tags_parser = subparsers.add_parser('tags', help='Tag workbook normalization')
+    tags_parser.add_argument('--rows', type=int, default=2000, help='Synthetic tag sheet rows')
+    tags_parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions')
+
+    args = parser.parse_args()
+
+    if args.command == 'placements':
+        bench_placements(args.rows, args.repeat, args.catalog_sheet)
+    elif args.command == 'tags':
+        bench_tags(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Cache of computed line item plans keyed by targeting configuration.
+
+Government campaigns often repeat the same sites, platforms, geos and creative sizes.
+single_line stores the placement data, creative placeholders, creative targetings and
+inventory/geo targeting it computed under a hash of everything that produced them
+(sites, platforms, line type, size groups, placement sheet revision, geo IDs), so a
+repeat configuration skips the placement lookup and goes straight to createLineItems.
+Plans expire after CAMPAIGN_PLAN_TTL seconds, which keeps the inventory liveness
+checks that went into them reasonably fresh.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+
+from cachetools import TTLCache
+
+from config import CAMPAIGN_PLAN_CACHE_ENABLED, CAMPAIGN_PLAN_TTL
+
+CAMPAIGN_PLAN_CACHE_SIZE = 256
+
+_plans = TTLCache(maxsize=CAMPAIGN_PLAN_CACHE_SIZE, ttl=CAMPAIGN_PLAN_TTL, timer=time.time)
+_plans_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def campaign_plan_key(sites, platforms, line_type, size_groups, sheet_revision, geo_ids, excluded_geo_ids=(), **extra):
+    """
+    Hash a targeting configuration into a plan cache key.
+
+    Sites, platforms and geo IDs are order-insensitive; extra keyword arguments
+    (e.g. custom sheet name) are part of the key as given.
+    """
+    components = {
+        'sites': sorted(str(site).upper() for site in sites),
+        'platforms': sorted(str(platform).upper() for platform in platforms),
+        'line_type': line_type,
+        'size_groups': size_groups,
+        'sheet_revision': sheet_revision,
+        'geo_ids': sorted(str(geo_id) for geo_id in geo_ids),
+        'excluded_geo_ids': sorted(str(geo_id) for geo_id in excluded_geo_ids),
+        'extra': extra,
+    }
+    payload = json.dumps(components, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_campaign_plan(key):
+    """Return a copy of the cached plan for key, or None"""
+    if not CAMPAIGN_PLAN_CACHE_ENABLED:
+        return None
+    with _plans_lock:
+        plan = _plans.get(key)
+        _stats['hits' if plan is not None else 'misses'] += 1
+    # Callers mutate placement data and payloads; never hand out the cached objects
+    return copy.deepcopy(plan) if plan is not None else None
+
+
+def store_campaign_plan(key, plan):
+    if not CAMPAIGN_PLAN_CACHE_ENABLED:
+        return
+    with _plans_lock:
+        _plans[key] = copy.deepcopy(plan)
+
+
+def clear_campaign_plans():
+    with _plans_lock:
+        _plans.clear()
+
+
+def campaign_plan_stats():
+    with _plans_lock:
+        _plans.expire()
+        lookups = _stats['hits'] + _stats['misses']
+        return {
+            'hits': _stats['hits'],
+            'misses': _stats['misses'],
+            'plans': len(_plans),
+            'hit_rate': (_stats['hits'] / lookups * 100) if lookups else 0.0,
+        }
@@ -5,6 +5,7 @@ Check for line items with similar timestamp patterns
 
 import sys
 from googleads import ad_manager
+from pql_cache import cached_pql_service
 
 def main():
     timestamp = "1753111504359"  # The timestamp from the error
@@ -17,7 +18,7 @@ def main():
         print("✅ Successfully authenticated with Google Ad Manager")
         
         # Get PQL service
-        pql_service = client.GetService('PublisherQueryLanguageService', version='v202508')
+        pql_service = cached_pql_service(client)
         
         # Try different timestamp-related searches
         searches = [
@@ -4,6 +4,48 @@ import os
 WORKSPACE_ROOT = os.path.dirname(os.path.abspath(__file__))
 CREATIVES_FOLDER = os.path.join(WORKSPACE_ROOT, "creatives")
 CREDENTIALS_PATH = os.path.join(WORKSPACE_ROOT, "credentials.json")
+GEO_TARGET_MIRROR_PATH = os.path.join(WORKSPACE_ROOT, "geo_target_mirror.json")
+PQL_CACHE_PATH = os.path.join(WORKSPACE_ROOT, "pql_cache.pkl")
+PQL_CACHE_PERSIST = True  # Keep cached PQL results between process restarts
+
+# Placement spreadsheet and the worksheets single_line reads together in one batched request
+PLACEMENT_SHEET_URL = "https://docs.google.com/spreadsheets/d/11_SZJnn5KALr6zi0JA27lKbmQvA1WSK4snp0UTY2AaY/edit?gid=2043018330"
+PLACEMENT_SHEET_NAME_LANG = "ALL LANGUAGES"
+PLACEMENT_SHEET_NAME_TOI = "TOI + ETIMES"
+PLACEMENT_SHEET_NAME_ET = "ET Placement/Preset"
+PLACEMENT_SHEET_NAME_CAN_PSBK = "CAN_PSBK"
+PLACEMENT_WORKBOOK_SHEETS = [PLACEMENT_SHEET_NAME_TOI, PLACEMENT_SHEET_NAME_ET, PLACEMENT_SHEET_NAME_LANG, PLACEMENT_SHEET_NAME_CAN_PSBK]
+
+# Placement sheet snapshots
+PLACEMENT_SNAPSHOT_DIR = os.path.join(WORKSPACE_ROOT, "placement_snapshots")
+PLACEMENT_SNAPSHOT_TTL = 6 * 3600  # Re-download a worksheet at least this often (seconds)
+PLACEMENT_REVISION_CHECK_INTERVAL = 60  # Seconds between Drive revision checks for a cached worksheet
+PLACEMENT_FILTER_ENGINE = "index"  # "index" (inverted index) or "vectorized" (pandas masks)
+PLACEMENT_FETCH_WORKERS = 3  # Site groups (TOI, ET, languages) fetched concurrently
+
+# Offline placement catalog (python placement_catalog.py export)
+PLACEMENT_CATALOG_DIR = os.path.join(WORKSPACE_ROOT, "placement_catalog")
+PLACEMENT_CATALOG_KEEP_VERSIONS = 3  # Older catalog files are deleted after an export
+PLACEMENT_SOURCE = "sheets"  # "sheets" (Sheets API, falling back to the catalog on errors) or "catalog" (catalog only, no network)
+PLACEMENT_SHEETS_TIMEOUT = 30  # Seconds before a Sheets/Drive request is abandoned
+
+# GAM API concurrency
+GAM_MAX_QPS = 8  # Live GAM calls per second across worker threads
+GEO_LOOKUP_WORKERS = 4  # Worker threads for geo lookups (1 = resolve sequentially)
+
+# Inventory preflight validation
+INVENTORY_VALIDATION_ENABLED = True  # Check placement/ad unit IDs are ACTIVE before createLineItems
+INVENTORY_LIVENESS_TTL = 3600  # Seconds a placement/ad unit liveness result is reused
+
+# Campaign plan cache (placement data, creative placeholders/targetings per targeting configuration)
+CAMPAIGN_PLAN_CACHE_ENABLED = True
+CAMPAIGN_PLAN_TTL = 1800  # Seconds a computed plan is reused; keep at or below INVENTORY_LIVENESS_TTL
+
+# Creative upload
+CREATIVE_BATCH_SIZE = 10  # TemplateCreatives per createCreatives call (payloads carry the asset bytes)
+LICA_BATCH_SIZE = 100  # Line item creative associations per createLineItemCreativeAssociations call
+LICA_REQUEST_TIMEOUT = 60  # Seconds before a LICA request is abandoned and retried
+SHARE_CREATIVES_ACROSS_LINES = True  # three_lines uploads identical creatives once and associates them with each line
 
 # Create creatives folder if it doesn't exist
 os.makedirs(CREATIVES_FOLDER, exist_ok=True) 
\ No newline at end of file
@@ -1,5 +1,7 @@
 from googleads import ad_manager
 from create_advertiserId import create_advertiser
+from get_order_name import seed_order_metadata
+from pql_cache import invalidate_tables
 
 def get_adbvertiser_id(client, company_name, company_type):
     """Fetch the ID of a company (advertiser) from Google Ad Manager."""
@@ -113,6 +115,9 @@ def create_order(client, advertiser_name, trafficker_name, order_name, line_item
 
         # Create the order
         created_order = order_service.createOrders([order])[0]
+        invalidate_tables('Order')
+        # Creative creation reads the advertiser from here instead of looking the order up again
+        seed_order_metadata(created_order['id'], advertiser_id=advertiser_id, name=created_order['name'])
         print(f"Order '{created_order['name']}' created with ID: {created_order['id']}")
         return created_order['id']
 
@@ -5,6 +5,7 @@ Debug script to investigate DUPLICATE_OBJECT errors
 
 import sys
 from googleads import ad_manager
+from pql_cache import cached_pql_service
 from single_line import check_line_item_name_exists
 
 def debug_specific_line_item(client, line_name):
@@ -13,7 +14,7 @@ def debug_specific_line_item(client, line_name):
         print(f"\n🔍 DEBUGGING SPECIFIC LINE ITEM: {line_name}")
         print(f"🔍 Line name length: {len(line_name)} characters")
         
-        pql_service = client.GetService('PublisherQueryLanguageService', version='v202508')
+        pql_service = cached_pql_service(client)
         
         # Try multiple search strategies including archived/deleted items
         search_strategies = [
@@ -0,0 +1,291 @@
+"""
+Local spelling correction and state disambiguation tables for geo names.
+
+Combines a hand-maintained alias table (renamed / alternate spellings such as
+Bangalore/Bengaluru) with a trigram similarity index over the offline Geo_Target
+mirror and the Indian state names used for disambiguation. Everything here is
+in-process: no PQL calls are made to suggest or correct a name.
+"""
+
+import threading
+import unicodedata
+
+from geo_target_mirror import get_geo_index, normalize_geo_name
+
+# Groups of names that refer to the same place; the first entry is the preferred spelling
+GEO_NAME_ALIASES = [
+    ("Bengaluru", "Bangalore"),
+    ("Gurugram", "Gurgaon"),
+    ("Mumbai", "Bombay"),
+    ("Chennai", "Madras"),
+    ("Kolkata", "Calcutta"),
+    ("Mysuru", "Mysore"),
+    ("Mangaluru", "Mangalore"),
+    ("Belagavi", "Belgaum"),
+    ("Kalaburagi", "Gulbarga"),
+    ("Vijayapura", "Bijapur"),
+    ("Ballari", "Bellary"),
+    ("Shivamogga", "Shimoga"),
+    ("Tumakuru", "Tumkur"),
+    ("Prayagraj", "Allahabad"),
+    ("Varanasi", "Banaras", "Benares"),
+    ("Puducherry", "Pondicherry"),
+    ("Thiruvananthapuram", "Trivandrum"),
+    ("Kochi", "Cochin"),
+    ("Kozhikode", "Calicut"),
+    ("Vadodara", "Baroda"),
+    ("Pune", "Poona"),
+    ("Shimla", "Simla"),
+    ("Visakhapatnam", "Vizag", "Vishakhapatnam"),
+    ("Odisha", "Orissa"),
+    ("Uttarakhand", "Uttaranchal"),
+]
+
+# State names and their common abbreviations, used by disambiguate_by_parent_region
+STATE_VARIATIONS = {
+    'maharashtra': ['maharashtra', 'mh'],
+    'bihar': ['bihar', 'br'],
+    'uttar pradesh': ['uttar pradesh', 'up'],
+    'west bengal': ['west bengal', 'wb'],
+    'tamil nadu': ['tamil nadu', 'tn'],
+    'karnataka': ['karnataka', 'ka'],
+    'gujarat': ['gujarat', 'gj'],
+    'rajasthan': ['rajasthan', 'rj'],
+    'andhra pradesh': ['andhra pradesh', 'ap'],
+    'telangana': ['telangana', 'ts'],
+    'kerala': ['kerala', 'kl'],
+    'odisha': ['odisha', 'or'],
+    'punjab': ['punjab', 'pb'],
+    'haryana': ['haryana', 'hr'],
+    'himachal pradesh': ['himachal pradesh', 'hp'],
+    'uttarakhand': ['uttarakhand', 'uk'],
+    'jharkhand': ['jharkhand', 'jh'],
+    'chhattisgarh': ['chhattisgarh', 'cg'],
+    'madhya pradesh': ['madhya pradesh', 'mp'],
+    'assam': ['assam', 'as'],
+    'meghalaya': ['meghalaya', 'ml'],
+    'manipur': ['manipur', 'mn'],
+    'mizoram': ['mizoram', 'mz'],
+    'nagaland': ['nagaland', 'nl'],
+    'tripura': ['tripura', 'tr'],
+    'arunachal pradesh': ['arunachal pradesh', 'ar'],
+    'sikkim': ['sikkim', 'sk'],
+    'goa': ['goa', 'ga']
+}
+
+# Commonly ambiguous location names in India (multiple instances across states)
+KNOWN_AMBIGUOUS_LOCATIONS = frozenset({
+    'aurangabad', 'salem', 'bangalore', 'mysore', 'hassan', 'mandya', 
+    'tumkur', 'shimoga', 'bellary', 'gulbarga', 'bijapur', 'raichur',
+    'chitradurga', 'davangere', 'bagalkot', 'haveri', 'gadag', 'koppal',
+    'yadgir', 'kolar', 'chikkaballapur', 'ramanagara', 'chamarajanagar',
+    'kodagu', 'udupi', 'chikkamagaluru', 'shivamogga', 'vijayapura',
+    'kalburgi', 'ballari', 'nellore', 'kadapa', 'kurnool', 'anantapur',
+    'chittoor', 'tirupati', 'vizianagaram', 'srikakulam', 'guntur',
+    'krishna', 'west godavari', 'east godavari', 'warangal', 'khammam',
+    'nalgonda', 'mahbubnagar', 'rangareddy', 'medak', 'nizamabad',
+    'adilabad', 'karimnagar', 'hyderabad', 'secunderabad'
+})
+
+# Geo_Target types that count as a state for disambiguation, and those whose duplicate names are ambiguous
+STATE_GEO_TYPES = ("REGION", "PROVINCE", "STATE", "DEPARTMENT")
+LOCAL_GEO_TYPES = ("CITY", "SUB_DISTRICT", "DISTRICT")
+
+FUZZY_MIN_SCORE = 0.5  # Minimum trigram similarity for a suggestion
+FUZZY_AUTO_APPLY_SCORE = 0.72  # Minimum similarity to auto-apply a correction
+FUZZY_AUTO_APPLY_MARGIN = 0.1  # Required lead over the runner-up to auto-apply
+
+_index = None
+_index_source = None
+_index_lock = threading.Lock()
+_state_index = None
+_state_index_source = None
+
+
+def fold_geo_name(name):
+    """Normalize a geo name and strip diacritics (e.g. 'Bāramūla' -> 'baramula')"""
+    decomposed = unicodedata.normalize("NFKD", normalize_geo_name(name))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def trigrams(name):
+    padded = f"  {fold_geo_name(name)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class GeoNameIndex:
+    """Alias table plus trigram postings over every known geo spelling"""
+
+    def __init__(self, names):
+        self.names = {}  # folded key -> display name
+        self.trigram_postings = {}
+        self.gram_counts = {}
+        self.alias_groups = {}
+
+        for name in names:
+            self._add(name)
+        for group in GEO_NAME_ALIASES:
+            for alias in group:
+                self.alias_groups[fold_geo_name(alias)] = group
+                self._add(alias)
+
+    def _add(self, name):
+        key = fold_geo_name(name)
+        if not key or key in self.names:
+            return
+        self.names[key] = name
+        grams = trigrams(name)
+        self.gram_counts[key] = len(grams)
+        for gram in grams:
+            self.trigram_postings.setdefault(gram, set()).add(key)
+
+    def aliases(self, name):
+        """Other spellings of the same place, preferred spelling first"""
+        key = fold_geo_name(name)
+        group = self.alias_groups.get(key, ())
+        return [alias for alias in group if fold_geo_name(alias) != key]
+
+    def similar(self, name, limit=5, min_score=FUZZY_MIN_SCORE):
+        """Rank known names by trigram (Dice coefficient) similarity"""
+        query_grams = trigrams(name)
+        overlap = {}
+        for gram in query_grams:
+            for key in self.trigram_postings.get(gram, ()):
+                overlap[key] = overlap.get(key, 0) + 1
+
+        scored = []
+        for key, shared in overlap.items():
+            score = 2 * shared / (len(query_grams) + self.gram_counts[key])
+            if score >= min_score:
+                scored.append((self.names[key], round(score, 3)))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+
+def _build_index(geo_index):
+    names = [geo["Name"] for geo in geo_index["by_id"].values()]
+    names.extend(state.title() for state in STATE_VARIATIONS)
+    return GeoNameIndex(names)
+
+
+def get_name_index():
+    """Return the name index, rebuilding it when the geo mirror is reloaded"""
+    global _index, _index_source
+    geo_index = get_geo_index()
+    if _index is None or _index_source is not geo_index:
+        with _index_lock:
+            if _index is None or _index_source is not geo_index:
+                _index = _build_index(geo_index)
+                _index_source = geo_index
+    return _index
+
+
+class StateIndex:
+    """
+    Compiled state lookup tables:
+    - state_by_alias: folded state name or abbreviation -> canonical state name
+    - parent_ids_by_state: canonical state name -> Indian GAM geo IDs for that state
+    - ambiguous_names: folded names with several targetable Indian cities/sub-districts
+    """
+
+    def __init__(self, geo_index):
+        self.state_by_alias = {}
+        for state, variations in STATE_VARIATIONS.items():
+            for variation in variations:
+                self.state_by_alias[fold_geo_name(variation)] = state
+            # Old/alternate spellings of the state itself (e.g. Orissa, Uttaranchal)
+            for group in GEO_NAME_ALIASES:
+                if any(fold_geo_name(alias) == state for alias in group):
+                    for alias in group:
+                        self.state_by_alias.setdefault(fold_geo_name(alias), state)
+
+        self.parent_ids_by_state = {}
+        name_counts = {}
+        for geo in geo_index["by_id"].values():
+            if geo.get("CountryCode") != "IN":
+                continue
+            key = fold_geo_name(geo["Name"])
+            if geo.get("Type") in STATE_GEO_TYPES and key in self.state_by_alias:
+                state = self.state_by_alias[key]
+                self.parent_ids_by_state.setdefault(state, set()).add(str(geo["Id"]))
+            elif geo.get("Type") in LOCAL_GEO_TYPES and geo.get("Targetable"):
+                name_counts[key] = name_counts.get(key, 0) + 1
+
+        self.ambiguous_names = frozenset(KNOWN_AMBIGUOUS_LOCATIONS | {key for key, count in name_counts.items() if count > 1})
+
+    def canonical_state(self, name):
+        """Canonical state name for a state name or abbreviation (e.g. 'MH' -> 'maharashtra')"""
+        return self.state_by_alias.get(fold_geo_name(name))
+
+    def state_parent_ids(self, name):
+        """GAM geo IDs of the given state (empty when unknown or no mirror is loaded)"""
+        state = self.canonical_state(name)
+        return self.parent_ids_by_state.get(state, set()) if state else set()
+
+    def is_ambiguous(self, name):
+        return fold_geo_name(name) in self.ambiguous_names
+
+
+def get_state_index():
+    """Return the compiled state index, rebuilding it when the geo mirror is reloaded"""
+    global _state_index, _state_index_source
+    geo_index = get_geo_index()
+    if _state_index is None or _state_index_source is not geo_index:
+        with _index_lock:
+            if _state_index is None or _state_index_source is not geo_index:
+                _state_index = StateIndex(geo_index)
+                _state_index_source = geo_index
+    return _state_index
+
+
+def suggest_geo_names(name, limit=5):
+    """
+    Suggest known spellings for a geo name that was not found.
+
+    Returns:
+        list: (suggested name, score) tuples, best first; aliases score 1.0
+    """
+    index = get_name_index()
+    suggestions = [(alias, 1.0) for alias in index.aliases(name)]
+    seen = {fold_geo_name(alias) for alias, _ in suggestions}
+    seen.add(fold_geo_name(name))
+    for candidate, score in index.similar(name, limit=limit + len(seen)):
+        if fold_geo_name(candidate) not in seen:
+            suggestions.append((candidate, score))
+            seen.add(fold_geo_name(candidate))
+    return suggestions[:limit]
+
+
+def correct_geo_name(name):
+    """
+    Return a single high-confidence correction for a geo name, or None.
+
+    Alias spellings and diacritic-only differences are always applied; trigram matches
+    only when they clear FUZZY_AUTO_APPLY_SCORE with a FUZZY_AUTO_APPLY_MARGIN lead.
+    """
+    index = get_name_index()
+    key = fold_geo_name(name)
+
+    aliases = index.aliases(name)
+    if aliases:
+        # Prefer the spelling GAM actually uses when the mirror is available
+        mirrored = get_geo_index()["by_name"]
+        return next((alias for alias in aliases if normalize_geo_name(alias) in mirrored), aliases[0])
+
+    # Same name apart from case/diacritics
+    known = index.names.get(key)
+    if known and known != name:
+        return known
+
+    scored = [(candidate, score) for candidate, score in index.similar(name, limit=3) if fold_geo_name(candidate) != key]
+    if not scored or scored[0][1] < FUZZY_AUTO_APPLY_SCORE:
+        return None
+    if len(scored) > 1 and scored[0][1] - scored[1][1] < FUZZY_AUTO_APPLY_MARGIN:
+        return None
+    return scored[0][0]
+
+
+if __name__ == "__main__":
+    # Example usage
+    for example in ["Bangalore", "Gurgaon", "Hyderabd", "Bhubaneshwar"]:
+        print(f"{example} -> {correct_geo_name(example)} (suggestions: {suggest_geo_names(example)})")
@@ -0,0 +1,199 @@
+"""
+Offline mirror of the GAM Geo_Target table.
+
+`python geo_target_mirror.py sync` pages the whole Geo_Target table through PQL and
+stores it in GEO_TARGET_MIRROR_PATH. The geo helpers in single_line.py resolve names
+and parent regions from the in-process index built over that file, and only fall back
+to live PQL queries when a name or ID is missing from the mirror.
+"""
+
+import argparse
+import json
+import os
+import threading
+from datetime import datetime
+
+from config import GEO_TARGET_MIRROR_PATH
+
+GEO_TARGET_COLUMNS = ["Id", "Name", "Type", "CountryCode", "ParentIds", "Targetable"]
+PQL_PAGE_SIZE = 500
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def normalize_geo_name(name):
+    """Normalize a geo name for index lookups (case and whitespace insensitive)"""
+    return " ".join(str(name).split()).casefold()
+
+
+def unwrap_pql_value(value):
+    """Convert a PQL Value (TextValue, NumberValue, BooleanValue, SetValue...) to a plain Python value"""
+    if value is None:
+        return None
+    try:
+        members = value['values']
+    except (KeyError, TypeError, AttributeError):
+        members = None
+    if members is not None:
+        return [unwrap_pql_value(member) for member in members]
+    try:
+        return value['value']
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+
+def sync_geo_targets(client, path=GEO_TARGET_MIRROR_PATH, page_size=PQL_PAGE_SIZE):
+    """
+    Download the full Geo_Target table into a local JSON mirror.
+
+    Args:
+        client: Google Ad Manager client
+        path: Destination file for the mirror
+        page_size: Rows fetched per PQL page
+
+    Returns:
+        int: Number of geo targets written
+    """
+    pql_service = client.GetService("PublisherQueryLanguageService", version="v202508")
+    rows = []
+    offset = 0
+
+    print(f"🌍 Syncing Geo_Target table to {path}...")
+    while True:
+        query = f"SELECT {', '.join(GEO_TARGET_COLUMNS)} FROM Geo_Target ORDER BY Id LIMIT {page_size} OFFSET {offset}"
+        response = pql_service.select({'query': query})
+        page = response['rows'] if 'rows' in response and response['rows'] else []
+
+        for row in page:
+            values = [unwrap_pql_value(value) for value in row['values']]
+            record = dict(zip(GEO_TARGET_COLUMNS, values))
+            rows.append([
+                record["Id"],
+                record["Name"],
+                record["Type"],
+                record["CountryCode"],
+                record["ParentIds"] or [],
+                bool(record["Targetable"]),
+            ])
+
+        print(f"  - Fetched {len(rows)} geo targets so far")
+        if len(page) < page_size:
+            break
+        offset += page_size
+
+    mirror = {
+        "synced_at": datetime.now().isoformat(),
+        "columns": GEO_TARGET_COLUMNS,
+        "rows": rows,
+    }
+
+    # Write to a temp file first so a failed sync never leaves a truncated mirror behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(mirror, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+    reset_geo_index()
+    print(f"✅ Synced {len(rows)} geo targets")
+    return len(rows)
+
+
+def _build_index(path):
+    """Load the mirror file and build the name and ID indexes"""
+    index = {"available": False, "by_name": {}, "by_id": {}, "synced_at": None}
+    if not os.path.exists(path):
+        return index
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            mirror = json.load(f)
+    except Exception as e:
+        print(f"⚠️ Could not load geo mirror {path}: {e}")
+        return index
+
+    columns = mirror.get("columns", GEO_TARGET_COLUMNS)
+    for values in mirror.get("rows", []):
+        geo = dict(zip(columns, values))
+        index["by_id"][str(geo["Id"])] = geo
+        index["by_name"].setdefault(normalize_geo_name(geo["Name"]), []).append(geo)
+
+    index["available"] = True
+    index["synced_at"] = mirror.get("synced_at")
+    print(f"🌍 Loaded offline geo mirror: {len(index['by_id'])} geo targets (synced {index['synced_at']})")
+    return index
+
+
+def get_geo_index(path=GEO_TARGET_MIRROR_PATH):
+    """Return the in-process geo index, loading it on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = _build_index(path)
+    return _index
+
+
+def reset_geo_index():
+    """Drop the in-process index so the next lookup reloads the mirror file"""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def mirror_available():
+    return get_geo_index()["available"]
+
+
+def find_geo_candidates(name):
+    """
+    Look up all mirrored geo targets with the given name.
+
+    Returns:
+        list: Candidate rows (copies) in mirror order, or None if no mirror is available
+    """
+    index = get_geo_index()
+    if not index["available"]:
+        return None
+    return [dict(geo) for geo in index["by_name"].get(normalize_geo_name(name), [])]
+
+
+def get_geo_target(geo_id):
+    """Return the mirrored row for a geo ID, or None if unknown or no mirror is available"""
+    index = get_geo_index()
+    if not index["available"]:
+        return None
+    geo = index["by_id"].get(str(geo_id))
+    return dict(geo) if geo else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline Geo_Target mirror')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sync_parser = subparsers.add_parser('sync', help='Download the Geo_Target table')
+    sync_parser.add_argument('--path', default=GEO_TARGET_MIRROR_PATH, help='Mirror file path')
+    sync_parser.add_argument('--page-size', type=int, default=PQL_PAGE_SIZE, help='Rows per PQL page')
+
+    lookup_parser = subparsers.add_parser('lookup', help='Look up a geo name in the mirror')
+    lookup_parser.add_argument('name', help='Geo name to look up')
+
+    args = parser.parse_args()
+
+    if args.command == 'sync':
+        from googleads import ad_manager
+        client = ad_manager.AdManagerClient.LoadFromStorage("googleads1.yaml")
+        sync_geo_targets(client, args.path, args.page_size)
+    elif args.command == 'lookup':
+        candidates = find_geo_candidates(args.name)
+        if candidates is None:
+            print("❌ No geo mirror found. Run: python geo_target_mirror.py sync")
+            return
+        for geo in candidates:
+            print(f"{geo['Name']} ({geo['Type']}, {geo['CountryCode']}) - ID: {geo['Id']}, Parents: {geo['ParentIds']}, Targetable: {geo['Targetable']}")
+        if not candidates:
+            print(f"No geo targets named '{args.name}'")
+
+
+if __name__ == "__main__":
+    main()
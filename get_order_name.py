@@ -1,7 +1,59 @@
+import threading
+
+from cachetools import LRUCache
 from googleads import ad_manager
 
+ORDER_METADATA_CACHE_SIZE = 1024
+
+# Order ID -> {'advertiser_id': ..., 'name': ...}; an order's advertiser doesn't change unless it is reassigned
+_order_metadata = LRUCache(maxsize=ORDER_METADATA_CACHE_SIZE)
+_order_metadata_lock = threading.Lock()
+_order_metadata_stats = {'hits': 0, 'misses': 0}
+
+
+def seed_order_metadata(order_id, advertiser_id=None, name=None):
+    """Record what is already known about an order (e.g. right after create_order)"""
+    with _order_metadata_lock:
+        metadata = dict(_order_metadata.get(str(order_id), {}))
+        if advertiser_id is not None:
+            metadata['advertiser_id'] = advertiser_id
+        if name is not None:
+            metadata['name'] = name
+        _order_metadata[str(order_id)] = metadata
+
+
+def _cached_order_field(order_id, field):
+    with _order_metadata_lock:
+        value = _order_metadata.get(str(order_id), {}).get(field)
+        _order_metadata_stats['hits' if value is not None else 'misses'] += 1
+        return value
+
+
+def invalidate_order_metadata(order_id=None):
+    """Forget one order (e.g. after it was reassigned to another advertiser), or every order"""
+    with _order_metadata_lock:
+        if order_id is None:
+            _order_metadata.clear()
+        else:
+            _order_metadata.pop(str(order_id), None)
+
+
+def order_metadata_stats():
+    with _order_metadata_lock:
+        lookups = _order_metadata_stats['hits'] + _order_metadata_stats['misses']
+        return {
+            'hits': _order_metadata_stats['hits'],
+            'misses': _order_metadata_stats['misses'],
+            'orders': len(_order_metadata),
+            'hit_rate': (_order_metadata_stats['hits'] / lookups * 100) if lookups else 0.0,
+        }
+
 
 def fetch_advertiser_id_from_order(client, order_id):
+    advertiser_id = _cached_order_field(order_id, 'advertiser_id')
+    if advertiser_id is not None:
+        return advertiser_id
+
     order_service = client.GetService('OrderService', version='v202508')  # Adjust the version as needed
     statement = ad_manager.StatementBuilder().Where('id = :order_id').WithBindVariable('order_id', order_id)
     try:
@@ -11,6 +63,7 @@ def fetch_advertiser_id_from_order(client, order_id):
 
         if orders:
             advertiser_id = orders[0].advertiserId
+            seed_order_metadata(order_id, advertiser_id=advertiser_id, name=orders[0].name)
             return advertiser_id
         else:
             raise ValueError(f'No order found with ID: {order_id}')
@@ -21,6 +74,10 @@ def fetch_advertiser_id_from_order(client, order_id):
         return None
 def get_order_name(client,order_id ):
     """Fetch the name of the order for a given order_id."""
+    name = _cached_order_field(order_id, 'name')
+    if name is not None:
+        return name
+
     # Initialize the OrderService
     order_service = client.GetService('OrderService')
 
@@ -33,6 +90,7 @@ def get_order_name(client,order_id ):
     if 'results' in response:
         # If results exist, return the name of the first order
         order = response['results'][0]
+        seed_order_metadata(order_id, advertiser_id=order['advertiserId'], name=order['name'])
         return order['name']
     else:
         print(f'No order found for order_id: {order_id}')
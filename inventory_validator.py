@@ -0,0 +1,160 @@
+"""
+Preflight liveness checks for placement and ad unit IDs before createLineItems.
+
+A stale placement ID in the sheet (or a retired PSBK ad slot / NWP ad unit) makes GAM
+reject the whole line item. validate_inventory_ids() looks up every targeted ID with a
+few chunked `id IN (...)` statements, reports the ones that are not ACTIVE and caches
+liveness per ID for INVENTORY_LIVENESS_TTL seconds, so the lines of one campaign share
+a single lookup. If GAM cannot be reached the IDs are passed through unchanged and
+createLineItems reports any problem as before.
+"""
+
+import threading
+import time
+
+from cachetools import TTLCache
+from googleads import ad_manager
+
+from config import INVENTORY_LIVENESS_TTL, INVENTORY_VALIDATION_ENABLED
+from rate_limiter import gam_rate_limiter
+
+# IDs per statement; one statement usually covers every placement of a campaign
+INVENTORY_VALIDATION_CHUNK_SIZE = 400
+INVENTORY_LIVENESS_CACHE_SIZE = 20000
+
+# Inventory kind -> (service, statement method)
+INVENTORY_SERVICES = {
+    "placement": ("PlacementService", "getPlacementsByStatement"),
+    "ad_unit": ("InventoryService", "getAdUnitsByStatement"),
+}
+
+_liveness = TTLCache(maxsize=INVENTORY_LIVENESS_CACHE_SIZE, ttl=INVENTORY_LIVENESS_TTL, timer=time.time)
+_liveness_lock = threading.Lock()
+
+
+def _fetch_statuses(client, kind, ids, version):
+    """Return {id: status} for the given numeric IDs, one statement per chunk"""
+    service_name, method_name = INVENTORY_SERVICES[kind]
+    service = client.GetService(service_name, version=version)
+    statuses = {}
+    for start in range(0, len(ids), INVENTORY_VALIDATION_CHUNK_SIZE):
+        chunk = ids[start:start + INVENTORY_VALIDATION_CHUNK_SIZE]
+        statement = (ad_manager.StatementBuilder()
+                     .Where(f"id IN ({', '.join(chunk)})")
+                     .Limit(len(chunk)))
+        gam_rate_limiter.acquire()
+        response = getattr(service, method_name)(statement.ToStatement())
+        results = response['results'] if 'results' in response else []
+        for item in results or []:
+            statuses[str(item['id'])] = item['status']
+    return statuses
+
+
+def validate_inventory_ids(client, ids, kind="placement", version="v202508"):
+    """
+    Split placement or ad unit IDs into live and dead ones.
+
+    Args:
+        client: GAM client
+        ids: Placement IDs (kind="placement") or ad unit IDs (kind="ad_unit")
+        kind: "placement" or "ad_unit"
+
+    Returns:
+        tuple: (live IDs, {dead ID: reason}); live IDs keep their input order and type
+    """
+    if kind not in INVENTORY_SERVICES:
+        raise ValueError(f"Unknown inventory kind: {kind}")
+    if not INVENTORY_VALIDATION_ENABLED:
+        return list(ids), {}
+
+    keys = list(dict.fromkeys(str(i).strip() for i in ids))
+    dead = {key: "not a numeric ID" for key in keys if not key.isdigit()}
+
+    with _liveness_lock:
+        cached = {key: _liveness.get((kind, key)) for key in keys if key not in dead}
+    unknown = [key for key, status in cached.items() if status is None]
+
+    if unknown:
+        print(f"🔎 Validating {len(unknown)} {kind.replace('_', ' ')} ID(s) against GAM "
+              f"({len(cached) - len(unknown)} cached)")
+        try:
+            statuses = _fetch_statuses(client, kind, unknown, version)
+        except Exception as e:
+            print(f"⚠️ Inventory validation failed, keeping all {kind.replace('_', ' ')} IDs: {e}")
+            statuses = None
+        if statuses is not None:
+            with _liveness_lock:
+                for key in unknown:
+                    status = statuses.get(key, "NOT_FOUND")
+                    _liveness[(kind, key)] = status
+                    cached[key] = status
+
+    for key, status in cached.items():
+        if status is not None and status != "ACTIVE":
+            dead[key] = status
+
+    live = [i for i in ids if str(i).strip() not in dead]
+    if dead:
+        print(f"🚫 Dropping {len(dead)} dead {kind.replace('_', ' ')} ID(s): "
+              + ", ".join(f"{key} ({reason})" for key, reason in dead.items()))
+    return live, dead
+
+
+def drop_dead_placements(client, placement_data):
+    """
+    Remove dead IDs from fetch_placements_ids-style placement_data (in place).
+
+    Sizes with targeting_type "ad_slot_id" (PSBK) are checked as ad units, everything
+    else as placements; all IDs of one kind are validated together.
+
+    Returns:
+        dict: {dead ID: reason} for every dropped ID
+    """
+    ids_by_kind = {"placement": [], "ad_unit": []}
+    for data in placement_data.values():
+        if isinstance(data, dict):
+            kind = "ad_unit" if data.get('targeting_type') == 'ad_slot_id' else "placement"
+            ids_by_kind[kind].extend(data.get('placement_ids', []))
+
+    dead = {}
+    dead_by_kind = {}
+    for kind, ids in ids_by_kind.items():
+        if ids:
+            _, dead_by_kind[kind] = validate_inventory_ids(client, ids, kind)
+            dead.update(dead_by_kind[kind])
+
+    for size, data in placement_data.items():
+        if not isinstance(data, dict):
+            continue
+        kind = "ad_unit" if data.get('targeting_type') == 'ad_slot_id' else "placement"
+        kind_dead = dead_by_kind.get(kind, {})
+        ids = data.get('placement_ids', [])
+        kept = [pid for pid in ids if str(pid).strip() not in kind_dead]
+        if len(kept) != len(ids):
+            print(f"🧹 {size}: removed {len(ids) - len(kept)} dead ID(s), {len(kept)} left")
+            data['placement_ids'] = kept
+    return dead
+
+
+def clear_inventory_liveness():
+    """Forget cached liveness, e.g. after inventory was changed in GAM"""
+    with _liveness_lock:
+        _liveness.clear()
+
+
+def inventory_liveness_stats():
+    with _liveness_lock:
+        _liveness.expire()
+        statuses = list(_liveness.values())
+    return {
+        'cached_ids': len(statuses),
+        'dead_ids': sum(1 for status in statuses if status != "ACTIVE"),
+    }
+
+
+if __name__ == "__main__":
+    # Example usage
+    client = ad_manager.AdManagerClient.LoadFromStorage("googleads1.yaml")
+    live, dead = validate_inventory_ids(client, [23314114031, 23314120439, 23314114448, 23312946423], kind="ad_unit")
+    print(f"✅ Live: {live}")
+    print(f"🚫 Dead: {dead}")
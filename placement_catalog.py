@@ -0,0 +1,276 @@
+"""
+Offline catalog of the placement spreadsheet.
+
+`python placement_catalog.py export` downloads every placement worksheet used by
+single_line and writes them to a versioned SQLite file under PLACEMENT_CATALOG_DIR,
+together with a manifest.json holding the catalog version, the spreadsheet revision
+and SHA-256 checksums of the file and of each worksheet. fetch_placements_ids can
+then read placements from the catalog only (PLACEMENT_SOURCE = "catalog" or
+source="catalog"), and the Sheets path falls back to it when the API fails.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import (
+    CREDENTIALS_PATH,
+    PLACEMENT_CATALOG_DIR,
+    PLACEMENT_CATALOG_KEEP_VERSIONS,
+    PLACEMENT_SHEET_URL,
+    PLACEMENT_WORKBOOK_SHEETS,
+)
+
+MANIFEST_NAME = "manifest.json"
+CATALOG_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE worksheets (
+    name TEXT PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    cells TEXT NOT NULL  -- JSON array of rows, exactly the bytes the checksum covers
+);
+"""
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+class PlacementCatalogError(Exception):
+    """The catalog is missing, fails its checksum, or does not contain the requested worksheet"""
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _encode_values(values):
+    return json.dumps(values, ensure_ascii=False, separators=(",", ":"))
+
+
+def worksheet_checksum(payload):
+    """SHA-256 of a worksheet's encoded cell values (stable across exports of unchanged data)"""
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def manifest_path(catalog_dir=PLACEMENT_CATALOG_DIR):
+    return os.path.join(catalog_dir, MANIFEST_NAME)
+
+
+def read_manifest(catalog_dir=PLACEMENT_CATALOG_DIR):
+    """Return the current manifest, or None if no catalog has been exported"""
+    path = manifest_path(catalog_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _prune_versions(catalog_dir, keep):
+    versions = sorted(name for name in os.listdir(catalog_dir) if name.startswith("placements-v") and name.endswith(".sqlite"))
+    for name in versions[:-keep] if keep > 0 else []:
+        try:
+            os.remove(os.path.join(catalog_dir, name))
+        except OSError as e:
+            print(f"⚠️ Could not remove old catalog {name}: {e}")
+
+
+def write_catalog(spreadsheet_id, revision, values_by_sheet, catalog_dir=PLACEMENT_CATALOG_DIR,
+                  keep_versions=PLACEMENT_CATALOG_KEEP_VERSIONS):
+    """
+    Write worksheet values to a new catalog version and point the manifest at it.
+
+    Args:
+        spreadsheet_id: ID of the exported spreadsheet
+        revision: Drive revision marker of the spreadsheet (or None)
+        values_by_sheet: {sheet name: all cell values}
+
+    Returns:
+        dict: The new manifest
+    """
+    os.makedirs(catalog_dir, exist_ok=True)
+    previous = read_manifest(catalog_dir)
+    version = (previous["version"] + 1) if previous else 1
+    file_name = f"placements-v{version:04d}.sqlite"
+    path = os.path.join(catalog_dir, file_name)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    exported_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    sheets = {}
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(CATALOG_SCHEMA)
+        for sheet_name, values in values_by_sheet.items():
+            payload = _encode_values(values)
+            checksum = worksheet_checksum(payload)
+            sheets[sheet_name] = {"rows": len(values), "sha256": checksum}
+            conn.execute("INSERT INTO worksheets VALUES (?, ?, ?, ?)", (sheet_name, len(values), checksum, payload))
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("version", str(version)),
+            ("spreadsheet_id", spreadsheet_id),
+            ("revision", revision or ""),
+            ("exported_at", exported_at),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+    manifest = {
+        "version": version,
+        "file": file_name,
+        "sha256": _sha256_file(path),
+        "spreadsheet_id": spreadsheet_id,
+        "revision": revision,
+        "exported_at": exported_at,
+        "sheets": sheets,
+    }
+    tmp_manifest = f"{manifest_path(catalog_dir)}.tmp"
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_manifest, manifest_path(catalog_dir))
+
+    _prune_versions(catalog_dir, keep_versions)
+    return manifest
+
+
+class PlacementCatalog:
+    """Worksheet values of one verified catalog version, loaded fully into memory"""
+
+    def __init__(self, manifest, values_by_sheet):
+        self.manifest = manifest
+        self.version = manifest["version"]
+        self.spreadsheet_id = manifest["spreadsheet_id"]
+        self.values_by_sheet = values_by_sheet
+
+    def values(self, sheet_name):
+        try:
+            return self.values_by_sheet[sheet_name]
+        except KeyError:
+            raise PlacementCatalogError(
+                f"Worksheet '{sheet_name}' is not in placement catalog v{self.version} "
+                f"(has: {list(self.values_by_sheet)})"
+            )
+
+
+def _read_catalog(catalog_dir):
+    manifest = read_manifest(catalog_dir)
+    if manifest is None:
+        raise PlacementCatalogError(f"No placement catalog in {catalog_dir}; run 'python placement_catalog.py export'")
+    path = os.path.join(catalog_dir, manifest["file"])
+    if not os.path.exists(path):
+        raise PlacementCatalogError(f"Placement catalog file missing: {path}")
+    if _sha256_file(path) != manifest["sha256"]:
+        raise PlacementCatalogError(f"Placement catalog {manifest['file']} does not match its manifest checksum")
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        worksheets = conn.execute("SELECT name, sha256, cells FROM worksheets").fetchall()
+    finally:
+        conn.close()
+
+    values_by_sheet = {}
+    for sheet_name, checksum, payload in worksheets:
+        if checksum != manifest["sheets"].get(sheet_name, {}).get("sha256") or worksheet_checksum(payload) != checksum:
+            raise PlacementCatalogError(f"Worksheet '{sheet_name}' in catalog v{manifest['version']} fails its checksum")
+        values_by_sheet[sheet_name] = json.loads(payload)
+    return PlacementCatalog(manifest, values_by_sheet)
+
+
+def get_placement_catalog(catalog_dir=PLACEMENT_CATALOG_DIR):
+    """
+    Return the current catalog, verified and loaded once per manifest version.
+
+    Raises:
+        PlacementCatalogError: If there is no catalog or it fails verification
+    """
+    global _catalog
+    manifest = read_manifest(catalog_dir)
+    version = manifest["version"] if manifest else None
+    with _catalog_lock:
+        if _catalog is None or _catalog[0] != (catalog_dir, version):
+            _catalog = ((catalog_dir, version), _read_catalog(catalog_dir))
+        return _catalog[1]
+
+
+def load_catalog_values(spreadsheet_id, sheet_names, catalog_dir=PLACEMENT_CATALOG_DIR):
+    """Return {sheet name: all cell values} from the catalog for the given spreadsheet"""
+    catalog = get_placement_catalog(catalog_dir)
+    if catalog.spreadsheet_id != spreadsheet_id:
+        raise PlacementCatalogError(
+            f"Placement catalog v{catalog.version} was exported from spreadsheet {catalog.spreadsheet_id}, not {spreadsheet_id}"
+        )
+    return {sheet_name: catalog.values(sheet_name) for sheet_name in dict.fromkeys(sheet_names)}
+
+
+def export_placement_catalog(sheet_url=PLACEMENT_SHEET_URL, sheet_names=PLACEMENT_WORKBOOK_SHEETS,
+                             credentials_path=CREDENTIALS_PATH, catalog_dir=PLACEMENT_CATALOG_DIR):
+    """Download the placement worksheets from Google Sheets and write a new catalog version"""
+    from placements_for_creatives import download_placement_values
+
+    spreadsheet_id, revision, values_by_sheet = download_placement_values(credentials_path, sheet_url, sheet_names)
+    return write_catalog(spreadsheet_id, revision, values_by_sheet, catalog_dir=catalog_dir)
+
+
+def verify_placement_catalog(catalog_dir=PLACEMENT_CATALOG_DIR):
+    """Check the catalog file and every worksheet against the manifest checksums"""
+    return _read_catalog(catalog_dir).manifest
+
+
+def _print_manifest(manifest):
+    print(f"📦 Placement catalog v{manifest['version']} ({manifest['file']})")
+    print(f"  - Spreadsheet: {manifest['spreadsheet_id']} (revision {manifest['revision']})")
+    print(f"  - Exported at: {manifest['exported_at']}")
+    print(f"  - SHA-256: {manifest['sha256']}")
+    for sheet_name, info in manifest["sheets"].items():
+        print(f"  - '{sheet_name}': {info['rows']} rows, sha256 {info['sha256'][:12]}…")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline placement catalog')
+    parser.add_argument('--dir', default=PLACEMENT_CATALOG_DIR, help='Catalog directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='Snapshot the placement spreadsheet into a new catalog version')
+    export_parser.add_argument('--sheet-url', default=PLACEMENT_SHEET_URL, help='Placement spreadsheet URL')
+    export_parser.add_argument('--sheets', nargs='+', default=PLACEMENT_WORKBOOK_SHEETS, help='Worksheet names')
+    export_parser.add_argument('--credentials', default=CREDENTIALS_PATH, help='Service account credentials file')
+
+    subparsers.add_parser('verify', help='Verify the current catalog against its manifest')
+    subparsers.add_parser('info', help='Show the current manifest')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'export':
+            start = time.time()
+            manifest = export_placement_catalog(args.sheet_url, args.sheets, args.credentials, args.dir)
+            print(f"✅ Exported placement catalog in {time.time() - start:.2f}s")
+            _print_manifest(manifest)
+        elif args.command == 'verify':
+            start = time.time()
+            manifest = verify_placement_catalog(args.dir)
+            print(f"✅ Catalog verified in {(time.time() - start) * 1000:.1f} ms")
+            _print_manifest(manifest)
+        elif args.command == 'info':
+            manifest = read_manifest(args.dir)
+            if manifest is None:
+                print(f"❌ No placement catalog in {args.dir}. Run: python placement_catalog.py export")
+                return
+            _print_manifest(manifest)
+    except PlacementCatalogError as e:
+        print(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
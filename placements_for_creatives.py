@@ -1,35 +1,132 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import gspread
-from google.oauth2.service_account import Credentials
+import numpy as np
+import pandas as pd
+from gspread.urls import DRIVE_FILES_API_V3_URL
+from gspread.utils import extract_id_from_url, fill_gaps
 
-def fetch_placements_ids(credentials_path, sheet_url, sheet_name, site_filter, platforms_filter, adtype_filters, richmedia_platform_map=None, line_type="standard"):
-    creds = Credentials.from_service_account_file(
-        credentials_path,
-        scopes=["https://www.googleapis.com/auth/spreadsheets"]
-    )
-    client = gspread.authorize(creds)
+from config import (
+    CREDENTIALS_PATH, PLACEMENT_FILTER_ENGINE, PLACEMENT_SNAPSHOT_DIR, PLACEMENT_SNAPSHOT_TTL,
+    PLACEMENT_FETCH_WORKERS, PLACEMENT_REVISION_CHECK_INTERVAL, PLACEMENT_SHEETS_TIMEOUT, PLACEMENT_SOURCE,
+)
+from placement_catalog import PlacementCatalogError, get_placement_catalog, load_catalog_values
+from sheets_client import get_sheets_client
+
+SHEETS_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    # Needed to read the spreadsheet's modifiedTime/version for snapshot invalidation
+    "https://www.googleapis.com/auth/drive.metadata.readonly",
+]
+
+_snapshots = {}
+_tables = {}
+_served_revisions = {}
+_snapshot_lock = threading.Lock()
+_UNSET = object()
+
+
+def _get_client(credentials_path):
+    """Shared, pooled gspread client; fails fast on a slow Sheets API so the catalog fallback can take over"""
+    return get_sheets_client(credentials_path, SHEETS_SCOPES, timeout=PLACEMENT_SHEETS_TIMEOUT)
+
+
+def get_sheet_revision(client, spreadsheet_id):
+    """
+    Return the Drive revision marker (version + modifiedTime) of a spreadsheet,
+    or None if the Drive metadata is not accessible.
+    """
+    try:
+        response = client.http_client.request(
+            "get",
+            f"{DRIVE_FILES_API_V3_URL}/{spreadsheet_id}",
+            params={"fields": "modifiedTime,version", "supportsAllDrives": True},
+        )
+        metadata = response.json()
+        return f"{metadata.get('version')}@{metadata.get('modifiedTime')}"
+    except Exception as e:
+        print(f"⚠️ Could not read sheet revision, relying on TTL: {e}")
+        return None
+
+
+def _snapshot_path(spreadsheet_id, sheet_name):
+    digest = hashlib.sha1(f"{spreadsheet_id}:{sheet_name}".encode("utf-8")).hexdigest()
+    return os.path.join(PLACEMENT_SNAPSHOT_DIR, f"{digest}.json")
+
+
+def _read_snapshot(spreadsheet_id, sheet_name):
+    key = (spreadsheet_id, sheet_name)
+    with _snapshot_lock:
+        snapshot = _snapshots.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    path = _snapshot_path(spreadsheet_id, sheet_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except Exception as e:
+        print(f"⚠️ Could not read placement snapshot {path}: {e}")
+        return None
+    with _snapshot_lock:
+        _snapshots[key] = snapshot
+    return snapshot
+
+
+def _snapshot_marker(snapshot):
+    return snapshot.get("revision") or f"fetched@{snapshot['fetched_at']:.0f}"
+
+
+def _mark_served(spreadsheet_id, sheet_names, marker):
+    """Remember which revision of each worksheet was last handed out (see workbook_revision)"""
+    with _snapshot_lock:
+        for sheet_name in sheet_names:
+            _served_revisions[(spreadsheet_id, sheet_name)] = marker
+
+
+def _write_snapshot(spreadsheet_id, sheet_name, snapshot):
+    with _snapshot_lock:
+        _snapshots[(spreadsheet_id, sheet_name)] = snapshot
+        _served_revisions[(spreadsheet_id, sheet_name)] = _snapshot_marker(snapshot)
+    try:
+        os.makedirs(PLACEMENT_SNAPSHOT_DIR, exist_ok=True)
+        path = _snapshot_path(spreadsheet_id, sheet_name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ Could not write placement snapshot: {e}")
+
+
+def invalidate_placement_snapshots():
+    """Drop in-memory snapshots so the next fetch re-validates against disk and Drive"""
+    with _snapshot_lock:
+        _snapshots.clear()
+        _tables.clear()
+        _served_revisions.clear()
+
+
+def _download_worksheet_values(client, spreadsheet_id, sheet_name):
     print(f"\n🔍 Opening spreadsheet...")
-    spreadsheet = client.open_by_url(sheet_url)
-    
-    print(f"📑 Available worksheets:")
-    all_worksheets = spreadsheet.worksheets()
-    sheet_titles = []
-    for ws in all_worksheets:
-        sheet_titles.append(ws.title)
-        print(f"  - '{ws.title}' (id: {ws.id})")
-    
+    spreadsheet = client.open_by_key(spreadsheet_id)
+
     print(f"\n🔍 Looking for worksheet: '{sheet_name}'")
-    print(f"🔍 Exact string comparison:")
-    for title in sheet_titles:
-        print(f"  - '{title}' == '{sheet_name}' ? {title == sheet_name}")
-        if title != sheet_name:
-            print(f"    Length: {len(title)} vs {len(sheet_name)}")
-            print(f"    ASCII values: {[ord(c) for c in title]} vs {[ord(c) for c in sheet_name]}")
-    
     try:
         worksheet = spreadsheet.worksheet(sheet_name)
         print(f"✅ Found worksheet: '{sheet_name}'")
     except gspread.exceptions.WorksheetNotFound:
+        sheet_titles = [ws.title for ws in spreadsheet.worksheets()]
         print(f"❌ Worksheet not found: '{sheet_name}'")
+        print(f"📑 Available worksheets: {sheet_titles}")
         print(f"💡 Please check if the sheet name is correct and case-sensitive")
         print(f"💡 Available similar sheets:")
         import difflib
@@ -37,13 +134,192 @@ def fetch_placements_ids(credentials_path, sheet_url, sheet_name, site_filter, p
         for match in matches:
             print(f"   - '{match}'")
         raise
-    
+
     # Get all values instead of using get_all_records to avoid duplicate header issues
-    all_values = worksheet.get_all_values()
-    if not all_values:
-        print("No data found in worksheet")
-        return {}
-    
+    return worksheet.get_all_values()
+
+
+def _batch_download_values(client, spreadsheet_id, sheet_names):
+    """Download several worksheets with one values_batch_get request"""
+    print(f"\n🔍 Downloading {len(sheet_names)} worksheet(s) in one batch: {sheet_names}")
+    spreadsheet = client.open_by_key(spreadsheet_id)
+    ranges = ["'{}'".format(name.replace("'", "''")) for name in sheet_names]
+    try:
+        response = spreadsheet.values_batch_get(ranges)
+    except gspread.exceptions.APIError as e:
+        # Usually a missing worksheet; download one by one for the detailed diagnostics
+        print(f"⚠️ Batch read failed ({e}), reading worksheets one by one")
+        return {name: _download_worksheet_values(client, spreadsheet_id, name) for name in sheet_names}
+
+    value_ranges = response.get("valueRanges", [])
+    # Pad rows like get_all_values() does so headers and rows line up
+    return {name: fill_gaps(value_range.get("values", [])) for name, value_range in zip(sheet_names, value_ranges)}
+
+
+def download_placement_values(credentials_path, sheet_url, sheet_names):
+    """
+    Download worksheets straight from Google Sheets, bypassing (and refreshing) the snapshots.
+
+    Returns:
+        tuple: (spreadsheet ID, Drive revision marker or None, {sheet name: all cell values})
+    """
+    spreadsheet_id = extract_id_from_url(sheet_url)
+    client = _get_client(credentials_path)
+    revision = get_sheet_revision(client, spreadsheet_id)
+    values_by_sheet = _batch_download_values(client, spreadsheet_id, list(dict.fromkeys(sheet_names)))
+    now = time.time()
+    for sheet_name, values in values_by_sheet.items():
+        _write_snapshot(spreadsheet_id, sheet_name, {
+            "values": values,
+            "revision": revision,
+            "fetched_at": now,
+            "checked_at": now,
+        })
+    return spreadsheet_id, revision, values_by_sheet
+
+
+def _catalog_fallback(spreadsheet_id, sheet_names, error):
+    """Serve worksheets from the offline catalog after a Sheets API failure, or re-raise the failure"""
+    try:
+        values_by_sheet = load_catalog_values(spreadsheet_id, sheet_names)
+    except PlacementCatalogError as catalog_error:
+        print(f"❌ Sheets API failed ({error}) and no usable placement catalog: {catalog_error}")
+        raise error
+    print(f"⚠️ Sheets API failed ({error}), using offline placement catalog for {list(values_by_sheet)}")
+    _mark_served(spreadsheet_id, values_by_sheet, f"catalog-v{get_placement_catalog().version}")
+    return values_by_sheet
+
+
+def _load_values(credentials_path, sheet_url, sheet_names, source=None):
+    """
+    Return {sheet name: all cell values} for worksheets of one spreadsheet, served from the
+    snapshot cache where possible and downloading every stale worksheet in a single batch.
+
+    Snapshots are kept in memory and under PLACEMENT_SNAPSHOT_DIR. A snapshot is reused
+    while it is younger than PLACEMENT_SNAPSHOT_TTL and the spreadsheet's Drive revision
+    is unchanged; the revision is re-checked at most every PLACEMENT_REVISION_CHECK_INTERVAL
+    seconds, so repeated calls within one campaign make no network requests at all.
+
+    With source="catalog" (default: PLACEMENT_SOURCE) worksheets come only from the offline
+    placement catalog; otherwise the catalog is used when the Sheets API request fails.
+    """
+    spreadsheet_id = extract_id_from_url(sheet_url)
+    if (source or PLACEMENT_SOURCE) == "catalog":
+        print(f"📦 Reading {list(dict.fromkeys(sheet_names))} from the offline placement catalog")
+        values_by_sheet = load_catalog_values(spreadsheet_id, sheet_names)
+        _mark_served(spreadsheet_id, values_by_sheet, f"catalog-v{get_placement_catalog().version}")
+        return values_by_sheet
+
+    now = time.time()
+    values_by_sheet = {}
+    stale = []
+    revision = _UNSET
+
+    for sheet_name in dict.fromkeys(sheet_names):
+        snapshot = _read_snapshot(spreadsheet_id, sheet_name)
+        if snapshot and now - snapshot["fetched_at"] < PLACEMENT_SNAPSHOT_TTL:
+            if now - snapshot["checked_at"] < PLACEMENT_REVISION_CHECK_INTERVAL:
+                print(f"⚡ Using cached snapshot of '{sheet_name}'")
+                _mark_served(spreadsheet_id, [sheet_name], _snapshot_marker(snapshot))
+                values_by_sheet[sheet_name] = snapshot["values"]
+                continue
+
+            # One revision lookup covers every worksheet of the spreadsheet (None if Drive is unreachable)
+            if revision is _UNSET:
+                revision = get_sheet_revision(_get_client(credentials_path), spreadsheet_id)
+            if revision is None or revision == snapshot["revision"]:
+                print(f"⚡ Sheet unchanged, using cached snapshot of '{sheet_name}'")
+                _write_snapshot(spreadsheet_id, sheet_name, dict(snapshot, checked_at=now))
+                values_by_sheet[sheet_name] = snapshot["values"]
+                continue
+            print(f"🔄 Sheet changed ({snapshot['revision']} → {revision}), re-downloading '{sheet_name}'")
+        stale.append(sheet_name)
+
+    if stale:
+        try:
+            client = _get_client(credentials_path)
+            if revision is _UNSET:
+                revision = get_sheet_revision(client, spreadsheet_id)
+            downloaded = _batch_download_values(client, spreadsheet_id, stale)
+        except Exception as e:
+            values_by_sheet.update(_catalog_fallback(spreadsheet_id, stale, e))
+            return values_by_sheet
+        for sheet_name, values in downloaded.items():
+            _write_snapshot(spreadsheet_id, sheet_name, {
+                "values": values,
+                "revision": revision,
+                "fetched_at": now,
+                "checked_at": now,
+            })
+            values_by_sheet[sheet_name] = values
+
+    return values_by_sheet
+
+
+def workbook_revision(sheet_url, sheet_names):
+    """
+    Identify the worksheet contents most recently served for a spreadsheet, without any request.
+
+    Combines the Drive revision (or download time) of each snapshot, or the catalog version
+    for worksheets read from the offline catalog; worksheets not loaded yet show as "unloaded".
+    """
+    spreadsheet_id = extract_id_from_url(sheet_url)
+    with _snapshot_lock:
+        return "|".join(
+            f"{sheet_name}={_served_revisions.get((spreadsheet_id, sheet_name), 'unloaded')}"
+            for sheet_name in dict.fromkeys(sheet_names)
+        )
+
+
+def load_worksheet_values(credentials_path, sheet_url, sheet_name, source=None):
+    """Return all cell values of one worksheet, served from the snapshot cache"""
+    return _load_values(credentials_path, sheet_url, [sheet_name], source)[sheet_name]
+
+
+def _parsed_table(spreadsheet_id, sheet_name, values):
+    """Parse a worksheet snapshot once and reuse the table (and its index) while the snapshot is current"""
+    key = (spreadsheet_id, sheet_name)
+    with _snapshot_lock:
+        cached = _tables.get(key)
+    if cached is not None and cached[0] is values:
+        return cached[1]
+
+    if values:
+        headers, rows = parse_placement_rows(values)
+    else:
+        print(f"No data found in worksheet '{sheet_name}'")
+        headers, rows = [], []
+    table = {"headers": headers, "rows": rows}
+    with _snapshot_lock:
+        _tables[key] = (values, table)
+    return table
+
+
+def load_placement_table(credentials_path, sheet_url, sheet_name, source=None):
+    """Return the parsed table of one worksheet"""
+    values = load_worksheet_values(credentials_path, sheet_url, sheet_name, source)
+    return _parsed_table(extract_id_from_url(sheet_url), sheet_name, values)
+
+
+def load_placement_workbook(sheet_url, sheet_names, credentials_path=CREDENTIALS_PATH, source=None):
+    """
+    Load several placement worksheets with one batched read and parse them.
+
+    Returns:
+        dict: sheet name -> {"headers": original headers, "rows": row dicts keyed by cleaned headers}
+              Each table can be passed to fetch_placements_ids(table=...).
+    """
+    spreadsheet_id = extract_id_from_url(sheet_url)
+    return {
+        sheet_name: _parsed_table(spreadsheet_id, sheet_name, values)
+        for sheet_name, values in _load_values(credentials_path, sheet_url, sheet_names, source).items()
+    }
+
+
+def parse_placement_rows(all_values):
+    """
+    Turn raw worksheet values into (original headers, row dicts keyed by cleaned headers)
+    """
     # Get headers from first row and clean them up
     headers = all_values[0]
     print(f"\n📊 Sheet Structure:")
@@ -70,34 +346,17 @@ def fetch_placements_ids(credentials_path, sheet_url, sheet_name, site_filter, p
     # Convert data rows to dictionaries manually
     data = []
     for row_values in all_values[1:]:  # Skip header row
-        # Pad row with empty strings if it's shorter than headers
-        while len(row_values) < len(clean_headers):
-            row_values.append('')
-        
         row_dict = {}
         for i, header in enumerate(clean_headers):
-            if i < len(row_values):
-                row_dict[header] = row_values[i]
-            else:
-                row_dict[header] = ''
+            # Pad short rows with empty strings
+            row_dict[header] = row_values[i] if i < len(row_values) else ''
         data.append(row_dict)
+    
+    return headers, data
 
-    # Clone site_filter so we don't modify the original list
-    site_filter = list(site_filter)
-    print(f"\n🎯 Targeting Criteria:")
-    print(f"Sites: {site_filter}")
-    print(f"Platforms: {platforms_filter}")
-
-    # Convert site filter to uppercase for case-insensitive matching
-    site_filter = [s.upper() for s in site_filter]
-    platforms_filter = [p.upper() for p in platforms_filter]
 
-    # Automatically add ETIMES if TOI is in the list
-    if "TOI" in site_filter and "ETIMES" not in site_filter:
-        site_filter.append("ETIMES")
-        print(f"Added ETIMES to site filter: {site_filter}")
-    
-    # Find the exact column names from the sheet using original headers
+def map_placement_columns(headers):
+    """Find the exact column names from the sheet using original headers"""
     column_mapping = {}
     for col in headers:
         col_upper = col.upper()
@@ -113,6 +372,202 @@ def fetch_placements_ids(credentials_path, sheet_url, sheet_name, site_filter, p
             column_mapping['ad_slot_id'] = col
         elif 'PLACEMENT' in col_upper:
             column_mapping['placement'] = col
+    return column_mapping
+
+
+class PlacementIndex:
+    """
+    Inverted index over one worksheet snapshot.
+
+    Site, section and adtype cells are grouped by distinct (uppercased) value with the
+    rows holding each value, and platform cells are split into comma-separated tokens.
+    A query checks the substring filters against the distinct values only and
+    intersects the row postings, which gives the same rows, in sheet order, as
+    scanning every row with the original substring/platform checks.
+    """
+
+    TEXT_COLUMNS = ('site', 'section', 'adtype')
+
+    def __init__(self, headers, rows):
+        self.column_mapping = map_placement_columns(headers)
+        self.row_count = len(rows)
+        self.values = {column: {} for column in self.TEXT_COLUMNS}
+        self.platform_tokens = {}
+        self.placement_ids = []
+        self.ad_slot_ids = []
+        self._term_cache = {}
+        self._lock = threading.Lock()
+
+        site_col = self.column_mapping.get('site')
+        section_col = self.column_mapping.get('section')
+        adtype_col = self.column_mapping.get('adtype')
+        platform_col = self.column_mapping.get('platform')
+        placement_col = self.column_mapping.get('placement')
+        ad_slot_col = self.column_mapping.get('ad_slot_id', '')
+
+        for row_number, row in enumerate(rows):
+            for column, col_name in (('site', site_col), ('section', section_col), ('adtype', adtype_col)):
+                value = str(row.get(col_name, '')).upper()
+                self.values[column].setdefault(value, []).append(row_number)
+            for token in str(row.get(platform_col, '')).upper().split(','):
+                self.platform_tokens.setdefault(token.strip(), set()).add(row_number)
+            self.placement_ids.append(str(row.get(placement_col, '')).strip())
+            self.ad_slot_ids.append(str(row.get(ad_slot_col, '')).strip())
+
+    def missing_columns(self, line_type="standard"):
+        required = ['site', 'platform', 'section', 'adtype'] + ([] if line_type == "psbk" else ['placement'])
+        return [column for column in required if column not in self.column_mapping]
+
+    def rows_containing(self, column, terms):
+        """Rows whose cell in column contains any of the terms as a substring"""
+        key = (column, tuple(terms))
+        with self._lock:
+            cached = self._term_cache.get(key)
+        if cached is not None:
+            return cached
+        rows = set()
+        for value, value_rows in self.values[column].items():
+            if any(term in value for term in terms):
+                rows.update(value_rows)
+        with self._lock:
+            self._term_cache[key] = rows
+        return rows
+
+    def rows_with_platform(self, platforms):
+        """Rows listing any of the platforms (exact, case-insensitive token match)"""
+        rows = set()
+        for platform in platforms:
+            rows |= self.platform_tokens.get(platform.strip().upper(), set())
+        return rows
+
+    def query(self, site_filter, section_values, adtype_values, platforms, line_type="standard"):
+        """Return the placement IDs (ad slot IDs for PSBK lines) of matching rows in sheet order"""
+        if self.missing_columns(line_type):
+            return []
+        matched = self.rows_containing('site', site_filter)
+        if matched:
+            matched = matched & self.rows_with_platform(platforms)
+        if matched:
+            matched = matched & self.rows_containing('section', section_values)
+        if matched:
+            matched = matched & self.rows_containing('adtype', adtype_values)
+        ids = self.ad_slot_ids if line_type == "psbk" else self.placement_ids
+        return [ids[row_number] for row_number in sorted(matched) if ids[row_number]]
+
+
+class PlacementFrame:
+    """
+    Columnar (pandas) view of one worksheet snapshot for the vectorized filter engine.
+
+    Site, section and adtype filters run as `str.contains` masks over pre-joined regex
+    alternations of the escaped terms (substring semantics); platforms are matched as
+    whole comma-separated tokens, like the row-by-row checks. Text columns are stored as
+    categoricals so each regex runs once per distinct value and is broadcast to the rows
+    through the category codes.
+    """
+
+    def __init__(self, headers, rows):
+        self.column_mapping = map_placement_columns(headers)
+        columns = {
+            'site': self.column_mapping.get('site'),
+            'platform': self.column_mapping.get('platform'),
+            'section': self.column_mapping.get('section'),
+            'adtype': self.column_mapping.get('adtype'),
+        }
+        placement_col = self.column_mapping.get('placement')
+        ad_slot_col = self.column_mapping.get('ad_slot_id', '')
+
+        frame = {name: [str(row.get(col, '')) for row in rows] for name, col in columns.items()}
+        frame['placement_id'] = [str(row.get(placement_col, '')) for row in rows]
+        frame['ad_slot_id'] = [str(row.get(ad_slot_col, '')) for row in rows]
+        self.frame = pd.DataFrame(frame, dtype=object)
+        for name in columns:
+            self.frame[name] = self.frame[name].str.upper().astype('category')
+        self.frame['placement_id'] = self.frame['placement_id'].str.strip()
+        self.frame['ad_slot_id'] = self.frame['ad_slot_id'].str.strip()
+
+    def missing_columns(self, line_type="standard"):
+        required = ['site', 'platform', 'section', 'adtype'] + ([] if line_type == "psbk" else ['placement'])
+        return [column for column in required if column not in self.column_mapping]
+
+    def _category_mask(self, column, pattern):
+        values = self.frame[column].cat
+        category_mask = np.asarray(values.categories.str.contains(pattern, regex=True), dtype=bool)
+        return category_mask[values.codes.to_numpy()]
+
+    def _contains_any(self, column, terms):
+        if not terms:
+            return np.zeros(len(self.frame), dtype=bool)
+        pattern = "|".join(re.escape(term) for term in terms)
+        return self._category_mask(column, pattern)
+
+    def _has_platform(self, platforms):
+        if not platforms:
+            return np.zeros(len(self.frame), dtype=bool)
+        tokens = "|".join(re.escape(platform.strip().upper()) for platform in platforms)
+        return self._category_mask('platform', rf"(?:^|,)\s*(?:{tokens})\s*(?:,|$)")
+
+    def query(self, site_filter, section_values, adtype_values, platforms, line_type="standard"):
+        """Same contract as PlacementIndex.query"""
+        if self.missing_columns(line_type) or self.frame.empty:
+            return []
+        id_column = 'ad_slot_id' if line_type == "psbk" else 'placement_id'
+        mask = (
+            (self.frame[id_column] != '').to_numpy()
+            & self._contains_any('site', site_filter)
+            & self._has_platform(platforms)
+            & self._contains_any('section', section_values)
+            & self._contains_any('adtype', adtype_values)
+        )
+        return self.frame.loc[mask, id_column].tolist()
+
+
+def get_placement_frame(table):
+    """Return the PlacementFrame of a parsed table, building it on first use"""
+    frame = table.get("frame")
+    if frame is None:
+        frame = PlacementFrame(table["headers"], table["rows"])
+        table["frame"] = frame
+    return frame
+
+
+def get_placement_index(table):
+    """Return the PlacementIndex of a parsed table, building it on first use"""
+    index = table.get("index")
+    if index is None:
+        index = PlacementIndex(table["headers"], table["rows"])
+        table["index"] = index
+    return index
+
+
+def fetch_placements_ids(credentials_path, sheet_url, sheet_name, site_filter, platforms_filter, adtype_filters, richmedia_platform_map=None, line_type="standard", table=None, engine=None, source=None):
+    if table is None:
+        # source="catalog" reads only from the offline placement catalog (default: PLACEMENT_SOURCE)
+        table = load_placement_table(credentials_path, sheet_url, sheet_name, source)
+    headers, data = table["headers"], table["rows"]
+    if not data:
+        print("No data found in worksheet")
+        return {}
+    # "index" (inverted index) or "vectorized" (pandas masks); both return identical results
+    engine = engine or PLACEMENT_FILTER_ENGINE
+    index = get_placement_frame(table) if engine == "vectorized" else get_placement_index(table)
+
+    # Clone site_filter so we don't modify the original list
+    site_filter = list(site_filter)
+    print(f"\n🎯 Targeting Criteria:")
+    print(f"Sites: {site_filter}")
+    print(f"Platforms: {platforms_filter}")
+
+    # Convert site filter to uppercase for case-insensitive matching
+    site_filter = [s.upper() for s in site_filter]
+    platforms_filter = [p.upper() for p in platforms_filter]
+
+    # Automatically add ETIMES if TOI is in the list
+    if "TOI" in site_filter and "ETIMES" not in site_filter:
+        site_filter.append("ETIMES")
+        print(f"Added ETIMES to site filter: {site_filter}")
+    
+    column_mapping = index.column_mapping
             
     print("\n📋 Using column mapping:")
     print(column_mapping)
@@ -149,60 +604,31 @@ def fetch_placements_ids(credentials_path, sheet_url, sheet_name, site_filter, p
         print(f"Looking for ad types: {adtype_values}")
         print(f"Looking for sections: {section_values}")
         
-        placement_ids = []
+        # Platform-specific rules (exact token match on the row's comma-separated platforms)
+        if adtype == "1260x570":
+            platform_terms = ["WEB"]
+        elif adtype == "320x480":
+            platform_terms = ["AMP", "MWEB"]
+        elif richmedia_platform_map and adtype in richmedia_platform_map:
+            # Use richmedia-specific platform filtering for this size
+            platform_terms = richmedia_platform_map[adtype]
+            print(f"🎯 Richmedia platform check for {adtype}: required {platform_terms}")
+        else:
+            # For standard lines, apply user platform filtering normally
+            # This ensures user's platform choices (like Mweb, AMP only) are respected
+            platform_terms = platforms_filter
         
-        for row in data:
-            try:
-                # Get values using mapped column names
-                row_site = str(row.get(column_mapping['site'], '')).upper()
-                row_platform = str(row.get(column_mapping['platform'], '')).upper()
-                row_section = str(row.get(column_mapping['section'], '')).upper()
-                row_adtype = str(row.get(column_mapping['adtype'], '')).upper()
-                # For PSBK lines, use Ad slot ID instead of Placement ID
-                if line_type == "psbk":
-                    row_ad_slot_id = str(row.get(column_mapping.get('ad_slot_id', ''), '')).strip()
-                    row_placement = row_ad_slot_id
-                    print(f"🔧 PSBK line: Using Ad slot ID {row_ad_slot_id} instead of Placement ID")
-                else:
-                    row_placement = str(row.get(column_mapping['placement'], '')).strip()
-
-                # Skip row if no placement ID (or Ad slot ID for PSBK)
-                if not row_placement:
-                    continue
-
-                # Case-insensitive site matching
-                site_match = any(site in row_site for site in site_filter)
-                
-                # Platform-specific checks with case-insensitive matching
-                row_platforms = [p.strip() for p in row_platform.split(',')]
-                if adtype == "1260x570":
-                    platform_match = "WEB" in row_platforms
-                elif adtype == "320x480":
-                    platform_match = any(p in ["AMP", "MWEB"] for p in row_platforms)
-                elif richmedia_platform_map and adtype in richmedia_platform_map:
-                    # Use richmedia-specific platform filtering for this size
-                    richmedia_platforms = richmedia_platform_map[adtype]
-                    platform_match = any(p.strip().upper() in [plat.upper() for plat in row_platforms] for p in richmedia_platforms)
-                    print(f"🎯 Richmedia platform check for {adtype}: required {richmedia_platforms}, row has {row_platforms}, match: {platform_match}")
-                else:
-                    # For standard lines, apply user platform filtering normally
-                    # This ensures user's platform choices (like Mweb, AMP only) are respected
-                    platform_match = any(p.strip().upper() in [plat.upper() for plat in row_platforms] for p in platforms_filter)
-                
-                # Case-insensitive section and ad type matching
-                section_match = any(section in row_section for section in section_values)
-                adtype_match = any(ad in row_adtype for ad in adtype_values)
-
-                if site_match and platform_match and section_match and adtype_match:
-                    if row_placement:
-                        placement_ids.append(row_placement)
-                        if line_type == "psbk":
-                            print(f"✅ Found Ad slot ID {row_placement} for {adtype}")
-                        else:
-                            print(f"✅ Found placement ID {row_placement} for {adtype}")
-            except Exception as e:
-                print(f"Error processing row: {e}")
-                continue
+        missing_columns = index.missing_columns(line_type)
+        if missing_columns:
+            print(f"Error processing rows: missing column(s) {missing_columns}")
+        
+        # Case-insensitive site, section and ad type matching via the selected engine
+        placement_ids = index.query(site_filter, section_values, adtype_values, platform_terms, line_type)
+        for placement_id in placement_ids:
+            if line_type == "psbk":
+                print(f"✅ Found Ad slot ID {placement_id} for {adtype}")
+            else:
+                print(f"✅ Found placement ID {placement_id} for {adtype}")
 
         # Assign base structure
         placement_data[adtype] = {
@@ -228,6 +654,79 @@ def fetch_placements_ids(credentials_path, sheet_url, sheet_name, site_filter, p
     return placement_data
 
 
+def _merge_unique(existing, incoming):
+    """Ordered union: existing items first, then new items in their incoming order"""
+    return list(dict.fromkeys(list(existing or []) + list(incoming or [])))
+
+
+def merge_placement_data(placement_data, incoming, label=""):
+    """
+    Merge one site group's fetch_placements_ids result into placement_data (in place).
+
+    Placement IDs, original_sizes and additional_sizes are combined as ordered unions,
+    so the merged IDs keep sheet order within a group and group order across groups.
+    """
+    for size, data in incoming.items():
+        if not isinstance(data, dict):
+            print(f"⚠️ {label} data for size {size} is not a dict: {type(data)}")
+            continue
+        if size not in placement_data:
+            placement_data[size] = dict(data, placement_ids=list(data.get('placement_ids', [])))
+            continue
+
+        merged = placement_data[size]
+        existing_ids = set(merged.get('placement_ids', []))
+        new_ids = [pid for pid in data.get('placement_ids', []) if pid not in existing_ids]
+        merged['placement_ids'] = _merge_unique(merged.get('placement_ids'), data.get('placement_ids'))
+        for key in ('original_sizes', 'additional_sizes'):
+            if merged.get(key) or data.get(key):
+                merged[key] = _merge_unique(merged.get(key), data.get(key))
+        print(f"🔄 Merged {label} placements for {size}: {len(new_ids)} new IDs")
+    return placement_data
+
+
+def fetch_site_group_placements(sheet_url, site_groups, platforms_filter, adtype_filters, richmedia_platform_map=None,
+                                line_type="standard", workbook=None, credentials_path=CREDENTIALS_PATH,
+                                max_workers=PLACEMENT_FETCH_WORKERS):
+    """
+    Fetch placements for several site groups concurrently and merge them.
+
+    Args:
+        site_groups: List of (label, sheet name, sites) tuples, e.g. ("TOI", "TOI + ETIMES", ["TOI", "ETIMES"])
+        workbook: Optional {sheet name: parsed table} from load_placement_workbook; sheets missing
+                  from it are read by their own fetch, which is where the pool saves the most time
+
+    Returns:
+        dict: Merged placement data, identical to fetching and merging the groups one by one in order
+    """
+    workbook = workbook or {}
+
+    def fetch(group):
+        label, sheet_name, sites = group
+        print(f"\nFetching {label} placements from sheet: {sheet_name}")
+        return fetch_placements_ids(
+            credentials_path,
+            sheet_url,
+            sheet_name,
+            sites,
+            platforms_filter,
+            adtype_filters,
+            richmedia_platform_map,
+            line_type,
+            table=workbook.get(sheet_name)
+        )
+
+    workers = max(1, min(max_workers, len(site_groups)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="placements") as executor:
+        # map() yields in submission order, so the merge does not depend on which fetch finishes first
+        results = list(executor.map(fetch, site_groups))
+
+    placement_data = {}
+    for (label, _, _), result in zip(site_groups, results):
+        merge_placement_data(placement_data, result, label)
+    return placement_data
+
+
 # Example usage
 if __name__ == "__main__":
     credentials_path = "credentials.json"
@@ -0,0 +1,279 @@
+"""
+Caching layer for read-only PublisherQueryLanguageService queries.
+
+`cached_pql_service(client)` returns a drop-in replacement for the PQL service whose
+`select()` results are kept in a process-wide, size-bounded LRU cache. Entries expire
+per table (Geo_Target rarely changes, Line_Item changes on every campaign), can be
+persisted to PQL_CACHE_PATH between restarts, and write paths drop the tables they
+touch with `invalidate_tables()`. Cache misses are throttled by the shared GAM rate limiter.
+"""
+
+import atexit
+import json
+import os
+import pickle
+import re
+import threading
+import time
+
+from cachetools import TLRUCache
+from zeep.helpers import serialize_object
+
+from config import PQL_CACHE_PATH, PQL_CACHE_PERSIST
+from rate_limiter import gam_rate_limiter
+
+# Seconds a cached result stays valid, per PQL table
+PQL_TABLE_TTLS = {
+    "Geo_Target": 7 * 24 * 3600,
+    "Order": 300,
+    "Line_Item": 30,
+}
+PQL_DEFAULT_TTL = 60
+PQL_CACHE_MAX_ENTRIES = 2000
+
+_QUOTED_LITERAL_RE = re.compile(r"('(?:[^'\\]|\\.)*')")
+_FROM_TABLE_RE = re.compile(r"\bFROM\s+(\w+)", re.IGNORECASE)
+
+
+class PqlRecord:
+    """Plain, picklable PQL result node with both attribute (row.values) and item (row['values']) access"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __getstate__(self):
+        return self._data
+
+    def __setstate__(self, state):
+        self._data = state
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __repr__(self):
+        return f"PqlRecord({self._data!r})"
+
+
+def _to_record(obj):
+    """Convert a serialized zeep response into nested PqlRecord/list objects"""
+    if isinstance(obj, dict):
+        return PqlRecord({key: _to_record(value) for key, value in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return [_to_record(value) for value in obj]
+    return obj
+
+
+def normalize_query(query):
+    """Collapse whitespace outside quoted literals so formatting differences share a cache entry"""
+    parts = _QUOTED_LITERAL_RE.split(query)
+    for i in range(0, len(parts), 2):
+        parts[i] = " ".join(parts[i].split())
+    return "".join(parts).strip()
+
+
+def query_table(query):
+    """Return the table a PQL query reads from (e.g. 'Geo_Target')"""
+    match = _FROM_TABLE_RE.search(query)
+    return match.group(1) if match else None
+
+
+def _cache_key(statement):
+    values = serialize_object(statement.get('values') or [])
+    return json.dumps([normalize_query(statement['query']), values], sort_keys=True, default=str)
+
+
+class _CacheEntry:
+    __slots__ = ("table", "expires_at", "result")
+
+    def __init__(self, table, expires_at, result):
+        self.table = table
+        self.expires_at = expires_at
+        self.result = result
+
+
+class _CountingCache(TLRUCache):
+    """TLRUCache that counts LRU evictions (expired entries are not evictions)"""
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize, ttu=lambda key, entry, now: entry.expires_at, timer=time.time)
+        self.evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+
+class PqlResultCache:
+    """Thread-safe PQL result store with per-table TTLs, LRU eviction and optional disk persistence"""
+
+    def __init__(self, max_entries=PQL_CACHE_MAX_ENTRIES, table_ttls=None, default_ttl=PQL_DEFAULT_TTL,
+                 persist_path=None):
+        self.table_ttls = dict(PQL_TABLE_TTLS if table_ttls is None else table_ttls)
+        self.default_ttl = default_ttl
+        self.persist_path = persist_path
+        self._entries = _CountingCache(max_entries)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        if persist_path:
+            self.load()
+
+    def ttl_for(self, table):
+        return self.table_ttls.get(table, self.default_ttl)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.result
+
+    def put(self, key, table, result):
+        ttl = self.ttl_for(table)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = _CacheEntry(table, time.time() + ttl, result)
+
+    def invalidate_tables(self, *tables):
+        """Drop every cached result read from the given tables"""
+        tables = set(tables)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry.table in tables]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            print(f"🧹 PQL cache: invalidated {len(stale)} result(s) for {', '.join(sorted(tables))}")
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            self._entries.expire()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self._entries.evictions,
+                'entries': len(self._entries),
+                'hit_rate': (self.hits / lookups * 100) if lookups else 0.0,
+            }
+
+    def load(self):
+        """Load unexpired entries persisted by a previous process"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return 0
+        try:
+            with open(self.persist_path, 'rb') as f:
+                saved = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not load PQL cache {self.persist_path}: {e}")
+            return 0
+
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            for key, table, expires_at, result in saved:
+                if expires_at > now:
+                    self._entries[key] = _CacheEntry(table, expires_at, result)
+                    loaded += 1
+        return loaded
+
+    def save(self):
+        """Persist unexpired entries so the next process starts warm"""
+        if not self.persist_path:
+            return
+        with self._lock:
+            self._entries.expire()
+            saved = [(key, entry.table, entry.expires_at, entry.result) for key, entry in self._entries.items()]
+        try:
+            tmp_path = f"{self.persist_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            print(f"⚠️ Could not save PQL cache {self.persist_path}: {e}")
+
+
+class CachedPqlService:
+    """
+    Wraps a PublisherQueryLanguageService so `select()` is served from a PqlResultCache.
+    Any other attribute is passed through to the wrapped service.
+    """
+
+    def __init__(self, pql_service, cache):
+        self._service = pql_service
+        self._cache = cache
+
+    def select(self, statement):
+        key = _cache_key(statement)
+        result = self._cache.get(key)
+        if result is not None:
+            return result
+
+        gam_rate_limiter.acquire()
+        result = _to_record(serialize_object(self._service.select(statement)))
+        self._cache.put(key, query_table(statement['query']), result)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._service, name)
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_pql_cache():
+    """Return the process-wide PQL result cache, creating it on first use"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = PqlResultCache(persist_path=PQL_CACHE_PATH if PQL_CACHE_PERSIST else None)
+                if _shared_cache.persist_path:
+                    atexit.register(_shared_cache.save)
+    return _shared_cache
+
+
+def cached_pql_service(client, version="v202508"):
+    """Return a PQL service whose read results go through the shared cache"""
+    return CachedPqlService(client.GetService("PublisherQueryLanguageService", version=version), get_pql_cache())
+
+
+def invalidate_tables(*tables):
+    """Drop cached results for tables a write path has just modified"""
+    return get_pql_cache().invalidate_tables(*tables)
+
+
+def pql_cache_stats():
+    return get_pql_cache().stats()
+
+
+if __name__ == "__main__":
+    # Example usage
+    stats = pql_cache_stats()
+    print(f"📊 PQL cache: {stats['entries']} entries, {stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['evictions']} evictions ({stats['hit_rate']:.1f}% hit rate)")
@@ -1,15 +1,17 @@
-import os
 import logging
 import time
 import copy
+import hashlib
+import json
 import re
+import threading
 import requests
 from googleads import ad_manager
+from asset_manifest import IMAGE_EXTENSIONS, SCRIPT_EXTENSIONS, get_asset_manifest
 from get_order_name import fetch_advertiser_id_from_order
-from config import CREATIVES_FOLDER
+from config import CREATIVES_FOLDER, CREATIVE_BATCH_SIZE, LICA_BATCH_SIZE, LICA_REQUEST_TIMEOUT
 
 # Add retry and timeout handling
-import socket
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 
@@ -47,46 +49,100 @@ def setup_retry_session():
     session.mount("https://", adapter)
     return session
 
-def create_lica_with_retry(lica_service, lica, max_retries=3, initial_delay=2):
-    """Create Line Item Creative Association with retry logic"""
+def _lica_service(client, timeout=LICA_REQUEST_TIMEOUT):
+    """LICA service whose SOAP requests time out after `timeout` seconds (its own transport, no global socket timeout)"""
+    lica_service = client.GetService('LineItemCreativeAssociationService', version='v202508')
+    transport = getattr(getattr(lica_service, 'zeep_client', None), 'transport', None)
+    if transport is not None:
+        transport.operation_timeout = timeout
+    return lica_service
+
+
+def _is_duplicate_error(error):
+    error_msg = str(error).upper()
+    return "DUPLICATE" in error_msg or "ALREADY_EXISTS" in error_msg
+
+
+def _create_lica_chunk(lica_service, licas, chunk, created, errors):
+    """
+    createLineItemCreativeAssociations for the LICAs at the given indexes.
+
+    Returns:
+        list: Indexes that failed with a timeout/connection error and are worth retrying
+    """
+    try:
+        result = lica_service.createLineItemCreativeAssociations([licas[i] for i in chunk]) or []
+    except Exception as e:
+        if _is_connection_error(e):
+            for i in chunk:
+                errors[i] = e
+            return list(chunk)
+        if len(chunk) > 1:
+            # GAM rejects the whole request for one bad association; find it one by one
+            print(f"⚠️ LICA chunk of {len(chunk)} rejected ({e}), associating them one by one")
+            retry = []
+            for i in chunk:
+                retry.extend(_create_lica_chunk(lica_service, licas, [i], created, errors))
+            return retry
+        if _is_duplicate_error(e):
+            # Created by an earlier attempt whose response timed out
+            created[chunk[0]] = licas[chunk[0]]
+            errors.pop(chunk[0], None)
+            return []
+        errors[chunk[0]] = e
+        return []
+
+    for position, i in enumerate(chunk):
+        if position < len(result):
+            created[i] = result[position]
+            errors.pop(i, None)
+        else:
+            errors[i] = Exception("createLineItemCreativeAssociations returned no association for this LICA")
+    return []
+
+
+def create_licas(client, licas, chunk_size=LICA_BATCH_SIZE, max_retries=3, initial_delay=2, timeout=LICA_REQUEST_TIMEOUT):
+    """
+    Create Line Item Creative Associations in chunked calls, retrying only the failed ones.
+
+    Associations rejected by GAM are isolated and reported without blocking the rest of their
+    chunk; timeouts and connection errors are retried with exponential backoff. Requests time
+    out after `timeout` seconds on a LICA service of their own, so concurrent workers can call
+    this safely.
+
+    Args:
+        client: GAM client
+        licas: LICA dicts ('creativeId', 'lineItemId', 'targetingName', 'sizes')
+
+    Returns:
+        tuple: (created LICAs in input order, {index in licas: error} for the ones that failed)
+    """
+    if not licas:
+        return [], {}
+
+    lica_service = _lica_service(client, timeout)
+    created = [None] * len(licas)
+    errors = {}
+    pending = list(range(len(licas)))
     for attempt in range(max_retries):
-        try:
-            print(f"Attempting to create LICA (attempt {attempt + 1}/{max_retries})...")
-            
-            # Set a shorter timeout for the specific operation
-            original_socket_timeout = socket.getdefaulttimeout()
-            socket.setdefaulttimeout(60)  # 60 seconds instead of 3600
-            
-            result = lica_service.createLineItemCreativeAssociations([lica])
-            
-            # Restore original timeout
-            socket.setdefaulttimeout(original_socket_timeout)
-            
-            print(f"✅ Successfully created LICA on attempt {attempt + 1}")
-            return result
-            
-        except Exception as e:
-            error_msg = str(e)
-            print(f"❌ LICA creation attempt {attempt + 1} failed: {error_msg}")
-            
-            # Restore original timeout in case of error
-            if 'original_socket_timeout' in locals():
-                socket.setdefaulttimeout(original_socket_timeout)
-            
-            # Check if it's a timeout or connection error
-            if "timeout" in error_msg.lower() or "connection" in error_msg.lower():
-                if attempt < max_retries - 1:
-                    delay = initial_delay * (2 ** attempt)  # Exponential backoff
-                    print(f"⏳ Waiting {delay} seconds before retry...")
-                    time.sleep(delay)
-                    continue
-            
-            # If it's not a timeout/connection error or we've exhausted retries
-            if attempt == max_retries - 1:
-                print(f"⚠️ All {max_retries} attempts failed. Last error: {error_msg}")
-                raise e
-            
-    raise Exception(f"Failed to create LICA after {max_retries} attempts")
+        print(f"Attempting to create {len(pending)} LICA(s) (attempt {attempt + 1}/{max_retries})...")
+        retry = []
+        for start in range(0, len(pending), chunk_size):
+            retry.extend(_create_lica_chunk(lica_service, licas, pending[start:start + chunk_size], created, errors))
+        pending = retry
+        if not pending:
+            break
+        if attempt < max_retries - 1:
+            delay = initial_delay * (2 ** attempt)  # Exponential backoff
+            print(f"⏳ {len(pending)} LICA(s) timed out, waiting {delay} seconds before retrying them...")
+            time.sleep(delay)
+
+    created_licas = [lica for lica in created if lica is not None]
+    if errors:
+        print(f"⚠️ {len(errors)} of {len(licas)} LICA(s) failed")
+    else:
+        print(f"✅ Successfully created {len(created_licas)} LICA(s)")
+    return created_licas, errors
 
 def process_html_creative(html_path, landing_page_url, impression_tracker=None):
     with open(html_path, 'r', encoding='utf-8') as f:
@@ -109,9 +165,217 @@ def process_html_creative(html_path, landing_page_url, impression_tracker=None):
     with open(html_path, 'w', encoding='utf-8') as f:
         f.write(html_content)
 
+_timestamp_lock = threading.Lock()
+_last_timestamp = 0
+
+
+def _unique_timestamp():
+    """Millisecond timestamp for creative names, strictly increasing even when payloads are built in the same millisecond"""
+    global _last_timestamp
+    with _timestamp_lock:
+        _last_timestamp = max(int(time.time() * 1000), _last_timestamp + 1)
+        return _last_timestamp
+
+
+def creative_targeting_name(width, height, line_type=None):
+    """Creative targeting name the LICA must use; matches the targetings set up at line item creation"""
+    if width == 320 and height == 100:
+        return "Mweb_PPD"
+    if width == 300 and height == 250 and line_type == "richmedia":
+        return "Mrec_ex"
+    return f'{width}x{height}'
+
+
+def _pending_creative(payload, size_name, base_size, targeting_name, sizes, template_id, asset_files,
+                      success_message, failure_message, strict=False):
+    return {
+        'payload': payload,
+        'size_name': size_name,
+        'base_size': base_size,
+        'targeting_name': targeting_name,
+        'sizes': sizes,
+        'template_id': template_id,
+        'asset_files': asset_files,
+        'success_message': success_message,  # "{creative_id}" is filled in once created
+        'failure_message': failure_message,
+        'strict': strict,  # Script-only and In-Banner video creatives raise on failure
+        'creative_id': None,
+        'reused': False,
+        'error': None,
+    }
+
+
+def _is_connection_error(error):
+    error_msg = str(error).lower()
+    return "timeout" in error_msg or "timed out" in error_msg or "connection" in error_msg
+
+
+def _create_creatives_chunk(creative_service, chunk):
+    """createCreatives for one chunk; if GAM rejects the chunk, create its items one by one"""
+    try:
+        created = creative_service.createCreatives([entry['payload'] for entry in chunk])
+    except Exception as e:
+        # A timed-out request may still have created the chunk; resubmitting could duplicate creatives
+        if len(chunk) == 1 or _is_connection_error(e):
+            for entry in chunk:
+                entry['error'] = e
+            return
+        print(f"⚠️ createCreatives failed for a chunk of {len(chunk)} ({e}), creating them one by one")
+        for entry in chunk:
+            _create_creatives_chunk(creative_service, [entry])
+        return
+
+    created = created or []
+    for position, entry in enumerate(chunk):
+        if position < len(created):
+            entry['creative_id'] = created[position]['id']
+        else:
+            entry['error'] = Exception("createCreatives returned no creative for this payload")
+
+
+class CampaignCreativeLibrary:
+    """
+    Creatives created for one campaign, shared by its line variants.
+
+    three_lines builds one library and passes it to the standard, PSBK and NWP lines, so a
+    creative whose payload matches one created earlier in the campaign (same template,
+    size, variables and asset bytes; names and asset file names are ignored) is associated
+    with the next line instead of being uploaded again.
+    """
+
+    def __init__(self):
+        self._by_content = {}
+        self._sizes = set()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @staticmethod
+    def content_key(payload):
+        """SHA-256 of a TemplateCreative payload without its generated names; asset bytes are hashed"""
+        def normalize(value):
+            if isinstance(value, dict):
+                return {key: normalize(item) for key, item in value.items() if key not in ('name', 'fileName')}
+            if isinstance(value, (list, tuple)):
+                return [normalize(item) for item in value]
+            if isinstance(value, (bytes, bytearray)):
+                return f"sha256:{hashlib.sha256(value).hexdigest()}"
+            return value
+        encoded = json.dumps(normalize(payload), sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def lookup(self, payload):
+        """Creative ID of an identical creative created earlier in the campaign, or None"""
+        with self._lock:
+            creative_id = self._by_content.get(self.content_key(payload))
+            if creative_id is not None:
+                self.reused += 1
+            return creative_id
+
+    def add(self, payload, creative_id):
+        size = payload.get('size', {})
+        size_name = f"{size.get('width')}x{size.get('height')}"
+        with self._lock:
+            self._by_content[self.content_key(payload)] = creative_id
+            self._sizes.add(size_name)
+            self.created += 1
+
+    def stats(self):
+        with self._lock:
+            return {'created': self.created, 'reused': self.reused, 'sizes': sorted(self._sizes)}
+
+
+def submit_template_creatives(client, line_item_id, pending, chunk_size=CREATIVE_BATCH_SIZE, creative_library=None):
+    """
+    Creates pending creatives in chunked createCreatives calls and associates them with the line item.
+
+    GAM returns created creatives in request order, so each ID is written back to its pending
+    entry ('creative_id'); entries that failed get 'error' instead. A failing item only fails
+    itself: the rest of its chunk is retried one creative at a time. All LICAs of the created
+    creatives then go through one create_licas() stage.
+
+    With a creative_library, payloads identical to a creative created earlier in the campaign
+    are not uploaded again; the existing creative is associated with this line item instead.
+
+    Returns:
+        list: Created creative IDs in pending order
+
+    Raises:
+        Exception: The first failure of a strict (script-only / In-Banner video) creative
+    """
+    if not pending:
+        return []
+
+    to_create = pending
+    if creative_library is not None:
+        to_create = []
+        for entry in pending:
+            entry['creative_id'] = creative_library.lookup(entry['payload'])
+            entry['reused'] = entry['creative_id'] is not None
+            if not entry['reused']:
+                to_create.append(entry)
+        if len(to_create) < len(pending):
+            print(f"♻️ Reusing {len(pending) - len(to_create)} creative(s) already created for this campaign")
+
+    if to_create:
+        creative_service = client.GetService('CreativeService', version='v202508')
+        print(f"📦 Creating {len(to_create)} creative(s) in chunks of {chunk_size}")
+        for start in range(0, len(to_create), chunk_size):
+            _create_creatives_chunk(creative_service, to_create[start:start + chunk_size])
+        if creative_library is not None:
+            for entry in to_create:
+                if entry['creative_id'] is not None:
+                    creative_library.add(entry['payload'], entry['creative_id'])
+
+    created_entries = [entry for entry in pending if entry['creative_id'] is not None]
+    licas = [{
+        'creativeId': entry['creative_id'],
+        'lineItemId': line_item_id,
+        'targetingName': entry['targeting_name'],
+        'sizes': entry['sizes']
+    } for entry in created_entries]
+    _, lica_errors = create_licas(client, licas)
+    for position, e in lica_errors.items():
+        created_entries[position]['error'] = e
+
+    from logging_utils import logger
+    creative_ids = []
+    strict_error = None
+    for entry in pending:
+        creative_id = entry['creative_id']
+        if creative_id is not None:
+            creative_ids.append(creative_id)
+        if entry['error'] is not None:
+            logging.error(f"{entry['failure_message']}: {str(entry['error'])}")
+            if entry['strict'] and strict_error is None:
+                strict_error = entry['error']
+            continue
+
+        if entry['reused']:
+            print(f"♻️ Associated existing creative ID: {creative_id} for {entry['base_size']} with targeting name: {entry['targeting_name']}")
+            continue
+
+        log_msg = entry['success_message'].format(creative_id=creative_id)
+        logging.info(log_msg)
+        print(log_msg)
+
+        # Log creative creation with actual template_id and creative_id
+        logger.log_creative_creation(
+            template_id=str(entry['template_id']),
+            creative_id=str(creative_id),
+            size=entry['base_size'],
+            asset_files=entry['asset_files']
+        )
+
+    if strict_error is not None:
+        raise strict_error
+    return creative_ids
+
+
 def create_custom_template_creatives(client, order_id, line_item_id, destination_url, expresso_id,
                                      size_name, landing_page=None,
-                                     impression_tracker=None, script_code=None, template_id=None, In_Banner_video=None, line_type=None, tracking_tag=None):
+                                     impression_tracker=None, script_code=None, template_id=None, In_Banner_video=None, line_type=None, tracking_tag=None,
+                                     creative_library=None):
     """
     Creates custom template creatives and associates them with a line item.
     
@@ -126,6 +390,7 @@ def create_custom_template_creatives(client, order_id, line_item_id, destination
         impression_tracker (str, optional): Third-party impression tracker URL
         script_code (str, optional): JavaScript or HTML code from tag file for AI template
         template_id (int, optional): Custom template ID to use, overrides auto-detection
+        creative_library (CampaignCreativeLibrary, optional): Reuse identical creatives created earlier in the campaign
         
     Returns:
         list: List of created creative IDs
@@ -133,9 +398,31 @@ def create_custom_template_creatives(client, order_id, line_item_id, destination
     Raises:
         ValueError: If required fields are missing or no creatives are found
     """
-    creative_service = client.GetService('CreativeService', version='v202508')
-    lica_service = client.GetService('LineItemCreativeAssociationService', version='v202508')
-    logging.info(f"Creating creatives for size: {size_name}")
+    pending = build_template_creative_payloads(
+        client, order_id, line_item_id, destination_url, expresso_id, size_name, landing_page,
+        impression_tracker, script_code, template_id, In_Banner_video, line_type, tracking_tag
+    )
+    return submit_template_creatives(client, line_item_id, pending, creative_library=creative_library)
+
+
+def build_template_creative_payloads(client, order_id, line_item_id, destination_url, expresso_id,
+                                     size_name, landing_page=None,
+                                     impression_tracker=None, script_code=None, template_id=None, In_Banner_video=None, line_type=None, tracking_tag=None):
+    """
+    Builds the TemplateCreative payloads for one size without creating anything in GAM.
+
+    Takes the same arguments as create_custom_template_creatives(). Collect the payloads of
+    every size of a line and pass them to submit_template_creatives() to create them in
+    chunked createCreatives calls.
+
+    Returns:
+        list: Pending creative dicts ('payload', 'size_name', 'base_size', 'targeting_name',
+              'sizes', 'template_id', ...), one per banner file, script or video creative
+
+    Raises:
+        ValueError: If required fields are missing or no creatives are found
+    """
+    logging.info(f"Building creatives for size: {size_name}")
 
     # For AI template (12435443), impression/click template (12330939), In-Banner Video template (12344286), 320x100 special template (12363950), 300x250 richmedia template (12460223), no destination template (12473441), and no landing page template (12399020), destination_url is not strictly required
     if template_id in [12435443, 12330939, 12344286, 12363950, 12460223, 12473441, 12399020]:
@@ -149,23 +436,14 @@ def create_custom_template_creatives(client, order_id, line_item_id, destination
     base_size = size_name.split('_')[0]
     # Handle both uppercase and lowercase 'x' in dimensions (e.g., "600X250" or "600x250")
     width, height = map(int, base_size.lower().split('x'))
-    # Define file extensions
-    image_extensions = ('.png', '.jpeg', '.jpg', '.webp', '.gif')
-    script_extensions = ('.html', '.xlsx', '.xls')
-    valid_extensions = image_extensions + script_extensions
-    
-    # Check for both 300x250 and 600x250 images
-    # has_300x250 = any('300x250' in f.lower() for f in os.listdir(CREATIVES_FOLDER) if f.lower().endswith(valid_extensions))
-    # has_600x250 = any('600x250' in f.lower() for f in os.listdir(CREATIVES_FOLDER) if f.lower().endswith(valid_extensions))
-    
-    banner_files = [f for f in os.listdir(CREATIVES_FOLDER) if base_size in f.lower() and f.lower().endswith(valid_extensions)]
+    # One indexed listing of the creatives folder serves this size and its companion images
+    assets = get_asset_manifest(CREATIVES_FOLDER)
+    banner_files = assets.files_for_size(base_size.lower(), IMAGE_EXTENSIONS + SCRIPT_EXTENSIONS)
     
     # If no image files found but script_code is provided, we can still create a creative using the AI template
     if not banner_files and script_code and len(script_code.strip()) > 10:
-        creative_ids = []
-        
         # Generate a unique name for the creative
-        timestamp = int(time.time() * 1000)
+        timestamp = _unique_timestamp()
         unique_creative_name = f"{order_id}_{base_size}_script_{timestamp}"
         
         # If template_id is provided, use it; otherwise choose based on available data
@@ -218,50 +496,23 @@ def create_custom_template_creatives(client, order_id, line_item_id, destination
         if destination_url and destination_url.strip():
             template_creative['destinationUrl'] = destination_url
         
-        try:
-            created_creative = creative_service.createCreatives([template_creative])
-            if created_creative:
-                creative_id = created_creative[0]['id']
-                creative_ids.append(creative_id)
-
-                lica = {
-                    'creativeId': creative_id,
-                    'lineItemId': line_item_id,
-                    'targetingName': "Mweb_PPD" if (width == 320 and height == 100) else ("Mrec_ex" if (width == 300 and height == 250 and line_type == "richmedia") else f'{width}x{height}'),
-                    'sizes': [{'width': width, 'height': height}]
-                }
+        success_message = f"✅ Created script-only creative ID: {{creative_id}} for {base_size} using AI template"
+        if impression_tracker:
+            success_message += " with impression tracker"
+        return [_pending_creative(
+            template_creative, size_name, base_size, creative_targeting_name(width, height, line_type),
+            [{'width': width, 'height': height}], current_template_id, ["Script-only creative"],
+            success_message, f"⚠️ Failed to create script-only creative for size {base_size}", strict=True
+        )]
 
-                create_lica_with_retry(lica_service, lica)
-                log_msg = f"✅ Created script-only creative ID: {creative_id} for {base_size} using AI template"
-                if impression_tracker:
-                    log_msg += " with impression tracker"
-                logging.info(log_msg)
-                print(log_msg)
-                
-                # Log creative creation with actual template_id and creative_id
-                from logging_utils import logger
-                logger.log_creative_creation(
-                    template_id=str(current_template_id),
-                    creative_id=str(creative_id),
-                    size=base_size,
-                    asset_files=["Script-only creative"]
-                )
-                
-                return creative_ids
-        except Exception as e:
-            logging.error(f"⚠️ Failed to create script-only creative for size {base_size}: {str(e)}")
-            raise
-    
     # Check if In_Banner_video is provided and not empty
     if not banner_files and In_Banner_video and In_Banner_video.strip():
         # Validate that we have either landing_page or destination_url for In-Banner Video template
         if not (landing_page or destination_url):
             raise ValueError("In-Banner Video template requires either landing_page or destination_url")
         
-        creative_ids = []
-        
         # Generate a unique name for the creative
-        timestamp = int(time.time() * 1000)
+        timestamp = _unique_timestamp()
         unique_creative_name = f"{order_id}_inbanner_video_{timestamp}"
         
         # Use In-Banner video template
@@ -290,49 +541,25 @@ def create_custom_template_creatives(client, order_id, line_item_id, destination
             'creativeTemplateVariableValues': template_variables
         }
         
-        try:
-            created_creative = creative_service.createCreatives([template_creative])
-            if created_creative:
-                creative_id = created_creative[0]['id']
-                creative_ids.append(creative_id)
-
-                lica = {
-                    'creativeId': creative_id,
-                    'lineItemId': line_item_id,
-                    'targetingName': "Mweb_PPD" if (width == 320 and height == 100) else ("Mrec_ex" if (width == 300 and height == 250 and line_type == "richmedia") else f'{width}x{height}'),
-                    'sizes': [{'width': width, 'height': height}]
-                }
+        return [_pending_creative(
+            template_creative, size_name, f"{width}x{height}", creative_targeting_name(width, height, line_type),
+            [{'width': width, 'height': height}], current_template_id, ["In-Banner Video"],
+            f"✅ Created In-Banner video creative ID: {{creative_id}} with size {width}x{height}",
+            "⚠️ Failed to create In-Banner video creative", strict=True
+        )]
 
-                create_lica_with_retry(lica_service, lica)
-                log_msg = f"✅ Created In-Banner video creative ID: {creative_id} with size {width}x{height}"
-                logging.info(log_msg)
-                print(log_msg)
-                
-                # Log creative creation with actual template_id and creative_id
-                from logging_utils import logger
-                logger.log_creative_creation(
-                    template_id=str(current_template_id),
-                    creative_id=str(creative_id),
-                    size=f"{width}x{height}",
-                    asset_files=["In-Banner Video"]
-                )
-                
-                return creative_ids
-        except Exception as e:
-            logging.error(f"⚠️ Failed to create In-Banner video creative: {str(e)}")
-            raise
-    
     if not banner_files:
         raise ValueError("No creatives detected in the creatives folder and no valid tag file found")
     
-    creative_ids = []
+    pending = []
 
-    for banner_filename in banner_files:
-        banner_file_path = os.path.join(CREATIVES_FOLDER, banner_filename)
+    for banner_asset in banner_files:
+        banner_filename = banner_asset.name
+        banner_file_path = banner_asset.path
         
         # Determine file type and read accordingly
-        is_image_file = banner_filename.lower().endswith(image_extensions)
-        is_script_file = banner_filename.lower().endswith(script_extensions)
+        is_image_file = banner_asset.kind == 'image'
+        is_script_file = banner_asset.extension in SCRIPT_EXTENSIONS
         
         # Initialize variables
         banner_byte_array = None
@@ -341,9 +568,8 @@ def create_custom_template_creatives(client, order_id, line_item_id, destination
         # Read file content based on type
         if is_image_file:
             # Read image files as binary
-            with open(banner_file_path, 'rb') as file:
-                banner_byte_array = file.read()
-        elif is_script_file and banner_filename.lower().endswith('.html'):
+            banner_byte_array = banner_asset.read_bytes()
+        elif banner_asset.kind == 'html':
             # Process HTML creative before reading
             process_html_creative(banner_file_path, landing_page or destination_url, impression_tracker)
             # Read HTML files as text
@@ -362,14 +588,14 @@ def create_custom_template_creatives(client, order_id, line_item_id, destination
             continue
         
         # Generate unique names with timestamp
-        timestamp = int(time.time() * 1000)
+        timestamp = _unique_timestamp()
         unique_creative_name = f"{order_id}_{banner_filename.split('.')[0]}_{timestamp}"
         unique_asset_name = f"{unique_creative_name}.png"
         
         # Detect banner characteristics
-        is_ai = 'ai' in banner_filename.lower() or banner_filename.lower().endswith('.html')
-        is_2x = '2x' in banner_filename.lower() or '2x' in size_name.lower()
-        is_NoLP = 'nolp' in banner_filename.lower() or 'nolp' in size_name.lower()
+        is_ai = banner_asset.is_ai or banner_asset.kind == 'html'
+        is_2x = banner_asset.is_2x or '2x' in size_name.lower()
+        is_NoLP = banner_asset.is_nolp or 'nolp' in size_name.lower()
         
         # Debug logging for 2x detection
         if is_2x:
@@ -382,17 +608,10 @@ def create_custom_template_creatives(client, order_id, line_item_id, destination
         
         if base_size == '600x250':
             # Read both images
-            banner_300x250 = None
-            banner_600x250 = None
-            
-            for f in os.listdir(CREATIVES_FOLDER):
-                if f.lower().endswith(image_extensions):
-                    if '300x250' in f.lower():
-                        with open(os.path.join(CREATIVES_FOLDER, f), 'rb') as file:
-                            banner_300x250 = file.read()
-                    elif '600x250' in f.lower():
-                        with open(os.path.join(CREATIVES_FOLDER, f), 'rb') as file:
-                            banner_600x250 = file.read()
+            asset_300x250 = assets.first_image('300x250')
+            asset_600x250 = assets.first_image('600x250')
+            banner_300x250 = asset_300x250.read_bytes() if asset_300x250 else None
+            banner_600x250 = asset_600x250.read_bytes() if asset_600x250 else None
             
             # If we don't have both images, use the available one for both
             if not banner_300x250:
@@ -511,13 +730,10 @@ def create_custom_template_creatives(client, order_id, line_item_id, destination
                 
                 # Look for 320x250 image for BigBanner
                 big_banner_size_info = "320x100"  # Default fallback size info
-                for f in os.listdir(CREATIVES_FOLDER):
-                    if f.lower().endswith(image_extensions) and '320x250' in f.lower():
-                        big_banner_path = os.path.join(CREATIVES_FOLDER, f)
-                        with open(big_banner_path, 'rb') as file:
-                            big_banner_bytes = file.read()
-                            big_banner_size_info = "320x250"  # Found 320x250 image
-                        break
+                big_banner_asset = assets.first_image('320x250')
+                if big_banner_asset:
+                    big_banner_bytes = big_banner_asset.read_bytes()
+                    big_banner_size_info = "320x250"  # Found 320x250 image
                 
                 # Generate unique asset names with size information
                 small_banner_asset_name = f"{unique_creative_name}_small_320x100.png"
@@ -554,13 +770,10 @@ def create_custom_template_creatives(client, order_id, line_item_id, destination
                 
                 # Look for 600x250 image for BigBanner
                 big_banner_size_info = "300x250"  # Default fallback size info
-                for f in os.listdir(CREATIVES_FOLDER):
-                    if f.lower().endswith(image_extensions) and '600x250' in f.lower():
-                        big_banner_path = os.path.join(CREATIVES_FOLDER, f)
-                        with open(big_banner_path, 'rb') as file:
-                            big_banner_bytes = file.read()
-                            big_banner_size_info = "600x250"  # Found 600x250 image
-                        break
+                big_banner_asset = assets.first_image('600x250')
+                if big_banner_asset:
+                    big_banner_bytes = big_banner_asset.read_bytes()
+                    big_banner_size_info = "600x250"  # Found 600x250 image
                 
                 # Generate unique asset names with size information
                 small_banner_asset_name = f"{unique_creative_name}_small_300x250.png"
@@ -597,13 +810,10 @@ def create_custom_template_creatives(client, order_id, line_item_id, destination
                 
                 # Look for 450x600 image for BigBanner
                 big_banner_size_info = "300x600"  # Default fallback size info
-                for f in os.listdir(CREATIVES_FOLDER):
-                    if f.lower().endswith(image_extensions) and '450x600' in f.lower():
-                        big_banner_path = os.path.join(CREATIVES_FOLDER, f)
-                        with open(big_banner_path, 'rb') as file:
-                            big_banner_bytes = file.read()
-                            big_banner_size_info = "450x600"  # Found 450x600 image
-                        break
+                big_banner_asset = assets.first_image('450x600')
+                if big_banner_asset:
+                    big_banner_bytes = big_banner_asset.read_bytes()
+                    big_banner_size_info = "450x600"  # Found 450x600 image
                 
                 # Generate unique asset names with size information
                 small_banner_asset_name = f"{unique_creative_name}_small_300x600.png"
@@ -769,52 +979,22 @@ def create_custom_template_creatives(client, order_id, line_item_id, destination
                 {'xsi_type': 'StringCreativeTemplateVariableValue', 'uniqueName': 'ScriptCode', 'value': tracking_tag}
             )
 
-        try:
-            created_creative = creative_service.createCreatives([template_creative])
-            if created_creative:
-                creative_id = created_creative[0]['id']
-                creative_ids.append(creative_id)
-
-                # Determine the correct targeting name to match line item creative targeting
-                if width == 320 and height == 100:
-                    targeting_name = "Mweb_PPD"  # Must match the targeting name used in line item creation
-                elif width == 300 and height == 250 and line_type == "richmedia":
-                    targeting_name = "Mrec_ex"  # Must match the targeting name used in line item creation for 300x250 richmedia
-                else:
-                    targeting_name = f'{width}x{height}'
-
-                # Include both the original size and any override sizes
-                sizes_for_lica = [{'width': width, 'height': height}]
-                if size_overrides:
-                    sizes_for_lica.extend(size_overrides)
-                
-                lica = {
-                    'creativeId': creative_id,
-                    'lineItemId': line_item_id,
-                    'targetingName': targeting_name,
-                    'sizes': sizes_for_lica
-                }
+        # Include both the original size and any override sizes
+        sizes_for_lica = [{'width': width, 'height': height}]
+        if size_overrides:
+            sizes_for_lica.extend(size_overrides)
 
-                create_lica_with_retry(lica_service, lica)
-                log_msg = f"✅ Created creative ID: {creative_id} for {base_size} with targeting name: {targeting_name}"
-                if impression_tracker:
-                    log_msg += " with impression tracker"
-                logging.info(log_msg)
-                print(log_msg)
-                
-                # Log creative creation with actual template_id and creative_id
-                from logging_utils import logger
-                asset_files = [banner_filename] if banner_filename else []
-                logger.log_creative_creation(
-                    template_id=str(current_template_id),
-                    creative_id=str(creative_id),
-                    size=base_size,
-                    asset_files=asset_files
-                )
-        except Exception as e:
-            logging.error(f"⚠️ Failed to create creatives for size {base_size}: {str(e)}")
+        targeting_name = creative_targeting_name(width, height, line_type)
+        success_message = f"✅ Created creative ID: {{creative_id}} for {base_size} with targeting name: {targeting_name}"
+        if impression_tracker:
+            success_message += " with impression tracker"
+        pending.append(_pending_creative(
+            template_creative, size_name, base_size, targeting_name, sizes_for_lica, current_template_id,
+            [banner_filename] if banner_filename else [],
+            success_message, f"⚠️ Failed to create creatives for size {base_size}"
+        ))
 
-    return creative_ids
+    return pending
 
 def get_html_variable_name(client, template_id):
     creative_template_service = client.GetService('CreativeTemplateService', version='v202508')
@@ -0,0 +1,109 @@
+"""
+Process-wide Google Sheets client provider.
+
+get_sheets_client() authorizes once per (credentials file, scopes), keeps the gspread
+client for the life of the process and shares one keep-alive HTTP connection pool
+between every sheet read. The OAuth token is refreshed under a lock shortly before it
+expires, so concurrent readers never mint tokens in parallel or hit a 401 mid-request.
+"""
+
+import datetime
+import os
+import threading
+
+import gspread
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+
+from config import CREDENTIALS_PATH
+
+SHEETS_HTTP_POOL_SIZE = 10  # Keep-alive connections per host shared by all threads
+SHEETS_TOKEN_REFRESH_MARGIN = 300  # Refresh the OAuth token this many seconds before it expires
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class _SheetsClientEntry:
+    __slots__ = ("client", "credentials", "lock")
+
+    def __init__(self, client, credentials):
+        self.client = client
+        self.credentials = credentials
+        self.lock = threading.Lock()
+
+
+def _pooled_session(credentials):
+    """AuthorizedSession with a connection pool sized for concurrent sheet reads"""
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=SHEETS_HTTP_POOL_SIZE, pool_maxsize=SHEETS_HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    return session
+
+
+def _token_expiring(credentials):
+    if not credentials.token or credentials.expiry is None:
+        return True
+    # google-auth keeps expiry as a naive UTC datetime
+    remaining = credentials.expiry - datetime.datetime.utcnow()
+    return remaining.total_seconds() < SHEETS_TOKEN_REFRESH_MARGIN
+
+
+def _refresh_if_needed(entry):
+    if not _token_expiring(entry.credentials):
+        return
+    with entry.lock:
+        if _token_expiring(entry.credentials):
+            try:
+                entry.credentials.refresh(Request(entry.client.http_client.session))
+            except Exception as e:
+                # The session retries the refresh on the next request; don't fail callers (or imports) here
+                print(f"⚠️ Could not refresh Google Sheets token: {e}")
+
+
+def get_sheets_client(credentials_path=CREDENTIALS_PATH, scopes=None, timeout=None):
+    """
+    Return the shared gspread client for a service account file and scopes.
+
+    Args:
+        credentials_path: Service account JSON file
+        scopes: OAuth scopes (defaults to read/write Sheets)
+        timeout: Optional per-request timeout in seconds for this client
+
+    Returns:
+        gspread.Client: Authorized client with a fresh token
+    """
+    scopes = tuple(scopes or ["https://www.googleapis.com/auth/spreadsheets"])
+    key = (os.path.abspath(credentials_path), scopes)
+    entry = _clients.get(key)
+    if entry is None:
+        with _clients_lock:
+            entry = _clients.get(key)
+            if entry is None:
+                credentials = Credentials.from_service_account_file(credentials_path, scopes=list(scopes))
+                client = gspread.Client(auth=credentials, session=_pooled_session(credentials))
+                # gspread only keeps the credentials itself when it builds the session
+                client.http_client.auth = credentials
+                entry = _SheetsClientEntry(client, credentials)
+                _clients[key] = entry
+                print(f"🔑 Authorized Google Sheets client ({os.path.basename(credentials_path)}, {len(scopes)} scope(s))")
+
+    if timeout is not None:
+        entry.client.set_timeout(timeout)
+    _refresh_if_needed(entry)
+    return entry.client
+
+
+def reset_sheets_clients():
+    """Drop cached clients, e.g. after the credentials file was rotated"""
+    with _clients_lock:
+        for entry in _clients.values():
+            entry.client.http_client.session.close()
+        _clients.clear()
+
+
+if __name__ == "__main__":
+    # Example usage
+    client = get_sheets_client()
+    print(f"✅ Sheets client ready, token valid until {client.http_client.auth.expiry} UTC")
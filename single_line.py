@@ -1,9 +1,11 @@
 import os
-import glob
 from googleads import ad_manager
 from datetime import datetime
-from ros_banner_template_creatives import create_custom_template_creatives
-from placements_for_creatives import fetch_placements_ids
+from ros_banner_template_creatives import (
+    CampaignCreativeLibrary, build_template_creative_payloads, create_custom_template_creatives,
+    submit_template_creatives,
+)
+from placements_for_creatives import fetch_site_group_placements, load_placement_workbook, workbook_revision
 import sys
 import requests
 import hashlib
@@ -12,17 +14,28 @@ import json
 import pandas as pd
 import re
 import traceback
-from config import CREATIVES_FOLDER, CREDENTIALS_PATH
+from config import (
+    CREATIVES_FOLDER, CREDENTIALS_PATH, GEO_LOOKUP_WORKERS,
+    PLACEMENT_SHEET_URL, PLACEMENT_SHEET_NAME_LANG, PLACEMENT_SHEET_NAME_TOI, PLACEMENT_SHEET_NAME_ET,
+    PLACEMENT_SHEET_NAME_CAN_PSBK, PLACEMENT_WORKBOOK_SHEETS, SHARE_CREATIVES_ACROSS_LINES,
+)
 import time
 import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import LRUCache
 from logging_utils import logger
+from pql_cache import cached_pql_service, invalidate_tables, pql_cache_stats
+from geo_name_index import correct_geo_name, get_state_index, suggest_geo_names
+from geo_target_mirror import find_geo_candidates, get_geo_target, normalize_geo_name, unwrap_pql_value
+from inventory_validator import drop_dead_placements, validate_inventory_ids
+from tag_reader import read_tag_file, tag_file_stats
+from asset_manifest import get_asset_manifest
+from campaign_plan_cache import campaign_plan_key, campaign_plan_stats, get_campaign_plan, store_campaign_plan
 
 # Constants
-SHEET_URL = "https://docs.google.com/spreadsheets/d/11_SZJnn5KALr6zi0JA27lKbmQvA1WSK4snp0UTY2AaY/edit?gid=2043018330"
-PLACEMENT_SHEET_NAME_LANG = "ALL LANGUAGES"
-PLACEMENT_SHEET_NAME_TOI = "TOI + ETIMES"
-PLACEMENT_SHEET_NAME_ET = "ET Placement/Preset"
-PLACEMENT_SHEET_NAME_CAN_PSBK = "CAN_PSBK"
+SHEET_URL = PLACEMENT_SHEET_URL
+NWP_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')  # Creative files the NWP line picks up
 
 # Print sheet information for debugging
 print(f"\nSheet Configuration:")
@@ -60,10 +73,28 @@ richmedia_presets_dict = {
     # ... add more as needed
 }
 
+# Geo_Target types tried by get_geo_id in priority order: (label, types, exclude Pakistan)
+GEO_TYPE_PRIORITY = [
+    ("COUNTRY", ("COUNTRY",), False),
+    ("REGION", ("REGION", "PROVINCE", "STATE", "DEPARTMENT"), True),
+    ("CITY", ("CITY",), True),
+    ("SUB_DISTRICT", ("SUB_DISTRICT",), True),
+]
+GEO_NAME_BATCH_SIZE = 100  # Location names per batched Geo_Target query
+GEO_QUERY_PAGE_SIZE = 500
+PARENT_REGION_CACHE_SIZE = 5000  # Geo ID -> parent region name entries kept in memory
+
+_parent_region_cache = LRUCache(maxsize=PARENT_REGION_CACHE_SIZE)
+_parent_region_lock = threading.Lock()
+
 class LocationNotFoundError(Exception):
-    def __init__(self, location_name):
-        super().__init__(f"No matching location found at any level for: {location_name}")
+    def __init__(self, location_name, suggestions=None):
+        message = f"No matching location found at any level for: {location_name}"
+        if suggestions:
+            message += f" (did you mean: {', '.join(suggestions)}?)"
+        super().__init__(message)
         self.location_name = location_name
+        self.suggestions = suggestions or []
 
 class MultipleGeoLocationsError(Exception):
     def __init__(self, location_name, matches, requires_csm_confirmation=True):
@@ -97,97 +128,425 @@ def get_india_geo_id(client):
         print(f"⚠️ Could not get India geo ID: {e}")
         return 2356  # Fallback to known India geo ID
 
-def setup_geo_targeting_for_line_type(client, geo_targeting, line_type):
+class GeoResolutionContext:
+    """
+    Geo targeting resolved once per campaign and shared by every line variant.
+
+    Holds the resolved user geos, India's geo ID, the names that could not be
+    resolved and the auto-selection audit trail, so the standard, PSBK and NWP
+    lines of a three_lines call all use the same disambiguation choices.
+    """
+
+    def __init__(self, geo_targeting):
+        if isinstance(geo_targeting, str):
+            geo_targeting = [location.strip() for location in geo_targeting.split(",") if location.strip()]
+        self.geo_targeting = list(geo_targeting or [])
+        self.resolved_geos = {}
+        self.missing_locations = []
+        self.india_geo_id = None
+        self.auto_selections = []
+
+    @classmethod
+    def build(cls, client, geo_targeting, include_india=True):
+        """Resolve the user geos (and India) for a campaign"""
+        context = cls(geo_targeting)
+        print(f"🌍 Resolving campaign geo targeting once: {context.geo_targeting}")
+        
+        if context.geo_targeting:
+            context.resolved_geos = resolve_geos(
+                client, context.geo_targeting, skip_missing=True, auto_selections=context.auto_selections
+            )
+            context.missing_locations = [
+                location for location in context.geo_targeting if location not in context.resolved_geos
+            ]
+        
+        if include_india:
+            context.india_geo_id = get_india_geo_id(client)
+        
+        print(f"✅ Resolved {len(context.resolved_geos)}/{len(context.geo_targeting)} locations")
+        if context.missing_locations:
+            print(f"⚠️ Unresolved locations: {context.missing_locations}")
+        return context
+
+    def targeting_for_line_type(self, line_type):
+        """
+        Geo IDs for a line type:
+        - Standard: Target user-selected geo, skipping unresolved locations
+        - PSBK/NWP: Target India, exclude user-selected geo (unresolved locations raise)
+
+        Returns:
+            tuple: (geo_ids, excluded_geo_ids)
+        """
+        geo_ids = []
+        excluded_geo_ids = []
+        
+        if line_type == "standard":
+            print(f"\n{'='*50}")
+            print(f"📍 Setting up Standard line geo targeting")
+            print(f"🎯 Target locations: {self.geo_targeting}")
+            print(f"{'='*50}\n")
+            
+            if not self.geo_targeting:
+                print("⚠️ No geo targeting locations provided for standard line")
+            for location in self.geo_targeting:
+                geo_id = self.resolved_geos.get(location)
+                if geo_id:
+                    geo_ids.append(geo_id)
+                    print(f"✅ Successfully mapped {location} to geo ID: {geo_id}")
+                else:
+                    print(f"\n❌ ERROR: Location not found")
+                    print(f"📍 Location: {location}")
+                    print("⚠️ This location will be skipped in targeting\n")
+            return geo_ids, excluded_geo_ids
+        
+        # PSBK or NWP line: Target India but exclude user-selected geo
+        print(f"📍 {line_type.upper()} line geo targeting: India (excluding {self.geo_targeting})")
+        if self.india_geo_id:
+            geo_ids.append(self.india_geo_id)
+            print(f"🌍 {line_type.upper()} - Successfully targeting India: {self.india_geo_id}")
+        else:
+            print(f"❌ {line_type.upper()} - Failed to get India geo ID")
+        
+        if not self.geo_targeting:
+            print(f"🔍 {line_type.upper()} - No user geo to exclude")
+        if self.missing_locations:
+            error = LocationNotFoundError(self.missing_locations[0])
+            print(f"❌ Location error for {line_type} line exclusion: {error}")
+            raise error
+        for location in self.geo_targeting:
+            geo_id = self.resolved_geos[location]
+            excluded_geo_ids.append(geo_id)
+            print(f"🚫 {line_type.upper()} - Successfully excluding {location}: {geo_id}")
+        return geo_ids, excluded_geo_ids
+
+
+def setup_geo_targeting_for_line_type(client, geo_targeting, line_type, geo_context=None):
     """
     Setup geo targeting based on line type:
     - Standard: Use user-selected geo
     - PSBK/NWP: Target India, exclude user-selected geo
+
+    A GeoResolutionContext shared across lines can be passed to skip re-resolving the geos.
     """
     print(f"\n{'='*50}")
     print(f"🎯 Setting up geo targeting for line type: {line_type}")
     print(f"📍 Input geo targeting: {geo_targeting}")
     print(f"{'='*50}\n")
     
-    geo_ids = []
-    excluded_geo_ids = []
-    
-    print(f"📍 Setting up geo targeting for {line_type} line with targeting: {geo_targeting}")
+    if geo_context is None:
+        geo_context = GeoResolutionContext.build(client, geo_targeting, include_india=(line_type != "standard"))
+    else:
+        print(f"♻️ Reusing campaign geo resolution for {line_type} line")
     
-    if line_type == "standard":
-        # Standard line: Use user-selected geo as-is
-        print(f"\n{'='*50}")
-        print(f"📍 Setting up Standard line geo targeting")
-        print(f"🎯 Target locations: {geo_targeting}")
-        print(f"{'='*50}\n")
+    return geo_context.targeting_for_line_type(line_type)
+
+def _geo_matches_type(geo, geo_types, exclude_pk):
+    """Apply the same filters as the per-type PQL queries to a mirrored geo row"""
+    if not geo.get("Targetable"):
+        return False
+    if geo.get("Type") not in geo_types:
+        return False
+    return not (exclude_pk and geo.get("CountryCode") == "PK")
+
+
+def _select_geo_match(client, base_location, specified_state, geo_type, matches, auto_selections=None):
+    """
+    Pick one geo from the matches found for a single geo type.
+    Prefers India (IN) then US, uses the state/region hint when given,
+    and otherwise auto-selects the first match with a prominent warning.
+    Automatic picks are appended to auto_selections when a list is given.
+    """
+    # Filter by country - prioritize India (IN) and US locations
+    india_matches = [m for m in matches if m["CountryCode"] == "IN"]
+    us_matches = [m for m in matches if m["CountryCode"] == "US"]
+    
+    preferred_matches = india_matches if india_matches else (us_matches if us_matches else matches)
+    
+    # If state/region is specified and we have multiple matches, try to disambiguate
+    if specified_state and len(preferred_matches) > 1:
+        final_match = disambiguate_by_parent_region(client, preferred_matches, specified_state)
+        if final_match:
+            print(f"✅ Found as {geo_type} with state disambiguation: {final_match['Name']}, {final_match['CountryCode']}, ID: {final_match['Id']}")
+            return final_match
+    
+    # Handle multiple matches without state specification
+    if len(preferred_matches) > 1:
+        # Add parent region info to matches for better display
+        enhanced_matches = []
+        parent_regions = hydrate_parent_regions(client, [match["Id"] for match in preferred_matches])
+        for match in preferred_matches:
+            parent_info = parent_regions.get(str(match["Id"]), "Unknown Region")
+            enhanced_match = match.copy()
+            enhanced_match['ParentRegion'] = parent_info
+            enhanced_matches.append(enhanced_match)
+        
+        # Check if this requires CSM confirmation (more than 2 matches or ambiguous locations)
+        requires_csm = len(preferred_matches) > 2 or is_ambiguous_location(base_location)
+        final_match = preferred_matches[0]
+        
+        if auto_selections is not None:
+            auto_selections.append({
+                'input': base_location,
+                'selected': f"{final_match['Name']}, {enhanced_matches[0]['ParentRegion']}, {final_match['CountryCode']}",
+                'geo_id': final_match['Id'],
+                'reason': f"First of {len(preferred_matches)} {geo_type} matches" + (" (CSM confirmation recommended)" if requires_csm else "")
+            })
         
-        if geo_targeting:
-            for location in geo_targeting:
-                try:
-                    print(f"🔍 Looking up geo ID for: {location}")
-                    geo_id = get_geo_id(client, location)
-                    if geo_id:
-                        geo_ids.append(geo_id)
-                        print(f"✅ Successfully mapped {location} to geo ID: {geo_id}")
-                    else:
-                        print(f"⚠️ No geo ID found for location: {location}")
-                        print("⚠️ This location will be skipped in targeting")
-                except LocationNotFoundError as e:
-                    print(f"\n❌ ERROR: Location not found")
-                    print(f"📍 Location: {location}")
-                    print(f"❗ Details: {str(e)}")
-                    print("⚠️ This location will be skipped in targeting\n")
-                except MultipleGeoLocationsError as e:
-                    print(f"\n🚨 WARNING: Multiple locations found")
-                    print(f"📍 Location: {location}")
-                    print(f"✅ Using first matching location")
-                    print(f"❗ Details: {str(e)}\n")
-                except Exception as e:
-                    print(f"\n❌ Unexpected error processing location: {location}")
-                    print(f"❗ Error: {str(e)}")
-                    print("⚠️ This location will be skipped in targeting\n")
+        if requires_csm:
+            # For multiple matches, show PROMINENT warning but proceed with first match
+            print("\n" + "="*80)
+            print("🚨 MULTIPLE GEO LOCATIONS FOUND - USING FIRST MATCH 🚨")
+            print("="*80)
+            print(f"📍 Location '{base_location}' has multiple matches")
+            print(f"✅ Using first match: {enhanced_matches[0]['Name']} ({enhanced_matches[0]['ParentRegion']})")
+            print("="*80 + "\n")
         else:
-            print("⚠️ No geo targeting locations provided for standard line")
+            # For 2 matches, show PROMINENT warning but proceed with first match
+            print("\n" + "="*80)
+            print("🚨 AUTOMATION ALERT: MULTIPLE GEO LOCATIONS DETECTED 🚨")
+            print("="*80)
+            print(f"📍 SEARCHING FOR: '{base_location}'")
+            print(f"🔍 FOUND {len(enhanced_matches)} MATCHING LOCATIONS:")
+            print("-" * 60)
+            
+            for i, match in enumerate(enhanced_matches):
+                marker = "👉 SELECTED" if i == 0 else "   Available"
+                print(f"{marker}: {match['Name']}, {match['ParentRegion']}, {match['CountryCode']} (ID: {match['Id']})")
+            
+            print("-" * 60)
+            parent_info = enhanced_matches[0]['ParentRegion']
+            
+            print(f"⚡ AUTOMATION DECISION: Selected '{final_match['Name']}, {parent_info}'")
+            print(f"📋 REASON: First match from available options")
+            print(f"⚠️  WARNING: Other locations with same name exist!")
+            print()
+            print("💡 TO AVOID THIS IN FUTURE:")
+            print(f"   Use specific format: '{base_location}, State/Region'")
+            print(f"   Examples: 'Aurangabad, Maharashtra' or 'Aurangabad, Bihar'")
+            print()
+            print("📞 NEED DIFFERENT LOCATION?")
+            print("   Contact your CSM to change the geo targeting")
+            print("="*80)
+            print("🎯 PROCEEDING WITH LINE CREATION...")
+            print("="*80 + "\n")
+            
+            # Print the automatic selection for audit trail
+            print(f"✅ Auto-selected: {final_match['Name']} ({parent_info})")
+    else:
+        final_match = preferred_matches[0]
     
-    else:  # PSBK or NWP line
-        # Target India but exclude user-selected geo
-        print(f"📍 {line_type.upper()} line geo targeting: India (excluding {geo_targeting})")
-        
-        # Add India as target
-        print(f"🔍 {line_type.upper()} - Getting India geo ID...")
+    print(f"✅ Found as {geo_type}: {final_match['Name']}, {final_match['CountryCode']}, ID: {final_match['Id']}")
+    return final_match
+
+
+def _rank_geo_candidates(client, location_name, candidates, source="", auto_selections=None):
+    """
+    Rank the candidates found for one location by GEO_TYPE_PRIORITY and pick a match.
+
+    Returns:
+        The selected geo dict, or None if no geo type has a usable match
+    """
+    location_parts = [part.strip() for part in location_name.split(',')]
+    base_location = location_parts[0]
+    specified_state = location_parts[1] if len(location_parts) > 1 else None
+
+    for geo_type, geo_types, exclude_pk in GEO_TYPE_PRIORITY:
+        matches = [geo for geo in candidates if _geo_matches_type(geo, geo_types, exclude_pk)]
+        if not matches:
+            continue
         try:
-            india_geo_id = get_india_geo_id(client)
-            if india_geo_id:
-                geo_ids.append(india_geo_id)
-                print(f"🌍 {line_type.upper()} - Successfully targeting India: {india_geo_id}")
-            else:
-                print(f"❌ {line_type.upper()} - Failed to get India geo ID")
+            for geo_data in matches:
+                print(f"Found match{source}: {geo_data['Name']} ({geo_data['Type']}) - ID: {geo_data['Id']}")
+            return _select_geo_match(client, base_location, specified_state, geo_type, matches, auto_selections)
         except Exception as e:
-            print(f"❌ {line_type.upper()} - Error getting India geo ID: {e}")
-        
-        # Add user-selected geo to exclusions
-        if geo_targeting:
-            print(f"🔍 {line_type.upper()} - Processing exclusions for: {geo_targeting}")
-            for location in geo_targeting:
+            print(f"⚠️ Error searching as {geo_type}: {e}")
+            continue
+    return None
+
+
+def _map_in_order(func, items, workers=GEO_LOOKUP_WORKERS):
+    """Run func over items on a bounded thread pool, returning results in input order"""
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+def _fetch_geo_candidate_chunk(client, chunk):
+    """Fetch the targetable Geo_Target rows for one chunk of names"""
+    type_list = ", ".join(f"'{geo_type}'" for _, geo_types, _ in GEO_TYPE_PRIORITY for geo_type in geo_types)
+    placeholders = ", ".join(f":name{i}" for i in range(len(chunk)))
+    values = [
+        {'key': f"name{i}", 'value': {'xsi_type': 'TextValue', 'value': name}}
+        for i, name in enumerate(chunk)
+    ]
+    geos = []
+    offset = 0
+    print(f"🔍 Looking up {len(chunk)} location(s) in one Geo_Target query")
+
+    try:
+        pql_service = cached_pql_service(client)
+        while True:
+            query = f"""
+            SELECT Id, Name, Targetable, Type, CountryCode 
+            FROM Geo_Target 
+            WHERE Name IN ({placeholders}) 
+            AND Targetable = true 
+            AND Type IN ({type_list})
+            ORDER BY Id
+            LIMIT {GEO_QUERY_PAGE_SIZE} OFFSET {offset}
+            """
+            response = pql_service.select({'query': query, 'values': values})
+            rows = response.rows if hasattr(response, 'rows') and response.rows else []
+
+            for row in rows:
                 try:
-                    print(f"🔍 {line_type.upper()} - Getting geo ID for exclusion: {location}")
-                    geo_id = get_geo_id(client, location)
-                    if geo_id:
-                        excluded_geo_ids.append(geo_id)
-                        print(f"🚫 {line_type.upper()} - Successfully excluding {location}: {geo_id}")
-                    else:
-                        print(f"⚠️ {line_type.upper()} - No geo ID found for {location}")
-                except LocationNotFoundError as e:
-                    print(f"❌ Location error for {line_type} line exclusion: {e}")
-                    raise e
-                except MultipleGeoLocationsError as e:
-                    print(f"🚨 Multiple geo locations found for {line_type} line exclusion: {e}")
-                    raise e
+                    row_values = row.values
+                    geos.append({
+                        "Id": row_values[0].value,
+                        "Name": row_values[1].value,
+                        "Targetable": row_values[2].value,
+                        "Type": row_values[3].value,
+                        "CountryCode": row_values[4].value
+                    })
                 except Exception as e:
-                    print(f"⚠️ Error getting exclusion geo ID for {location}: {e}")
+                    print(f"⚠️ Error processing row: {e}")
+                    continue
+
+            if len(rows) < GEO_QUERY_PAGE_SIZE:
+                break
+            offset += GEO_QUERY_PAGE_SIZE
+    except Exception as e:
+        print(f"⚠️ Error searching locations {chunk}: {e}")
+
+    return geos
+
+
+def _fetch_geo_candidates(client, base_names):
+    """
+    Fetch the targetable Geo_Target rows for many names with one PQL query per chunk.
+    Chunks run concurrently when GEO_LOOKUP_WORKERS > 1.
+
+    Returns:
+        dict: normalized name -> list of candidate geo dicts
+    """
+    candidates = {normalize_geo_name(name): [] for name in base_names}
+    chunks = [base_names[start:start + GEO_NAME_BATCH_SIZE] for start in range(0, len(base_names), GEO_NAME_BATCH_SIZE)]
+
+    for geos in _map_in_order(lambda chunk: _fetch_geo_candidate_chunk(client, chunk), chunks):
+        for geo_data in geos:
+            candidates.setdefault(normalize_geo_name(geo_data["Name"]), []).append(geo_data)
+
+    return candidates
+
+
+def resolve_geos(client, location_names, skip_missing=False, auto_selections=None, correct_spelling=True):
+    """
+    Resolve many location names to Geo IDs with as few PQL round trips as possible.
+
+    Names are first looked up in the offline Geo_Target mirror; the rest are fetched
+    with a single `Name IN (...) AND Type IN (...)` query per chunk and ranked on the
+    client with the same COUNTRY > REGION > CITY > SUB_DISTRICT and IN > US priority
+    as get_geo_id. With GEO_LOOKUP_WORKERS > 1 the chunk queries and per-name ranking
+    (parent-region lookups) run on a bounded thread pool; results keep input order.
+
+    Args:
+        client: Google Ad Manager client
+        location_names: Location names, optionally as "City, State"
+        skip_missing: Leave unresolved names out of the result instead of raising
+        auto_selections: Optional list collecting the automatic picks among duplicate names
+        correct_spelling: Retry unresolved names with a local high-confidence spelling correction
+
+    Returns:
+        dict: location name -> Geo ID, in input order
+
+    Raises:
+        LocationNotFoundError: If a name cannot be resolved and skip_missing is False
+    """
+    location_names = list(dict.fromkeys(location_names))
+    resolved = {}
+    pending = []
+
+    def rank(location_name, candidates, source=""):
+        # Each lookup collects its own auto-selections so they can be merged in input order
+        selections = []
+        final_match = _rank_geo_candidates(client, location_name, candidates, source, selections)
+        return final_match, selections
+
+    def record(location_names_ranked, ranked):
+        still_missing = []
+        for location_name, (final_match, selections) in zip(location_names_ranked, ranked):
+            if auto_selections is not None:
+                auto_selections.extend(selections)
+            if final_match:
+                resolved[location_name] = final_match["Id"]
+            else:
+                still_missing.append(location_name)
+        return still_missing
+
+    local = []
+    for location_name in location_names:
+        print(f"🔍 Searching for Geo ID of: {location_name}")
+        base_location = location_name.split(',')[0].strip()
+        local_candidates = find_geo_candidates(base_location)
+        if local_candidates:
+            local.append((location_name, local_candidates))
         else:
-            print(f"🔍 {line_type.upper()} - No user geo to exclude")
-    
-    return geo_ids, excluded_geo_ids
+            pending.append(location_name)
+
+    if local:
+        ranked = _map_in_order(lambda item: rank(item[0], item[1], " (offline mirror)"), local)
+        for location_name in record([name for name, _ in local], ranked):
+            print(f"ℹ️ No targetable match for '{location_name.split(',')[0].strip()}' in offline geo mirror, querying PQL")
+            pending.append(location_name)
+
+    if pending:
+        base_names = list(dict.fromkeys(name.split(',')[0].strip() for name in pending))
+        candidates = _fetch_geo_candidates(client, base_names)
+        ranked = _map_in_order(
+            lambda location_name: rank(location_name, candidates.get(normalize_geo_name(location_name.split(',')[0].strip()), [])),
+            pending
+        )
+        record(pending, ranked)
+
+    unresolved = [location_name for location_name in location_names if location_name not in resolved]
+    if unresolved and correct_spelling:
+        corrections = {}
+        for location_name in unresolved:
+            base_location, _, state_suffix = location_name.partition(',')
+            corrected = correct_geo_name(base_location.strip())
+            if corrected:
+                corrections[location_name] = f"{corrected},{state_suffix}" if state_suffix else corrected
+                print(f"🔤 Trying spelling correction: '{base_location.strip()}' → '{corrected}'")
+        if corrections:
+            corrected_ids = resolve_geos(
+                client, list(corrections.values()), skip_missing=True,
+                auto_selections=auto_selections, correct_spelling=False
+            )
+            for location_name, corrected_name in corrections.items():
+                if corrected_name in corrected_ids:
+                    resolved[location_name] = corrected_ids[corrected_name]
+                    print(f"✅ Auto-corrected '{location_name}' → '{corrected_name}' (ID: {resolved[location_name]})")
+                    if auto_selections is not None:
+                        auto_selections.append({
+                            'input': location_name,
+                            'selected': corrected_name,
+                            'geo_id': resolved[location_name],
+                            'reason': "Spelling corrected from local alias/trigram index"
+                        })
+
+    results = {}
+    for location_name in location_names:
+        if location_name in resolved:
+            results[location_name] = resolved[location_name]
+            continue
+        print(f"❌ No matching location found at any level for: {location_name}")
+        if not skip_missing:
+            suggestions = [name for name, _ in suggest_geo_names(location_name.split(',')[0].strip())]
+            raise LocationNotFoundError(location_name, suggestions)
+    return results
+
 
 def get_geo_id(client, location_name):
     """
@@ -197,279 +556,139 @@ def get_geo_id(client, location_name):
     - "Aurangabad, Maharashtra" (specific state targeting)
     - "Aurangabad, Bihar" (specific state targeting)
     """
-    print(f"🔍 Searching for Geo ID of: {location_name}")
-    pql_service = client.GetService("PublisherQueryLanguageService", version="v202508")
+    return resolve_geos(client, [location_name])[location_name]
 
-    # Parse location input for state/region specification
-    location_parts = [part.strip() for part in location_name.split(',')]
-    base_location = location_parts[0]
-    specified_state = location_parts[1] if len(location_parts) > 1 else None
-    
-    # Try as Country first
-    country_query = f"""
-    SELECT Id, Name, Targetable, Type, CountryCode 
-    FROM Geo_Target 
-    WHERE Name = '{base_location}' 
-    AND Targetable = true 
-    AND Type = 'COUNTRY'
-    """
-    
-    # Try as State/Region if Country not found
-    region_query = f"""
-    SELECT Id, Name, Targetable, Type, CountryCode 
-    FROM Geo_Target 
-    WHERE Name = '{base_location}' 
-    AND Targetable = true 
-    AND Type IN ('REGION', 'PROVINCE', 'STATE', 'DEPARTMENT')
-    AND CountryCode != 'PK'
-    """
-    
-    # Try as City if neither Country nor Region found
-    city_query = f"""
-    SELECT Id, Name, Targetable, Type, CountryCode 
-    FROM Geo_Target 
-    WHERE Name = '{base_location}' 
-    AND Targetable = true 
-    AND Type = 'CITY'
-    AND CountryCode != 'PK'
+
+def _store_parent_regions(parent_regions):
+    with _parent_region_lock:
+        for geo_id, parent_name in parent_regions.items():
+            _parent_region_cache[geo_id] = parent_name
+
+
+def hydrate_parent_regions(client, geo_ids):
     """
-    
-    # Try as Sub-District 
-    sub_district_query = f"""
-    SELECT Id, Name, Targetable, Type, CountryCode 
-    FROM Geo_Target 
-    WHERE Name = '{base_location}' 
-    AND Targetable = true 
-    AND Type = 'SUB_DISTRICT'
-    AND CountryCode != 'PK'
+    Resolve the immediate parent region name for many geo IDs at once.
+
+    IDs are served from the parent-region cache or the offline mirror where possible;
+    the rest cost one `Id IN (...)` query for their ParentIds and one more for the
+    parent names, regardless of how many IDs are passed.
+
+    Returns:
+        dict: geo ID (str) -> parent region name ("Unknown Region" when it has none)
     """
+    parent_regions = {}
+    pending = []
+
+    for geo_id in dict.fromkeys(str(geo_id) for geo_id in geo_ids):
+        with _parent_region_lock:
+            cached = _parent_region_cache.get(geo_id)
+        if cached is not None:
+            parent_regions[geo_id] = cached
+            continue
 
-    queries = [
-        ("COUNTRY", country_query),
-        ("REGION", region_query),
-        ("CITY", city_query),
-        ("SUB_DISTRICT", sub_district_query)
-    ]
+        # Resolve from the offline mirror when both the geo and its parent are known locally
+        geo = get_geo_target(geo_id)
+        if geo is not None:
+            parent_ids = geo.get("ParentIds") or []
+            parent = get_geo_target(parent_ids[-1]) if parent_ids else None
+            if not parent_ids or parent is not None:
+                parent_regions[geo_id] = parent["Name"] if parent else "Unknown Region"
+                continue
+        pending.append(geo_id)
 
-    for geo_type, query in queries:
+    if pending:
+        fetched = {geo_id: "Unknown Region" for geo_id in pending}
         try:
-            statement = {'query': query}
-            response = pql_service.select(statement)
+            pql_service = cached_pql_service(client)
             
-            if hasattr(response, 'rows') and response.rows:
-                matches = []
-                
-                for row in response.rows:
-                    try:
-                        values = row.values
-                        geo_data = {
-                            "Id": values[0].value,
-                            "Name": values[1].value,
-                            "Targetable": values[2].value,
-                            "Type": values[3].value,
-                            "CountryCode": values[4].value
-                        }
-                        matches.append(geo_data)
-                        print(f"Found match: {geo_data['Name']} ({geo_data['Type']}) - ID: {geo_data['Id']}")
-                    except Exception as e:
-                        print(f"⚠️ Error processing row: {e}")
-                        continue
-                
-                # Filter by country - prioritize India (IN) and US locations
-                india_matches = [m for m in matches if m["CountryCode"] == "IN"]
-                us_matches = [m for m in matches if m["CountryCode"] == "US"]
-                
-                preferred_matches = india_matches if india_matches else (us_matches if us_matches else matches)
-                
-                # If state/region is specified and we have multiple matches, try to disambiguate
-                if specified_state and len(preferred_matches) > 1:
-                    final_match = disambiguate_by_parent_region(client, preferred_matches, specified_state)
-                    if final_match:
-                        print(f"✅ Found as {geo_type} with state disambiguation: {final_match['Name']}, {final_match['CountryCode']}, ID: {final_match['Id']}")
-                        return final_match["Id"]
-                
-                # Handle multiple matches without state specification
-                if len(preferred_matches) > 1:
-                    # Add parent region info to matches for better display
-                    enhanced_matches = []
-                    for match in preferred_matches:
-                        parent_info = get_parent_region_info(client, match["Id"])
-                        enhanced_match = match.copy()
-                        enhanced_match['ParentRegion'] = parent_info
-                        enhanced_matches.append(enhanced_match)
-                    
-                    # Check if this requires CSM confirmation (more than 2 matches or ambiguous locations)
-                    requires_csm = len(preferred_matches) > 2 or is_ambiguous_location(base_location)
-                    
-                    if requires_csm:
-                            # For multiple matches, show PROMINENT warning but proceed with first match
-                        print("\n" + "="*80)
-                        print("🚨 MULTIPLE GEO LOCATIONS FOUND - USING FIRST MATCH 🚨")
-                        print("="*80)
-                        print(f"📍 Location '{base_location}' has multiple matches")
-                        print(f"✅ Using first match: {enhanced_matches[0]['Name']} ({enhanced_matches[0]['ParentRegion']})")
-                        print("="*80 + "\n")
-                    else:
-                        # For 2 matches, show PROMINENT warning but proceed with first match
-                        print("\n" + "="*80)
-                        print("🚨 AUTOMATION ALERT: MULTIPLE GEO LOCATIONS DETECTED 🚨")
-                        print("="*80)
-                        print(f"📍 SEARCHING FOR: '{base_location}'")
-                        print(f"🔍 FOUND {len(enhanced_matches)} MATCHING LOCATIONS:")
-                        print("-" * 60)
-                        
-                        for i, match in enumerate(enhanced_matches):
-                            marker = "👉 SELECTED" if i == 0 else "   Available"
-                            print(f"{marker}: {match['Name']}, {match['ParentRegion']}, {match['CountryCode']} (ID: {match['Id']})")
-                        
-                        print("-" * 60)
-                        final_match = preferred_matches[0]
-                        parent_info = enhanced_matches[0]['ParentRegion']
-                        
-                        print(f"⚡ AUTOMATION DECISION: Selected '{final_match['Name']}, {parent_info}'")
-                        print(f"📋 REASON: First match from available options")
-                        print(f"⚠️  WARNING: Other locations with same name exist!")
-                        print()
-                        print("💡 TO AVOID THIS IN FUTURE:")
-                        print(f"   Use specific format: '{base_location}, State/Region'")
-                        print(f"   Examples: 'Aurangabad, Maharashtra' or 'Aurangabad, Bihar'")
-                        print()
-                        print("📞 NEED DIFFERENT LOCATION?")
-                        print("   Contact your CSM to change the geo targeting")
-                        print("="*80)
-                        print("🎯 PROCEEDING WITH LINE CREATION...")
-                        print("="*80 + "\n")
-                        
-                        # Print the automatic selection for audit trail
-                        print(f"✅ Auto-selected: {final_match['Name']} ({parent_info})")
-                else:
-                    final_match = preferred_matches[0]
-                
-                print(f"✅ Found as {geo_type}: {final_match['Name']}, {final_match['CountryCode']}, ID: {final_match['Id']}")
-                return final_match["Id"]
-                
+            # Query to get parent IDs for all pending geos
+            parent_ids_by_geo = {}
+            parent_query = f"""
+            SELECT Id, ParentIds
+            FROM Geo_Target 
+            WHERE Id IN ({', '.join(pending)})
+            """
+            response = pql_service.select({'query': parent_query})
+            if 'rows' in response and response['rows']:
+                for row in response['rows']:
+                    geo_id = str(unwrap_pql_value(row["values"][0]))
+                    parent_ids = unwrap_pql_value(row["values"][1]) or []
+                    if parent_ids:
+                        # Last parent is usually the most specific (state/region)
+                        parent_ids_by_geo[geo_id] = str(parent_ids[-1])
+            
+            # Query to get all parent names in one go
+            parent_names = {}
+            parent_id_list = list(dict.fromkeys(parent_ids_by_geo.values()))
+            if parent_id_list:
+                parent_info_query = f"""
+                SELECT Id, Name
+                FROM Geo_Target 
+                WHERE Id IN ({', '.join(parent_id_list)})
+                """
+                parent_response = pql_service.select({'query': parent_info_query})
+                if 'rows' in parent_response and parent_response['rows']:
+                    for row in parent_response['rows']:
+                        parent_names[str(unwrap_pql_value(row["values"][0]))] = unwrap_pql_value(row["values"][1])
+            
+            for geo_id, parent_id in parent_ids_by_geo.items():
+                if parent_id in parent_names:
+                    fetched[geo_id] = parent_names[parent_id]
+            _store_parent_regions(fetched)
         except Exception as e:
-            print(f"⚠️ Error searching as {geo_type}: {e}")
-            continue
+            print(f"⚠️ Error getting parent region info: {e}")
+        parent_regions.update(fetched)
 
-    print(f"❌ No matching location found at any level for: {location_name}")
-    raise LocationNotFoundError(location_name)
+    return parent_regions
 
 
 def get_parent_region_info(client, geo_id):
     """Get parent region information for a geo location"""
-    try:
-        pql_service = client.GetService("PublisherQueryLanguageService", version="v202508")
-        
-        # Query to get parent region information
-        parent_query = f"""
-        SELECT ParentIds, Name, Type
-        FROM Geo_Target 
-        WHERE Id = {geo_id}
-        """
-        
-        statement = {'query': parent_query}
-        response = pql_service.select(statement)
-        
-        if 'rows' in response and response['rows']:
-            values = response['rows'][0]["values"]
-            parent_ids = values[0]["value"] if values[0]["value"] else []
-            
-            if parent_ids:
-                # Get the immediate parent (usually state/region)
-                parent_id = parent_ids[-1]  # Last parent is usually the most specific
-                
-                parent_info_query = f"""
-                SELECT Name, Type
-                FROM Geo_Target 
-                WHERE Id = {parent_id}
-                """
-                
-                parent_statement = {'query': parent_info_query}
-                parent_response = pql_service.select(parent_statement)
-                
-                if 'rows' in parent_response and parent_response['rows']:
-                    parent_values = parent_response['rows'][0]["values"]
-                    parent_name = parent_values[0]["value"]
-                    return parent_name
-        
-        return "Unknown Region"
-        
-    except Exception as e:
-        print(f"⚠️ Error getting parent region info: {e}")
-        return "Unknown Region"
+    return hydrate_parent_regions(client, [geo_id]).get(str(geo_id), "Unknown Region")
 
 
 def is_ambiguous_location(location_name):
     """
     Check if a location name is known to be ambiguous (has multiple common instances)
     """
-    # List of commonly ambiguous location names in India
-    ambiguous_locations = {
-        'aurangabad', 'salem', 'bangalore', 'mysore', 'hassan', 'mandya', 
-        'tumkur', 'shimoga', 'bellary', 'gulbarga', 'bijapur', 'raichur',
-        'chitradurga', 'davangere', 'bagalkot', 'haveri', 'gadag', 'koppal',
-        'yadgir', 'kolar', 'chikkaballapur', 'ramanagara', 'chamarajanagar',
-        'kodagu', 'udupi', 'chikkamagaluru', 'shivamogga', 'vijayapura',
-        'kalburgi', 'ballari', 'nellore', 'kadapa', 'kurnool', 'anantapur',
-        'chittoor', 'tirupati', 'vizianagaram', 'srikakulam', 'guntur',
-        'krishna', 'west godavari', 'east godavari', 'warangal', 'khammam',
-        'nalgonda', 'mahbubnagar', 'rangareddy', 'medak', 'nizamabad',
-        'adilabad', 'karimnagar', 'hyderabad', 'secunderabad'
-    }
-    
-    return location_name.lower().strip() in ambiguous_locations
+    return get_state_index().is_ambiguous(location_name)
 
 
 def disambiguate_by_parent_region(client, matches, specified_state):
     """
-    Disambiguate multiple location matches by checking their parent regions
+    Disambiguate multiple location matches by checking their parent regions.
+    Matches known to the offline mirror are checked by parent ID against the
+    compiled state index; the rest fall back to comparing parent region names.
     """
     try:
+        state_index = get_state_index()
+        state_parent_ids = state_index.state_parent_ids(specified_state)
+        unmatched = []
+        
         for match in matches:
-            parent_info = get_parent_region_info(client, match["Id"])
+            geo = get_geo_target(match["Id"]) if state_parent_ids else None
+            if geo is None:
+                unmatched.append(match)
+                continue
+            if state_parent_ids.intersection(str(parent_id) for parent_id in geo.get("ParentIds") or []):
+                return match
+        
+        if not unmatched:
+            return None
+        
+        parent_regions = hydrate_parent_regions(client, [match["Id"] for match in unmatched])
+        specified_lower = specified_state.lower()
+        canonical_state = state_index.canonical_state(specified_state)
+        for match in unmatched:
+            parent_info = parent_regions.get(str(match["Id"]), "Unknown Region")
             
             # Check if the parent region matches the specified state
-            if parent_info and specified_state.lower() in parent_info.lower():
+            if parent_info and specified_lower in parent_info.lower():
                 return match
             
             # Also check direct match with common state name variations
-            state_variations = {
-                'maharashtra': ['maharashtra', 'mh'],
-                'bihar': ['bihar', 'br'],
-                'uttar pradesh': ['uttar pradesh', 'up'],
-                'west bengal': ['west bengal', 'wb'],
-                'tamil nadu': ['tamil nadu', 'tn'],
-                'karnataka': ['karnataka', 'ka'],
-                'gujarat': ['gujarat', 'gj'],
-                'rajasthan': ['rajasthan', 'rj'],
-                'andhra pradesh': ['andhra pradesh', 'ap'],
-                'telangana': ['telangana', 'ts'],
-                'kerala': ['kerala', 'kl'],
-                'odisha': ['odisha', 'or'],
-                'punjab': ['punjab', 'pb'],
-                'haryana': ['haryana', 'hr'],
-                'himachal pradesh': ['himachal pradesh', 'hp'],
-                'uttarakhand': ['uttarakhand', 'uk'],
-                'jharkhand': ['jharkhand', 'jh'],
-                'chhattisgarh': ['chhattisgarh', 'cg'],
-                'madhya pradesh': ['madhya pradesh', 'mp'],
-                'assam': ['assam', 'as'],
-                'meghalaya': ['meghalaya', 'ml'],
-                'manipur': ['manipur', 'mn'],
-                'mizoram': ['mizoram', 'mz'],
-                'nagaland': ['nagaland', 'nl'],
-                'tripura': ['tripura', 'tr'],
-                'arunachal pradesh': ['arunachal pradesh', 'ar'],
-                'sikkim': ['sikkim', 'sk'],
-                'goa': ['goa', 'ga']
-            }
-            
-            specified_lower = specified_state.lower()
-            for full_name, variations in state_variations.items():
-                if specified_lower in variations:
-                    if full_name in parent_info.lower():
-                        return match
+            if canonical_state and canonical_state in parent_info.lower():
+                return match
         
         return None
         
@@ -508,15 +727,17 @@ def show_geo_selection_summary(auto_selections):
 
 
 def fetch_images_and_presets(folder_path, available_presets, presets_dict):
-    image_files = glob.glob(os.path.join(folder_path, "*.*"))
+    assets = [asset for asset in get_asset_manifest(folder_path).assets if asset.extension]
+    image_files = [asset.path for asset in assets]
     detected_presets = {}
     image_size_map = {}  # Map to track images for each size
     
     # First, identify all valid images and their sizes
-    for image_path in image_files:
-        filename = os.path.basename(image_path)
+    for asset in assets:
+        filename = asset.name
+        image_path = asset.path
         for preset in available_presets:
-            if preset.lower() in filename.lower() and preset in presets_dict:
+            if preset.lower() in asset.sizes and preset in presets_dict:
                 if preset not in image_size_map:
                     image_size_map[preset] = []
                 image_size_map[preset].append(image_path)
@@ -541,326 +762,11 @@ def detect_line_type(line_name):
     else:
         return "standard"
 
-def read_tag_file():
-    """
-    Reads a tag file (Excel format) that contains creative dimensions and their corresponding JavaScript tags.
-    
-    This function looks for files with names like 'tag.xlsx', 'tags.xlsx', 'tag.xls', or 'tags.xls'
-    in both the current directory and the 'creatives' directory. If a file is found but can't be read,
-    it falls back to creating a simulated tag dictionary.
-    
-    The function now supports:
-    1. JavaScript tags (traditional script tags)
-    2. Impression/click tag combinations
-    3. DoubleClick tags (DCM tags with <ins> elements)
-    
-    Returns:
-        dict: A dictionary mapping dimension strings to their corresponding JavaScript tags,
-              or None if no valid tag file is found or an error occurs.
-    """
-    try:
-        # Get the current directory where the script is running
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        creatives_dir = os.path.join(current_dir, "creatives")
-        
-        # Define possible tag file names
-        tag_file_patterns = ['tag.xlsx', 'tags.xlsx', 'tag.xls', 'tags.xls', 'TOI Tags (2).xlsx', 'TOI Tags (2).xls']
-        
-        # First, try to find a real tag file
-        real_tag_file = None
-        real_tag_dir = None
-        
-        for directory in [current_dir, creatives_dir]:
-            if not os.path.exists(directory):
-                continue
-                
-            print(f"Checking directory for tag files: {directory}")
-            for file in os.listdir(directory):
-                file_lower = file.lower()
-                if any(pattern.lower() in file_lower for pattern in tag_file_patterns):
-                    real_tag_file = file
-                    real_tag_dir = directory
-                    print(f"Found potential tag file: {os.path.join(real_tag_dir, real_tag_file)}")
-                    break
-            
-            if real_tag_file:
-                break
-                
-        # If we found a real tag file, try to read it
-        if real_tag_file:
-            tag_file_path = os.path.join(real_tag_dir, real_tag_file)
-            print(f"Attempting to read tag file at: {tag_file_path}")
-            
-            try:
-                # For xlsx files, try pandas
-                import pandas as pd
-                
-                def read_excel_with_sheet_selection(file_path, engine=None):
-                    """Helper function to read Excel file with preference for 'tags' sheet"""
-                    try:
-                        # Try to read sheet names first
-                        if engine:
-                            excel_file = pd.ExcelFile(file_path, engine=engine)
-                        else:
-                            excel_file = pd.ExcelFile(file_path)
-                        
-                        sheet_names = excel_file.sheet_names
-                        print(f"Available sheets: {sheet_names}")
-                        
-                        # Check for 'tags' sheet (case insensitive)
-                        target_sheet = None
-                        for sheet_name in sheet_names:
-                            if sheet_name.lower() == 'tags':
-                                target_sheet = sheet_name
-                                print(f"Found 'tags' sheet: {target_sheet}")
-                                break
-                        
-                        # If no 'tags' sheet found, use the first sheet
-                        if target_sheet is None:
-                            target_sheet = sheet_names[0]
-                            print(f"No 'tags' sheet found, using first sheet: {target_sheet}")
-                        
-                        # Read the selected sheet
-                        if engine:
-                            df = pd.read_excel(file_path, sheet_name=target_sheet, engine=engine)
-                        else:
-                            df = pd.read_excel(file_path, sheet_name=target_sheet)
-                        
-                        return df
-                    except Exception as e:
-                        print(f"Error reading Excel file with sheet selection: {e}")
-                        # Fallback to default behavior
-                        if engine:
-                            return pd.read_excel(file_path, engine=engine)
-                        else:
-                            return pd.read_excel(file_path)
-                
-                if tag_file_path.lower().endswith('.xlsx'):
-                    df = read_excel_with_sheet_selection(tag_file_path)
-                else:  # For xls files
-                    try:
-                        df = read_excel_with_sheet_selection(tag_file_path, engine='xlrd')
-                    except:
-                        try:
-                            df = read_excel_with_sheet_selection(tag_file_path, engine='openpyxl')
-                        except:
-                            raise Exception(f"Failed to read {tag_file_path} with any Excel engine")
-                
-                print("\nDataFrame Info:")
-                print(df.info())
-                
-                # Create a dictionary to store dimensions and their corresponding tags
-                tag_dict = {}
-                
-                # Find column names for dimensions, JavaScript tags, Impression Tags and Click Tags
-                dimension_col = None
-                tag_col = None
-                impression_tag_col = None
-                click_tag_col = None
-                
-                print(f"Available columns: {list(df.columns)}")
-                
-                # Look for exact column names first
-                for col in df.columns:
-                    col_str = str(col).lower()
-                    if col_str == 'dimensions' or col_str == 'placementname':
-                        dimension_col = col
-                        print(f"Using exact match '{col}' as dimension column")
-                    elif col_str == 'javascript tag' or col_str == 'js_https':
-                        tag_col = col
-                        print(f"Using exact match '{col}' as tag column")
-                    elif col_str == 'impression tag (image)' or col_str == 'impression tag':
-                        impression_tag_col = col
-                        print(f"Using exact match '{col}' as impression tag column")
-                    elif col_str == 'click tag':
-                        click_tag_col = col
-                        print(f"Using exact match '{col}' as click tag column")
-                        
-                
-                # If needed, look for partial matches
-                if not dimension_col:
-                    for col in df.columns:
-                        col_str = str(col).lower()
-                        if 'dimension' in col_str or 'size' in col_str or 'placement' in col_str:
-                            dimension_col = col
-                            print(f"Using partial match '{col}' as dimension column")
-                            break
-                
-                if not tag_col:
-                    for col in df.columns:
-                        col_str = str(col).lower()
-                        if ('javascript' in col_str and 'tag' in col_str) or 'script' in col_str or 'js_' in col_str:
-                            tag_col = col
-                            print(f"Using partial match '{col}' as tag column")
-                            break
-                
-                if not impression_tag_col:
-                    for col in df.columns:
-                        col_str = str(col).lower()
-                        if 'impression' in col_str and 'tag' in col_str:
-                            impression_tag_col = col
-                            print(f"Using partial match '{col}' as impression tag column")
-                            break
-                
-                if not click_tag_col:
-                    for col in df.columns:
-                        col_str = str(col).lower()
-                        if 'click' in col_str and 'tag' in col_str:
-                            click_tag_col = col
-                            print(f"Using partial match '{col}' as click tag column")
-                            break
-                
-                # Final attempt to find tag column
-                if dimension_col and not tag_col and not (impression_tag_col and click_tag_col):
-                    for col in df.columns:
-                        col_str = str(col).lower()
-                        if 'tag' in col_str:
-                            tag_col = col
-                            print(f"Using fallback '{col}' as tag column")
-                            break
-                
-                has_columns = dimension_col and (tag_col or (impression_tag_col and click_tag_col))
-                
-                if has_columns:
-                    # Process the dataframe
-                    for index, row in df.iterrows():
-                        if pd.notnull(row[dimension_col]):
-                            dimension = str(row[dimension_col]).strip()
-                            
-                            # Check for Impression Tag and Click Tag first (new priority)
-                            if impression_tag_col and click_tag_col and pd.notnull(row[impression_tag_col]) and pd.notnull(row[click_tag_col]):
-                                impression_tag = str(row[impression_tag_col]).strip()
-                                click_tag = str(row[click_tag_col]).strip()
-                                
-                                # Skip empty entries
-                                if not dimension or not impression_tag or not click_tag:
-                                    continue
-                                
-                                # Clean up dimension string to ensure format like "300x250"
-                                if 'x' in dimension:
-                                    dimension_match = re.search(r'(\d+x\d+)', dimension)
-                                    if dimension_match:
-                                        dimension = dimension_match.group(1)
-                                
-                                # Store both tags in a dictionary
-                                tag_dict[dimension] = {
-                                    'type': 'impression_click',
-                                    'impression_tag': impression_tag,
-                                    'click_tag': click_tag
-                                }
-                                print(f"Added impression/click tags for dimension: {dimension}")
-                            
-                            # Fallback to JavaScript tag if impression/click tags not found
-                            elif tag_col and pd.notnull(row[tag_col]):
-                                js_tag = str(row[tag_col]).strip()
-                                
-                                # Skip empty entries
-                                if not dimension or not js_tag:
-                                    continue
-                                    
-                                # Clean up dimension string to ensure format like "300x250"
-                                if 'x' in dimension:
-                                    dimension_match = re.search(r'(\d+x\d+)', dimension)
-                                    if dimension_match:
-                                        dimension = dimension_match.group(1)
-                                
-                                # Handle <noscript> tags with <a> href, common in Flashtalking tags
-                                if '<noscript>' in js_tag.lower() and '<a href' in js_tag.lower():
-                                    print(f"Detected noscript/a href tag for dimension: {dimension}")
-                                    href_pattern = r'(<a\s+[^>]*?href=")([^"]*)"'
-                                    
-                                    # Prepend click macro if not already present
-                                    if '%%CLICK_URL_UNESC%%' not in js_tag:
-                                        replacement = r'\1%%CLICK_URL_UNESC%%\2"'
-                                        modified_tag = re.sub(href_pattern, replacement, js_tag, flags=re.IGNORECASE)
-                                        
-                                        if modified_tag != js_tag:
-                                            js_tag = modified_tag
-                                            print(f"Added %%CLICK_URL_UNESC%% to href in noscript tag for dimension: {dimension}")
-                                        else:
-                                            print(f"Warning: Could not add %%CLICK_URL_UNESC%% to href for dimension: {dimension}")
-                                    else:
-                                        print(f"Click macro already present for dimension: {dimension}")
-
-                                # Check if this is a DoubleClick tag (contains dcmads or data-dcm attributes)
-                                is_doubleclick = False
-                                if ('dcmads' in js_tag.lower() or 'data-dcm' in js_tag.lower()) and ('<ins' in js_tag.lower() or '<div' in js_tag.lower()):
-                                    is_doubleclick = True
-                                    print(f"Detected DoubleClick tag for dimension: {dimension}")
-                                    
-                                    # Ensure data-dcm-click-tracker is present in the DoubleClick tag
-                                    if 'data-dcm-click-tracker' not in js_tag:
-                                        try:
-                                            # Add data-dcm-click-tracker attribute before the class attribute
-                                            tag_pattern = r'(<ins|<div)([^>]*?)(\s+class=)'
-                                            replacement = r"\1\2 data-dcm-click-tracker='%%CLICK_URL_UNESC%%'\3"
-                                            modified_tag = re.sub(tag_pattern, replacement, js_tag, flags=re.IGNORECASE)
-                                            
-                                            # If that didn't work, try adding it after the opening tag
-                                            if modified_tag == js_tag:
-                                                tag_pattern = r'(<ins|<div)(\s)'
-                                                replacement = r"\1 data-dcm-click-tracker='%%CLICK_URL_UNESC%%'\2"
-                                                modified_tag = re.sub(tag_pattern, replacement, js_tag, flags=re.IGNORECASE)
-                                            
-                                            js_tag = modified_tag
-                                            print(f"Added data-dcm-click-tracker attribute to DoubleClick tag for dimension: {dimension}")
-                                        except Exception as e:
-                                            print(f"Warning: Could not add data-dcm-click-tracker to tag: {str(e)}")
-                                
-                                # Only add if tag is substantial
-                                if 'x' in dimension and len(js_tag.strip()) > 10:
-                                    # Check if this dimension already exists in the dictionary
-                                    if dimension in tag_dict:
-                                        # It's a duplicate, so append a counter
-                                        counter = 1
-                                        while f"{dimension}_{counter}" in tag_dict:
-                                            counter += 1
-                                        dimension_key = f"{dimension}_{counter}"
-                                        print(f"Found duplicate dimension {dimension}, using key {dimension_key}")
-                                    else:
-                                        dimension_key = dimension
-                                    
-                                    if is_doubleclick:
-                                        tag_dict[dimension_key] = {
-                                            'type': 'doubleclick',
-                                            'js_tag': js_tag
-                                        }
-                                        print(f"Added DoubleClick tag for dimension: {dimension}")
-                                    else:
-                                        tag_dict[dimension_key] = {
-                                            'type': 'javascript',
-                                            'js_tag': js_tag
-                                        }
-                                        print(f"Added JavaScript tag for dimension: {dimension}")
-                    
-                    if tag_dict:
-                        print(f"Successfully read {len(tag_dict)} tags from {real_tag_file}")
-                        return tag_dict
-                    else:
-                        print(f"No valid tag entries found in {real_tag_file}")
-                else:
-                    print(f"Couldn't find required columns in {real_tag_file}. Found columns: {list(df.columns)}")
-                    print("Looking for columns named 'Dimensions' or 'PlacementName' and either 'JavaScript Tag' or 'js_https'")
-            
-            except Exception as e:
-                print(f"Error reading file {real_tag_file}: {str(e)}")
-                traceback.print_exc()
-        
-        # If we didn't find or couldn't read a real tag file, fall back to simulated dictionary
-        print("No valid tag file found. Not creating simulated tags.")
-        return None
-        
-    except Exception as e:
-        print(f"Error in read_tag_file: {str(e)}")
-        print(f"Error type: {type(e)}")
-        traceback.print_exc()
-        return None
-
 def check_line_item_name_exists(client, order_id, line_name_base):
     """Check if a line item with similar name already exists in the order or globally"""
     try:
         line_item_service = client.GetService('LineItemService', version='v202508')
-        pql_service = client.GetService('PublisherQueryLanguageService', version='v202508')
+        pql_service = cached_pql_service(client)
         
         print(f"🔍 Checking for duplicates of line name: {line_name_base}")
         print(f"🔍 Line name length: {len(line_name_base)} characters")
@@ -924,17 +830,234 @@ def check_line_item_name_exists(client, order_id, line_name_base):
         print(f"✅ No existing line items found with exact or similar name: {line_name_base}")
         return False
         
-    except Exception as e:
-        print(f"⚠️ Error checking for existing line item names: {e}")
-        print(f"⚠️ Error type: {type(e).__name__}")
-        print(f"⚠️ Will continue with creation but may encounter DUPLICATE_OBJECT error")
-        return False  # Continue with creation if check fails
+    except Exception as e:
+        print(f"⚠️ Error checking for existing line item names: {e}")
+        print(f"⚠️ Error type: {type(e).__name__}")
+        print(f"⚠️ Will continue with creation but may encounter DUPLICATE_OBJECT error")
+        return False  # Continue with creation if check fails
+
+
+
+
+
+def build_creative_placeholders(placement_data, line_type, In_Banner_video=None):
+    """
+    Build the creative placeholders and matching creative targetings for placement_data.
+
+    Returns:
+        tuple: (creative_placeholders, creative_targetings) for the line item payload
+    """
+    creative_placeholders = []
+    creative_targetings = []
+    
+    # Create placeholders and targetings only for sizes that have placement IDs
+    for base_size, group_info in placement_data.items():
+        if group_info.get('placement_ids'):  # Only create if there are placement IDs
+            # Get the original sizes for this placement group
+            original_sizes = group_info.get('original_sizes', [base_size])
+            
+            # Create creative placeholders and targetings for each original size
+            for original_size in original_sizes:
+                # Create a descriptive targeting name for display
+                if original_size == "320x100":
+                    targeting_display_name = "Mweb_PPD"
+                elif original_size == "300x250" and line_type == "richmedia":
+                    targeting_display_name = "Mrec_ex"
+                elif original_size == "300x600" and line_type == "richmedia":
+                    targeting_display_name = "Tower_ex"
+                else:
+                    targeting_display_name = original_size
+                
+                creative_placeholders.append({
+                    'targetingName': targeting_display_name,
+                    'size': {
+                        'width': int(original_size.split('x')[0]),
+                        'height': int(original_size.split('x')[1])
+                    }
+                })
+                print(f"✅ Added creative placeholder for original size {original_size} with targeting name {targeting_display_name}")
+                
+                # Create matching targeting for this original size using placements or ad units
+                if group_info.get('targeting_type') == 'ad_slot_id':
+                    targeted_ad_units = [
+                        {
+                            'adUnitId': pid,
+                            'includeDescendants': True
+                        } for pid in group_info['placement_ids']
+                    ]
+                    targeting_inventory = {
+                        'targetedAdUnits': targeted_ad_units
+                    }
+                else:
+                    targeting_inventory = {
+                        'targetedPlacementIds': group_info['placement_ids']
+                    }
+                targeting_dict = {
+                    'name': targeting_display_name,
+                    'targeting': {
+                        'inventoryTargeting': targeting_inventory,
+                    }
+                }
+                creative_targetings.append(targeting_dict)
+                # Check if this is a PSBK line using Ad slot IDs
+                targeting_type = group_info.get('targeting_type', 'placement_id')
+                if targeting_type == 'ad_slot_id':
+                    print(f"✅ Added creative targeting '{targeting_display_name}' for original size {original_size} using Ad slot IDs from {base_size}")
+                    print(f"🔧 PSBK line: Using Ad slot IDs instead of Placement IDs")
+                else:
+                    print(f"✅ Added creative targeting '{targeting_display_name}' for original size {original_size} using placement IDs from {base_size}")
+                print(f"🔍 Creative targeting type: {type(targeting_dict)}, placement_ids type: {type(group_info['placement_ids'])}")
+        else:
+            print(f"⚠️ Skipping {base_size} - no placement IDs found")
+
+    # Add special targeting for In-Banner Video if needed
+    if In_Banner_video and '300x250' not in placement_data:
+        creative_placeholders.append({
+            'size': {
+                'width': 300,
+                'height': 250
+            }
+        })
+        print("➕ Added targeting for In-Banner Video 300x250")
+
+    # Add additional sizes for special cases
+    if '1260x570' in placement_data and placement_data['1260x570'].get('placement_ids'):
+        additional_sizes = ['728x500', '1320x570']
+        for size in additional_sizes:
+            creative_placeholders.append({
+                'size': {
+                    'width': int(size.split('x')[0]),
+                    'height': int(size.split('x')[1])
+                }
+            })
+        print(f"➕ Added additional sizes {additional_sizes} because 1260x570 was present")
+
+    if '980x200' in placement_data and placement_data['980x200'].get('placement_ids') and '728x90' not in placement_data:
+        creative_placeholders.append({
+            'size': {
+                'width': 728,
+                'height': 90
+            }
+        })
+        print("➕ Added additional size 728x90 because 980x200 was present")
+
+    # Add 320x50 override for 320x100 (similar to 728x90 for 980x200)
+    # Check if 320x100 exists in any placement data and 320x50 doesn't exist as its own entry
+    print(f"🔍 Debugging placement_data.values():")
+    print(f"  - placement_data type: {type(placement_data)}")
+    print(f"  - placement_data keys: {list(placement_data.keys()) if isinstance(placement_data, dict) else 'Not a dict'}")
+    
+    has_320x100 = False
+    has_explicit_320x50 = False
+    
+    try:
+        for key, data in placement_data.items():
+            print(f"  - Key: {key}, Data type: {type(data)}, Data: {data}")
+            if isinstance(data, dict):
+                original_sizes = data.get('original_sizes', [])
+                if '320x100' in original_sizes:
+                    has_320x100 = True
+                if '320x50' in original_sizes:
+                    has_explicit_320x50 = True
+            else:
+                print(f"  - WARNING: Expected dict but got {type(data)} for key {key}")
+    except Exception as e:
+        print(f"  - ERROR in placement_data iteration: {e}")
+        print(f"  - placement_data content: {placement_data}")
+        # Fallback to original logic with error handling
+        has_320x100 = any(
+            isinstance(data, dict) and '320x100' in data.get('original_sizes', []) 
+            for data in placement_data.values()
+        )
+        has_explicit_320x50 = any(
+            isinstance(data, dict) and '320x50' in data.get('original_sizes', []) 
+            for data in placement_data.values()
+        )
+    
+    if has_320x100 and not has_explicit_320x50:
+        # Add 320x50 creative placeholder (exactly like 728x90 for 980x200)
+        # NO targetingName and NO creative targeting - this allows any 320x50 creative to serve
+        creative_placeholders.append({
+            'size': {
+                'width': 320,
+                'height': 50
+            }
+        })
+        print("➕ Added additional size 320x50 because 320x100 was present")
+
+
+
+    if '600x250' in placement_data and placement_data['600x250'].get('placement_ids'):
+        creative_placeholders.append({
+            'targetingName': 'Mrec Expando',
+            'size': {'width': 300, 'height': 250}
+        })
+        
+        targeting_dict = {
+            'name': 'Mrec Expando',
+            'targeting': {
+                'inventoryTargeting': {
+                    'targetedPlacementIds': placement_data['600x250']['placement_ids'],
+                },
+            }
+        }
+        creative_targetings.append(targeting_dict)
+        print(f"🔍 Added Mrec Expando targeting, type: {type(targeting_dict)}")
+
+    return creative_placeholders, creative_targetings
 
 
+def build_line_targeting(placement_data, all_placement_ids, geo_targeting_ids, excluded_geo_ids):
+    """Build the line item targeting: placements (or PSBK ad units) plus geo targeting and exclusions"""
+    # Check if we're using Ad slot IDs for PSBK lines
+    targeting_type = "placement_id"  # default
+    for size_data in placement_data.values():
+        if isinstance(size_data, dict) and size_data.get('targeting_type') == 'ad_slot_id':
+            targeting_type = 'ad_slot_id'
+            break
+    
+    # Prepare targeting configuration
+    if targeting_type == 'ad_slot_id':
+        targeting_config = {
+            'inventoryTargeting': {
+                'targetedAdUnits': [
+                    {
+                        'adUnitId': pid,
+                        'includeDescendants': True
+                    } for pid in all_placement_ids
+                ]
+            }
+        }
+    else:
+        targeting_config = {
+            'inventoryTargeting': {
+                'targetedPlacementIds': all_placement_ids
+            }
+        }
+    
+    # Log the targeting type being used
+    if targeting_type == 'ad_slot_id':
+        print(f"🔧 PSBK line: Using Ad slot IDs for inventory targeting")
+        print(f"📊 Total Ad slot IDs: {len(all_placement_ids)}")
+    else:
+        print(f"📊 Total Placement IDs: {len(all_placement_ids)}")
+    
+    # Add geo targeting if we have valid locations
+    if geo_targeting_ids:
+        print(f"✅ Adding geo targeting with {len(geo_targeting_ids)} locations")
+        targeting_config['geoTargeting'] = {
+            'targetedLocations': [{'id': geo_id} for geo_id in geo_targeting_ids]
+        }
+        if excluded_geo_ids:
+            print(f"✅ Adding {len(excluded_geo_ids)} excluded locations")
+            targeting_config['geoTargeting']['excludedLocations'] = [{'id': geo_id} for geo_id in excluded_geo_ids]
+    else:
+        print("⚠️ No geo targeting IDs found, skipping geo targeting configuration")
 
+    return targeting_config
 
 
-def single_line(client, order_id, line_item_data, line_name):
+def single_line(client, order_id, line_item_data, line_name, creative_library=None):
     # Debug: Check what line type we received
     print(f"🔍 DEBUG: single_line received line_type: {line_item_data.get('line_type', 'NOT_SET')}")
     # Generate session ID for this line creation
@@ -1142,36 +1265,31 @@ def single_line(client, order_id, line_item_data, line_name):
         # Validate we have locations to process
         if not geo_targeting_input:
             print("⚠️ No valid geo targeting locations found to process")
+        try:
+            resolved_geos = resolve_geos(client, geo_targeting_input, skip_missing=True)
+        except MultipleGeoLocationsError as e:
+            print("\n" + "="*80)
+            print("🚨 CRITICAL ALERT: MULTIPLE GEO LOCATIONS FOUND 🚨")
+            print("="*80)
+            print(f"📍 LOCATION: '{e.location_name}' has multiple matches")
+            print("⚠️  CSM CONFIRMATION REQUIRED!")
+            print()
+            print(str(e))
+            print()
+            print("🛑 LINE CREATION PAUSED - AWAITING CSM CONFIRMATION")
+            print("📞 Please contact your Campaign Success Manager immediately")
+            print("="*80 + "\n")
+            
+            # For backward compatibility, treat as unresolved so process can continue
+            # In production, this should trigger a workflow pause
+            resolved_geos = {}
         for city in geo_targeting_input:
-            try:
-                print(f"🔍 Looking up geo ID for location: {city}")
-                geo_id = get_geo_id(client, city)
-                if geo_id:
-                    print(f"✅ Found geo ID {geo_id} for location: {city}")
-                    geo_targeting_ids.append(geo_id)
-                    print(f"✅ Found geo ID {geo_id} for location: {city}")
-                    geo_targeting_ids.append(geo_id)
-                else:
-                    print(f"❌ No geo ID found for location: {city}")
-                    invalid_locations.append(city)
-            except LocationNotFoundError as e:
-                print(f"⚠️ Location error: {e}")
-                invalid_locations.append(city)
-            except MultipleGeoLocationsError as e:
-                print("\n" + "="*80)
-                print("🚨 CRITICAL ALERT: MULTIPLE GEO LOCATIONS FOUND 🚨")
-                print("="*80)
-                print(f"📍 LOCATION: '{city}' has multiple matches")
-                print("⚠️  CSM CONFIRMATION REQUIRED!")
-                print()
-                print(str(e))
-                print()
-                print("🛑 LINE CREATION PAUSED - AWAITING CSM CONFIRMATION")
-                print("📞 Please contact your Campaign Success Manager immediately")
-                print("="*80 + "\n")
-                
-                # For backward compatibility, add to invalid locations so process can continue
-                # In production, this should trigger a workflow pause
+            geo_id = resolved_geos.get(city)
+            if geo_id:
+                print(f"✅ Found geo ID {geo_id} for location: {city}")
+                geo_targeting_ids.append(geo_id)
+            else:
+                print(f"❌ No geo ID found for location: {city}")
                 invalid_locations.append(city)
         
         if not geo_targeting_ids:
@@ -1336,396 +1454,194 @@ def single_line(client, order_id, line_item_data, line_name):
         site_filter = [site_filter]
 
     print("\n🔍 Input values:")
-    print(f"Site filter: {site_filter}")
-    print(f"Platforms: {line_item_data['platforms']}")
-
-    # Normalize platforms to uppercase for consistent matching
-    normalized_platforms = [p.strip().upper() for p in line_item_data['platforms']]
-    print(f"Normalized platforms: {normalized_platforms}")
-
-    if 'ALL_Languages' in site_filter:
-        site_filter = [site for site in site_filter if site != 'ALL_Languages']
-        site_filter.extend(['IAG', 'ITBANGLA', 'MS', 'MT', 'NBT', 'TLG', 'TML', 'VK'])
-        site_filter = list(dict.fromkeys(site_filter))
-        print(f"Expanded ALL_Languages to: {site_filter}")
-
-    contains_toi = any(site in ['TOI', 'ETIMES'] for site in site_filter)
-    contains_et = any(site == 'ET' for site in site_filter)
-    
-    # Log placement targeting configuration
-    logger.log_placement_targeting({
-        'site_filter': site_filter,
-        'platform_filter': normalized_platforms,
-        'contains_toi': contains_toi,
-        'contains_et': contains_et
-    }, session_id)
-    contains_lang = any(site not in ['TOI', 'ETIMES', 'ET'] for site in site_filter)
-
-    print("\n📊 Site categorization:")
-    print(f"Contains TOI/ETIMES: {contains_toi}")
-    print(f"Contains ET: {contains_et}")
-    print(f"Contains other languages: {contains_lang}")
-
-    placement_data = {}
-
-    # For richmedia lines, create platform mapping for each size
-    filtered_size_groups = {}
-    richmedia_platform_map = {}
-    
-    if line_type == "richmedia":
-        for size_key, size_info in size_groups.items():
-            # Get the original sizes for this group
-            original_sizes = size_info.get('original_sizes', [size_key])
-            
-            # For each original size, check what platforms it supports
-            all_supported_platforms = set()
-            for orig_size in original_sizes:
-                if orig_size in presets_dict:
-                    size_platforms = [p.upper() for p in presets_dict[orig_size].get('platforms', [])]
-                    # Only use platforms that are both in input and supported by this size
-                    supported_for_this_size = set(normalized_platforms).intersection(set(size_platforms))
-                    all_supported_platforms.update(supported_for_this_size)
-                    print(f"📋 Size {orig_size} supports platforms: {size_platforms}, effective: {list(supported_for_this_size)}")
-            
-            # Only include this size group if it has supported platforms
-            if all_supported_platforms:
-                filtered_size_groups[size_key] = size_info.copy()
-                richmedia_platform_map[size_key] = list(all_supported_platforms)
-                print(f"✅ Size group {size_key} (richmedia) will use platforms: {list(all_supported_platforms)}")
-            else:
-                print(f"🚫 Size group {size_key} (richmedia) has no supported platforms, skipping")
-    else:
-        filtered_size_groups = size_groups
-        richmedia_platform_map = None
-    
-    # Use user-specified platforms for both richmedia and standard lines
-    platforms_for_fetch = normalized_platforms
-    print(f"🎯 Using user-specified platforms for placement fetch: {platforms_for_fetch}")
-
-    # End data processing, start placement lookup timing
-    timing_checkpoints['data_processing_end'] = time.time()
-    timing_checkpoints['placement_lookup_start'] = time.time()
-
-    # Always fetch placements regardless of tag file
-    if contains_toi:
-        toi_sites = [s for s in site_filter if s in ['TOI', 'ETIMES']]
-        custom_sheet_name = line_item_data.get('custom_sheet_name')
-        sheet_name_used = custom_sheet_name if custom_sheet_name else PLACEMENT_SHEET_NAME_TOI
-        print(f"\nFetching TOI placements from sheet: {sheet_name_used}")
-        
-        placement_data_toi = fetch_placements_ids(
-            CREDENTIALS_PATH,
-            SHEET_URL,
-            sheet_name_used,
-            toi_sites,
-            platforms_for_fetch,
-            filtered_size_groups,
-            richmedia_platform_map,
-            line_type
-        )
-        # Merge TOI placement data
-        print(f"🔍 TOI placement_data_toi type: {type(placement_data_toi)}")
-        print(f"🔍 TOI placement_data_toi content: {placement_data_toi}")
-        
-        for size, data in placement_data_toi.items():
-            print(f"🔍 TOI merging - Size: {size}, Data type: {type(data)}, Data: {data}")
-            if size not in placement_data:
-                placement_data[size] = data.copy()
-                print(f"🔍 TOI - Added new size {size} to placement_data")
-            else:
-                # Ensure we're working with dictionaries
-                if not isinstance(placement_data[size], dict):
-                    print(f"⚠️ TOI - placement_data[{size}] is not a dict: {type(placement_data[size])}")
-                    placement_data[size] = {}
-                if not isinstance(data, dict):
-                    print(f"⚠️ TOI - incoming data is not a dict: {type(data)}")
-                    continue
-                    
-                # Combine placement IDs from both sources
-                existing_ids = set(placement_data[size].get('placement_ids', []))
-                new_ids = set(data.get('placement_ids', []))
-                placement_data[size]['placement_ids'] = list(existing_ids | new_ids)
-                
-                # Preserve original_sizes information
-                existing_original_sizes = set(placement_data[size].get('original_sizes', []))
-                new_original_sizes = set(data.get('original_sizes', []))
-                placement_data[size]['original_sizes'] = list(existing_original_sizes | new_original_sizes)
-                
-                print(f"🔄 Merged TOI placements for {size}: {len(new_ids)} new IDs")
-
-    if contains_et:
-        et_sites = [s for s in site_filter if s == 'ET']
-        custom_sheet_name = line_item_data.get('custom_sheet_name')
-        et_sheet_name_used = custom_sheet_name if custom_sheet_name else PLACEMENT_SHEET_NAME_ET
-        print(f"\nFetching ET placements from sheet: {et_sheet_name_used}")
-        placement_data_et = fetch_placements_ids(
-            CREDENTIALS_PATH,
-            SHEET_URL,
-            et_sheet_name_used,
-            et_sites,
-            platforms_for_fetch,
-            filtered_size_groups,
-            richmedia_platform_map,
-            line_type
-        )
-        # Merge ET placement data
-        for size, data in placement_data_et.items():
-            if size not in placement_data:
-                placement_data[size] = data.copy()
-            else:
-                # Combine placement IDs from both sources
-                existing_ids = set(placement_data[size].get('placement_ids', []))
-                new_ids = set(data.get('placement_ids', []))
-                placement_data[size]['placement_ids'] = list(existing_ids | new_ids)
-                
-                # Preserve original_sizes information
-                existing_original_sizes = set(placement_data[size].get('original_sizes', []))
-                new_original_sizes = set(data.get('original_sizes', []))
-                placement_data[size]['original_sizes'] = list(existing_original_sizes | new_original_sizes)
-                
-                print(f"🔄 Merged ET placements for {size}: {len(new_ids)} new IDs")
-
-    if contains_lang:
-        lang_sites = [s for s in site_filter if s not in ['TOI', 'ETIMES', 'ET']]
-        
-        # Check if custom sheet name is provided (for PSBK line)
-        custom_sheet = line_item_data.get('custom_sheet_name')
-        sheet_name_to_use = custom_sheet if custom_sheet else PLACEMENT_SHEET_NAME_LANG
-        
-        print(f"\nFetching Language placements from sheet: {sheet_name_to_use}")
-        placement_data_lang = fetch_placements_ids(
-            CREDENTIALS_PATH,
-            SHEET_URL,
-            sheet_name_to_use,
-            lang_sites,
-            platforms_for_fetch,
-            filtered_size_groups,
-            richmedia_platform_map,
-            line_type
-        )
-        # Merge Language placement data
-        for size, data in placement_data_lang.items():
-            if size not in placement_data:
-                placement_data[size] = data.copy()
-            else:
-                # Combine placement IDs from both sources
-                existing_ids = set(placement_data[size].get('placement_ids', []))
-                new_ids = set(data.get('placement_ids', []))
-                placement_data[size]['placement_ids'] = list(existing_ids | new_ids)
-                
-                # Preserve original_sizes information
-                existing_original_sizes = set(placement_data[size].get('original_sizes', []))
-                new_original_sizes = set(data.get('original_sizes', []))
-                placement_data[size]['original_sizes'] = list(existing_original_sizes | new_original_sizes)
-                
-                print(f"🔄 Merged Language placements for {size}: {len(new_ids)} new IDs")
-
-    # Safeguard: Ensure original_sizes are preserved from size_groups
-    for placement_size, group_data in placement_data.items():
-        if placement_size in size_groups:
-            expected_original_sizes = size_groups[placement_size].get('original_sizes', [])
-            current_original_sizes = group_data.get('original_sizes', [])
-            
-            # If original_sizes is missing or incorrect, fix it
-            if not current_original_sizes or (len(current_original_sizes) == 1 and current_original_sizes[0] == placement_size and expected_original_sizes != [placement_size]):
-                placement_data[placement_size]['original_sizes'] = expected_original_sizes.copy()
-
-    print("\nFinal placement data:")
-    print(json.dumps(placement_data, indent=2))
-    
-    # Debug: Show original sizes mapping and data types
-    print("\n🔍 Final placement_data debug:")
-    print(f"  - placement_data type: {type(placement_data)}")
-    print(f"  - placement_data keys: {list(placement_data.keys())}")
-    
-    for placement_size, data in placement_data.items():
-        print(f"🔍 Final - Size: {placement_size}, Data type: {type(data)}")
-        if isinstance(data, dict):
-            original_sizes = data.get('original_sizes', [placement_size])
-            print(f"  - Original sizes: {original_sizes}")
-            print(f"  - Placement IDs count: {len(data.get('placement_ids', []))}")
-        else:
-            print(f"  - ⚠️ WARNING: Data is not a dict: {data}")
-
-    # Get all placement IDs from placement_data
-    all_placement_ids = []
-    print(f"🔍 Collecting all placement IDs:")
-    
-    for key, group_info in placement_data.items():
-        print(f"  - Processing key: {key}, type: {type(group_info)}")
-        if isinstance(group_info, dict):
-            placement_ids = group_info.get('placement_ids', [])
-            print(f"    - Found {len(placement_ids)} placement IDs")
-            all_placement_ids.extend(placement_ids)
-        else:
-            print(f"    - ⚠️ WARNING: Expected dict but got {type(group_info)}: {group_info}")
-    
-    all_placement_ids = list(set(all_placement_ids))
-    print(f"🔍 Total unique placement IDs collected: {len(all_placement_ids)}")
-
-    # If no placement IDs found, raise an error since inventory targeting is required
-    if not all_placement_ids:
-        raise ValueError("No placement IDs found. Inventory targeting is required for line item creation.")
-
-    print("Detected creatives:", detected_creatives)
-    print("Placement data:", placement_data)
-
-    creative_placeholders = []
-    creative_targetings = []
-    
-    # Create placeholders and targetings only for sizes that have placement IDs
-    for base_size, group_info in placement_data.items():
-        if group_info.get('placement_ids'):  # Only create if there are placement IDs
-            # Get the original sizes for this placement group
-            original_sizes = group_info.get('original_sizes', [base_size])
-            
-            # Create creative placeholders and targetings for each original size
-            for original_size in original_sizes:
-                # Create a descriptive targeting name for display
-                if original_size == "320x100":
-                    targeting_display_name = "Mweb_PPD"
-                elif original_size == "300x250" and line_type == "richmedia":
-                    targeting_display_name = "Mrec_ex"
-                elif original_size == "300x600" and line_type == "richmedia":
-                    targeting_display_name = "Tower_ex"
-                else:
-                    targeting_display_name = original_size
-                
-                creative_placeholders.append({
-                    'targetingName': targeting_display_name,
-                    'size': {
-                        'width': int(original_size.split('x')[0]),
-                        'height': int(original_size.split('x')[1])
-                    }
-                })
-                print(f"✅ Added creative placeholder for original size {original_size} with targeting name {targeting_display_name}")
-                
-                # Create matching targeting for this original size using placements or ad units
-                if group_info.get('targeting_type') == 'ad_slot_id':
-                    targeted_ad_units = [
-                        {
-                            'adUnitId': pid,
-                            'includeDescendants': True
-                        } for pid in group_info['placement_ids']
-                    ]
-                    targeting_inventory = {
-                        'targetedAdUnits': targeted_ad_units
-                    }
-                else:
-                    targeting_inventory = {
-                        'targetedPlacementIds': group_info['placement_ids']
-                    }
-                targeting_dict = {
-                    'name': targeting_display_name,
-                    'targeting': {
-                        'inventoryTargeting': targeting_inventory,
-                    }
-                }
-                creative_targetings.append(targeting_dict)
-                # Check if this is a PSBK line using Ad slot IDs
-                targeting_type = group_info.get('targeting_type', 'placement_id')
-                if targeting_type == 'ad_slot_id':
-                    print(f"✅ Added creative targeting '{targeting_display_name}' for original size {original_size} using Ad slot IDs from {base_size}")
-                    print(f"🔧 PSBK line: Using Ad slot IDs instead of Placement IDs")
-                else:
-                    print(f"✅ Added creative targeting '{targeting_display_name}' for original size {original_size} using placement IDs from {base_size}")
-                print(f"🔍 Creative targeting type: {type(targeting_dict)}, placement_ids type: {type(group_info['placement_ids'])}")
-        else:
-            print(f"⚠️ Skipping {base_size} - no placement IDs found")
+    print(f"Site filter: {site_filter}")
+    print(f"Platforms: {line_item_data['platforms']}")
 
-    # Add special targeting for In-Banner Video if needed
-    if In_Banner_video and '300x250' not in placement_data:
-        creative_placeholders.append({
-            'size': {
-                'width': 300,
-                'height': 250
-            }
-        })
-        print("➕ Added targeting for In-Banner Video 300x250")
+    # Normalize platforms to uppercase for consistent matching
+    normalized_platforms = [p.strip().upper() for p in line_item_data['platforms']]
+    print(f"Normalized platforms: {normalized_platforms}")
 
-    # Add additional sizes for special cases
-    if '1260x570' in placement_data and placement_data['1260x570'].get('placement_ids'):
-        additional_sizes = ['728x500', '1320x570']
-        for size in additional_sizes:
-            creative_placeholders.append({
-                'size': {
-                    'width': int(size.split('x')[0]),
-                    'height': int(size.split('x')[1])
-                }
-            })
-        print(f"➕ Added additional sizes {additional_sizes} because 1260x570 was present")
+    if 'ALL_Languages' in site_filter:
+        site_filter = [site for site in site_filter if site != 'ALL_Languages']
+        site_filter.extend(['IAG', 'ITBANGLA', 'MS', 'MT', 'NBT', 'TLG', 'TML', 'VK'])
+        site_filter = list(dict.fromkeys(site_filter))
+        print(f"Expanded ALL_Languages to: {site_filter}")
 
-    if '980x200' in placement_data and placement_data['980x200'].get('placement_ids') and '728x90' not in placement_data:
-        creative_placeholders.append({
-            'size': {
-                'width': 728,
-                'height': 90
-            }
-        })
-        print("➕ Added additional size 728x90 because 980x200 was present")
+    contains_toi = any(site in ['TOI', 'ETIMES'] for site in site_filter)
+    contains_et = any(site == 'ET' for site in site_filter)
+    
+    # Log placement targeting configuration
+    logger.log_placement_targeting({
+        'site_filter': site_filter,
+        'platform_filter': normalized_platforms,
+        'contains_toi': contains_toi,
+        'contains_et': contains_et
+    }, session_id)
+    contains_lang = any(site not in ['TOI', 'ETIMES', 'ET'] for site in site_filter)
 
-    # Add 320x50 override for 320x100 (similar to 728x90 for 980x200)
-    # Check if 320x100 exists in any placement data and 320x50 doesn't exist as its own entry
-    print(f"🔍 Debugging placement_data.values():")
-    print(f"  - placement_data type: {type(placement_data)}")
-    print(f"  - placement_data keys: {list(placement_data.keys()) if isinstance(placement_data, dict) else 'Not a dict'}")
+    print("\n📊 Site categorization:")
+    print(f"Contains TOI/ETIMES: {contains_toi}")
+    print(f"Contains ET: {contains_et}")
+    print(f"Contains other languages: {contains_lang}")
+
+    # For richmedia lines, create platform mapping for each size
+    filtered_size_groups = {}
+    richmedia_platform_map = {}
     
-    has_320x100 = False
-    has_explicit_320x50 = False
+    if line_type == "richmedia":
+        for size_key, size_info in size_groups.items():
+            # Get the original sizes for this group
+            original_sizes = size_info.get('original_sizes', [size_key])
+            
+            # For each original size, check what platforms it supports
+            all_supported_platforms = set()
+            for orig_size in original_sizes:
+                if orig_size in presets_dict:
+                    size_platforms = [p.upper() for p in presets_dict[orig_size].get('platforms', [])]
+                    # Only use platforms that are both in input and supported by this size
+                    supported_for_this_size = set(normalized_platforms).intersection(set(size_platforms))
+                    all_supported_platforms.update(supported_for_this_size)
+                    print(f"📋 Size {orig_size} supports platforms: {size_platforms}, effective: {list(supported_for_this_size)}")
+            
+            # Only include this size group if it has supported platforms
+            if all_supported_platforms:
+                filtered_size_groups[size_key] = size_info.copy()
+                richmedia_platform_map[size_key] = list(all_supported_platforms)
+                print(f"✅ Size group {size_key} (richmedia) will use platforms: {list(all_supported_platforms)}")
+            else:
+                print(f"🚫 Size group {size_key} (richmedia) has no supported platforms, skipping")
+    else:
+        filtered_size_groups = size_groups
+        richmedia_platform_map = None
     
+    # Use user-specified platforms for both richmedia and standard lines
+    platforms_for_fetch = normalized_platforms
+    print(f"🎯 Using user-specified platforms for placement fetch: {platforms_for_fetch}")
+
+    # End data processing, start placement lookup timing
+    timing_checkpoints['data_processing_end'] = time.time()
+    timing_checkpoints['placement_lookup_start'] = time.time()
+
+    # Read every placement worksheet in one batched request; the per-site-group
+    # lookups below filter these tables instead of downloading each sheet
     try:
-        for key, data in placement_data.items():
-            print(f"  - Key: {key}, Data type: {type(data)}, Data: {data}")
-            if isinstance(data, dict):
-                original_sizes = data.get('original_sizes', [])
-                if '320x100' in original_sizes:
-                    has_320x100 = True
-                if '320x50' in original_sizes:
-                    has_explicit_320x50 = True
-            else:
-                print(f"  - WARNING: Expected dict but got {type(data)} for key {key}")
+        placement_workbook = load_placement_workbook(SHEET_URL, PLACEMENT_WORKBOOK_SHEETS, CREDENTIALS_PATH)
     except Exception as e:
-        print(f"  - ERROR in placement_data iteration: {e}")
-        print(f"  - placement_data content: {placement_data}")
-        # Fallback to original logic with error handling
-        has_320x100 = any(
-            isinstance(data, dict) and '320x100' in data.get('original_sizes', []) 
-            for data in placement_data.values()
-        )
-        has_explicit_320x50 = any(
-            isinstance(data, dict) and '320x50' in data.get('original_sizes', []) 
-            for data in placement_data.values()
+        print(f"⚠️ Batched placement sheet read failed, falling back to per-sheet reads: {e}")
+        placement_workbook = {}
+
+    # Repeat targeting configurations reuse the plan computed last time and go straight to createLineItems
+    custom_sheet_name = line_item_data.get('custom_sheet_name')
+    plan_sheets = PLACEMENT_WORKBOOK_SHEETS + ([custom_sheet_name] if custom_sheet_name else [])
+    plan_key = campaign_plan_key(
+        sites=site_filter,
+        platforms=platforms_for_fetch,
+        line_type=line_type,
+        size_groups=filtered_size_groups,
+        sheet_revision=workbook_revision(SHEET_URL, plan_sheets),
+        geo_ids=geo_targeting_ids,
+        excluded_geo_ids=excluded_geo_ids,
+        custom_sheet=custom_sheet_name,
+        richmedia_platform_map=richmedia_platform_map,
+        in_banner_video=bool(In_Banner_video),
+    )
+    campaign_plan = get_campaign_plan(plan_key)
+
+    if campaign_plan:
+        print(f"⚡ Reusing cached campaign plan {plan_key[:12]} (sheet revision and targeting unchanged)")
+        placement_data = campaign_plan['placement_data']
+        all_placement_ids = campaign_plan['all_placement_ids']
+        creative_placeholders = campaign_plan['creative_placeholders']
+        creative_targetings = campaign_plan['creative_targetings']
+        targeting_config = campaign_plan['targeting_config']
+    else:
+        # Always fetch placements regardless of tag file; the site groups are fetched concurrently
+        # and merged in TOI, ET, language order
+        site_groups = []
+        if contains_toi:
+            toi_sites = [s for s in site_filter if s in ['TOI', 'ETIMES']]
+            site_groups.append(("TOI", custom_sheet_name or PLACEMENT_SHEET_NAME_TOI, toi_sites))
+        if contains_et:
+            et_sites = [s for s in site_filter if s == 'ET']
+            site_groups.append(("ET", custom_sheet_name or PLACEMENT_SHEET_NAME_ET, et_sites))
+        if contains_lang:
+            # Custom sheet name is provided for the PSBK line
+            lang_sites = [s for s in site_filter if s not in ['TOI', 'ETIMES', 'ET']]
+            site_groups.append(("Language", custom_sheet_name or PLACEMENT_SHEET_NAME_LANG, lang_sites))
+
+        placement_data = fetch_site_group_placements(
+            SHEET_URL,
+            site_groups,
+            platforms_for_fetch,
+            filtered_size_groups,
+            richmedia_platform_map,
+            line_type,
+            workbook=placement_workbook,
+            credentials_path=CREDENTIALS_PATH
         )
-    
-    if has_320x100 and not has_explicit_320x50:
-        # Add 320x50 creative placeholder (exactly like 728x90 for 980x200)
-        # NO targetingName and NO creative targeting - this allows any 320x50 creative to serve
-        creative_placeholders.append({
-            'size': {
-                'width': 320,
-                'height': 50
-            }
-        })
-        print("➕ Added additional size 320x50 because 320x100 was present")
 
+        # Safeguard: Ensure original_sizes are preserved from size_groups
+        for placement_size, group_data in placement_data.items():
+            if placement_size in size_groups:
+                expected_original_sizes = size_groups[placement_size].get('original_sizes', [])
+                current_original_sizes = group_data.get('original_sizes', [])
+            
+                # If original_sizes is missing or incorrect, fix it
+                if not current_original_sizes or (len(current_original_sizes) == 1 and current_original_sizes[0] == placement_size and expected_original_sizes != [placement_size]):
+                    placement_data[placement_size]['original_sizes'] = expected_original_sizes.copy()
 
+        # Drop archived/inactive placements and ad slots now rather than have createLineItems reject the line
+        drop_dead_placements(client, placement_data)
 
-    if '600x250' in placement_data and placement_data['600x250'].get('placement_ids'):
-        creative_placeholders.append({
-            'targetingName': 'Mrec Expando',
-            'size': {'width': 300, 'height': 250}
+        print("\nFinal placement data:")
+        print(json.dumps(placement_data, indent=2))
+    
+        # Debug: Show original sizes mapping and data types
+        print("\n🔍 Final placement_data debug:")
+        print(f"  - placement_data type: {type(placement_data)}")
+        print(f"  - placement_data keys: {list(placement_data.keys())}")
+    
+        for placement_size, data in placement_data.items():
+            print(f"🔍 Final - Size: {placement_size}, Data type: {type(data)}")
+            if isinstance(data, dict):
+                original_sizes = data.get('original_sizes', [placement_size])
+                print(f"  - Original sizes: {original_sizes}")
+                print(f"  - Placement IDs count: {len(data.get('placement_ids', []))}")
+            else:
+                print(f"  - ⚠️ WARNING: Data is not a dict: {data}")
+
+        # Get all placement IDs from placement_data
+        all_placement_ids = []
+        print(f"🔍 Collecting all placement IDs:")
+    
+        for key, group_info in placement_data.items():
+            print(f"  - Processing key: {key}, type: {type(group_info)}")
+            if isinstance(group_info, dict):
+                placement_ids = group_info.get('placement_ids', [])
+                print(f"    - Found {len(placement_ids)} placement IDs")
+                all_placement_ids.extend(placement_ids)
+            else:
+                print(f"    - ⚠️ WARNING: Expected dict but got {type(group_info)}: {group_info}")
+    
+        all_placement_ids = list(dict.fromkeys(all_placement_ids))
+        print(f"🔍 Total unique placement IDs collected: {len(all_placement_ids)}")
+
+        # If no placement IDs found, raise an error since inventory targeting is required
+        if not all_placement_ids:
+            raise ValueError("No placement IDs found. Inventory targeting is required for line item creation.")
+
+        creative_placeholders, creative_targetings = build_creative_placeholders(placement_data, line_type, In_Banner_video)
+        targeting_config = build_line_targeting(placement_data, all_placement_ids, geo_targeting_ids, excluded_geo_ids)
+        store_campaign_plan(plan_key, {
+            'placement_data': placement_data,
+            'all_placement_ids': all_placement_ids,
+            'creative_placeholders': creative_placeholders,
+            'creative_targetings': creative_targetings,
+            'targeting_config': targeting_config,
         })
-        
-        targeting_dict = {
-            'name': 'Mrec Expando',
-            'targeting': {
-                'inventoryTargeting': {
-                    'targetedPlacementIds': placement_data['600x250']['placement_ids'],
-                },
-            }
-        }
-        creative_targetings.append(targeting_dict)
-        print(f"🔍 Added Mrec Expando targeting, type: {type(targeting_dict)}")
+
+    print("Detected creatives:", detected_creatives)
+    print("Placement data:", placement_data)
 
     # Check Expresso information for smarter uniqueness handling
     expresso_line_item_found = line_item_data.get('expresso_line_item_found', False)
@@ -1775,50 +1691,6 @@ def single_line(client, order_id, line_item_data, line_name):
     print(f"  • Total Excluded Locations: {len(excluded_geo_ids)}")
     print(f"{'='*80}\n")
     
-    # Check if we're using Ad slot IDs for PSBK lines
-    targeting_type = "placement_id"  # default
-    for size_data in placement_data.values():
-        if isinstance(size_data, dict) and size_data.get('targeting_type') == 'ad_slot_id':
-            targeting_type = 'ad_slot_id'
-            break
-    
-    # Prepare targeting configuration
-    if targeting_type == 'ad_slot_id':
-        targeting_config = {
-            'inventoryTargeting': {
-                'targetedAdUnits': [
-                    {
-                        'adUnitId': pid,
-                        'includeDescendants': True
-                    } for pid in all_placement_ids
-                ]
-            }
-        }
-    else:
-        targeting_config = {
-            'inventoryTargeting': {
-                'targetedPlacementIds': all_placement_ids
-            }
-        }
-    
-    # Log the targeting type being used
-    if targeting_type == 'ad_slot_id':
-        print(f"🔧 PSBK line: Using Ad slot IDs for inventory targeting")
-        print(f"📊 Total Ad slot IDs: {len(all_placement_ids)}")
-    else:
-        print(f"📊 Total Placement IDs: {len(all_placement_ids)}")
-    
-    # Add geo targeting if we have valid locations
-    if geo_targeting_ids:
-        print(f"✅ Adding geo targeting with {len(geo_targeting_ids)} locations")
-        targeting_config['geoTargeting'] = {
-            'targetedLocations': [{'id': geo_id} for geo_id in geo_targeting_ids]
-        }
-        if excluded_geo_ids:
-            print(f"✅ Adding {len(excluded_geo_ids)} excluded locations")
-            targeting_config['geoTargeting']['excludedLocations'] = [{'id': geo_id} for geo_id in excluded_geo_ids]
-    else:
-        print("⚠️ No geo targeting IDs found, skipping geo targeting configuration")
     
     line_item = {
         'name': unique_line_name,
@@ -1857,6 +1729,7 @@ def single_line(client, order_id, line_item_data, line_name):
         # Create the line item
         print("🚀 Creating line item...")
         created_line_items = line_item_service.createLineItems([line_item])
+        invalidate_tables('Line_Item')
         line_item_id = created_line_items[0]['id']
         print(f"✅ Successfully created line item with ID: {line_item_id}")
         
@@ -1889,6 +1762,8 @@ def single_line(client, order_id, line_item_data, line_name):
     tag_dict = read_tag_file()
     
     creative_ids = []
+    # Creatives of the placement and tag sizes are collected here and created together below
+    pending_creatives = []
     
     # First, gather all the tags for each base size
     size_tags = {}
@@ -1935,13 +1810,11 @@ def single_line(client, order_id, line_item_data, line_name):
                     elif In_Banner_video and original_size == "300x250":
                         use_template_id = 12344286
                         print(f"Using In-Banner Video template ID: {use_template_id} for size {original_size}")
-                        new_creatives = create_custom_template_creatives(
+                        pending_creatives.extend(build_template_creative_payloads(
                             client, order_id, line_item_id,
                             destination_url, expresso_id, original_size, use_landing_page,
                             use_impression_tag, use_script_tag, use_template_id, In_Banner_video, line_type
-                        )
-                        creative_ids.extend(new_creatives)
-                        track_creative_creation(original_size, new_creatives)
+                        ))
                         continue
                     
                     # Process tags if available for the original size
@@ -2058,14 +1931,12 @@ def single_line(client, order_id, line_item_data, line_name):
                                 use_template_id = 12435443  # AI template for JavaScript tags
                                 print(f"Using AI template ID: {use_template_id} for JavaScript tag")
                             
-                            # Create the creative and associate it with the line item
-                            new_creatives = create_custom_template_creatives(
+                            # Queue the creative; it is created and associated with the line item below
+                            pending_creatives.extend(build_template_creative_payloads(
                                 client, order_id, line_item_id,
                                 destination_url, expresso_id, original_size, use_landing_page,
                                 use_impression_tag, use_script_tag, use_template_id, In_Banner_video, line_type
-                            )
-                            creative_ids.extend(new_creatives)
-                            track_creative_creation(original_size, new_creatives)
+                            ))
                     else:
                         # No tags for this size, create a normal creative
                         creative_path = None
@@ -2074,13 +1945,11 @@ def single_line(client, order_id, line_item_data, line_name):
                         if creative_path and creative_path.lower().endswith('.html'):
                             use_template_id = 12435443
                             print(f"Using template ID 12435443 for HTML creative: {creative_path}")
-                        new_creatives = create_custom_template_creatives(
+                        pending_creatives.extend(build_template_creative_payloads(
                             client, order_id, line_item_id,
                             destination_url, expresso_id, original_size, use_landing_page,
                             use_impression_tag, use_script_tag, use_template_id, In_Banner_video, line_type
-                        )
-                        creative_ids.extend(new_creatives)
-                        track_creative_creation(original_size, new_creatives)
+                        ))
                 except Exception as e:
                     print(f"⚠️ Failed to create creatives for original size {original_size}: {e}")
 
@@ -2216,17 +2085,30 @@ def single_line(client, order_id, line_item_data, line_name):
                         
                         use_template_id = 12435443
                     
-                    new_creatives = create_custom_template_creatives(
+                    pending_creatives.extend(build_template_creative_payloads(
                         client, order_id, line_item_id,
                         destination_url, expresso_id, tag_size, use_landing_page,
                         use_impression_tag, use_script_tag, use_template_id, In_Banner_video, line_type
-                    )
-                    creative_ids.extend(new_creatives)
-                    track_creative_creation(tag_size, new_creatives)
-                    print(f"✅ Created additional creative for tag {tag_key} and size {tag_size}")
+                    ))
+                    print(f"📝 Queued additional creative for tag {tag_key} and size {tag_size}")
                 except Exception as e:
                     print(f"⚠️ Failed to create additional creative for tag {tag_key} and size {tag_size}: {e}")
 
+    # Create all queued creatives in chunked createCreatives calls; a failing creative doesn't block the others
+    try:
+        submit_template_creatives(client, line_item_id, pending_creatives, creative_library=creative_library)
+    except Exception as e:
+        print(f"⚠️ Failed to create creatives: {e}")
+    created_by_size = {}
+    for entry in pending_creatives:
+        if entry['creative_id'] is not None:
+            creative_ids.append(entry['creative_id'])
+            created_by_size.setdefault(entry['size_name'], []).append(entry['creative_id'])
+        elif entry['error'] is not None:
+            print(f"⚠️ Failed to create creative for size {entry['size_name']} ({entry['targeting_name']}): {entry['error']}")
+    for size, size_creative_ids in created_by_size.items():
+        track_creative_creation(size, size_creative_ids)
+
     # Create 320x50 creatives when they have their own targeting but aren't in the main placement processing
     # This happens when 320x100 exists and we've added 320x50 as an additional override size
     print(f"🔍 Creative targetings debug:")
@@ -2270,7 +2152,8 @@ def single_line(client, order_id, line_item_data, line_name):
             new_320x50_creatives = create_custom_template_creatives(
                 client, order_id, line_item_id,
                 destination_url, expresso_id, "320x50", use_landing_page,
-                use_impression_tag, use_script_tag, use_template_id, In_Banner_video, line_type
+                use_impression_tag, use_script_tag, use_template_id, In_Banner_video, line_type,
+                creative_library=creative_library
             )
             creative_ids.extend(new_320x50_creatives)
             track_creative_creation('320x50', new_320x50_creatives)
@@ -2289,7 +2172,8 @@ def single_line(client, order_id, line_item_data, line_name):
             new_creatives = create_custom_template_creatives(
                 client, order_id, line_item_id,
                 destination_url, expresso_id, "300x250", landing_page,
-                impression_tracker, script_tracker, use_template_id, In_Banner_video, line_type
+                impression_tracker, script_tracker, use_template_id, In_Banner_video, line_type,
+                creative_library=creative_library
             )
             creative_ids.extend(new_creatives)
             track_creative_creation("300x250", new_creatives)
@@ -2339,7 +2223,11 @@ def single_line(client, order_id, line_item_data, line_name):
         'creative_creation_time': creative_creation_time,
         'line_item_id': line_item_id,
         'creative_count': len(creative_ids) if creative_ids else 0,
-        'session_id': session_id
+        'session_id': session_id,
+        'pql_cache': pql_cache_stats(),
+        'campaign_plan_reused': bool(campaign_plan),
+        'campaign_plan_cache': campaign_plan_stats(),
+        'tag_file': tag_file_stats()
     }, session_id)
     
     # Log final performance summary
@@ -2457,6 +2345,16 @@ def three_lines(client, order_id, line_item_data, line_name):
     for i, line_config in enumerate(lines_to_create, 1):
         print(f"  {i}. {line_config['description']}: {line_config['name']}")
     
+    # Resolve the campaign geos once and share them across all three lines
+    try:
+        geo_context = GeoResolutionContext.build(client, line_item_data.get('geoTargeting', []))
+    except Exception as e:
+        print(f"⚠️ Shared geo resolution failed, each line will resolve its own geos: {e}")
+        geo_context = None
+    
+    # Creatives are uploaded once per campaign and associated with every line that needs them
+    creative_library = CampaignCreativeLibrary() if SHARE_CREATIVES_ACROSS_LINES else None
+    
     # Create each line item with retry mechanism
     for i, line_config in enumerate(lines_to_create):
         max_retries = 3
@@ -2484,7 +2382,9 @@ def three_lines(client, order_id, line_item_data, line_name):
                     print(f"🎯 Using hardcoded NWP placement data for {line_config['name']}")
                     # Use special NWP function with hardcoded placements and geo targeting
                     line_id, creative_ids = single_line_nwp(
-                        client, order_id, current_line_data, line_config['name'], line_config['line_type']
+                        client, order_id, current_line_data, line_config['name'], line_config['line_type'],
+                        geo_context=geo_context,
+                        creative_library=creative_library
                     )
                 elif line_config['use_psbk']:
                     print(f"🔧 Using CAN_PSBK placement data for {line_config['name']}")
@@ -2492,17 +2392,22 @@ def three_lines(client, order_id, line_item_data, line_name):
                     line_id, creative_ids = single_line_with_custom_sheet(
                         client, order_id, current_line_data, line_config['name'], 
                         custom_sheet_name=PLACEMENT_SHEET_NAME_CAN_PSBK,
-                        line_type=line_config['line_type']
+                        line_type=line_config['line_type'],
+                        geo_context=geo_context,
+                        creative_library=creative_library
                     )
                 else:
                     # Use standard single_line function with standard geo targeting
                     line_id, creative_ids = single_line_with_geo_type(
-                        client, order_id, current_line_data, line_config['name'], line_config['line_type']
+                        client, order_id, current_line_data, line_config['name'], line_config['line_type'],
+                        geo_context=geo_context,
+                        creative_library=creative_library
                     )
                 
                 # Track successful creation
                 all_line_ids.append(line_id)
-                all_creative_ids.extend(creative_ids if creative_ids else [])
+                # Shared creatives are associated with several lines; list each creative once
+                all_creative_ids.extend(cid for cid in (creative_ids or []) if cid not in all_creative_ids)
                 success_count += 1
                 
                 print(f"✅ Successfully created {line_config['description']}")
@@ -2558,6 +2463,13 @@ def three_lines(client, order_id, line_item_data, line_name):
         for error in error_messages:
             print(f"    • {error}")
     
+    if creative_library is not None:
+        library_stats = creative_library.stats()
+        print(f"  - Creatives uploaded: {library_stats['created']}, reused across lines: {library_stats['reused']}")
+    
+    if geo_context:
+        show_geo_selection_summary(geo_context.auto_selections)
+    
     # Log performance metrics
     logger.log_performance_metrics({
         'total_time': total_time,
@@ -2576,7 +2488,8 @@ def three_lines(client, order_id, line_item_data, line_name):
     return all_line_ids, all_creative_ids
 
 
-def single_line_with_geo_type(client, order_id, line_item_data, line_name, line_type="standard"):
+def single_line_with_geo_type(client, order_id, line_item_data, line_name, line_type="standard", geo_context=None,
+                              creative_library=None):
     """
     Wrapper for single_line that handles geo targeting based on line type
     """
@@ -2585,7 +2498,7 @@ def single_line_with_geo_type(client, order_id, line_item_data, line_name, line_
     modified_line_data = line_item_data.copy()
     
     # Setup geo targeting based on line type
-    geo_ids, excluded_geo_ids = setup_geo_targeting_for_line_type(client, original_geo, line_type)
+    geo_ids, excluded_geo_ids = setup_geo_targeting_for_line_type(client, original_geo, line_type, geo_context)
     
     # Update the line item data with processed geo targeting
     modified_line_data['processed_geo_ids'] = geo_ids
@@ -2593,9 +2506,10 @@ def single_line_with_geo_type(client, order_id, line_item_data, line_name, line_
     modified_line_data['line_type'] = line_type
     
     # Call the original single_line function
-    return single_line(client, order_id, modified_line_data, line_name)
+    return single_line(client, order_id, modified_line_data, line_name, creative_library=creative_library)
 
-def single_line_with_custom_sheet(client, order_id, line_item_data, line_name, custom_sheet_name=None, line_type="psbk"):
+def single_line_with_custom_sheet(client, order_id, line_item_data, line_name, custom_sheet_name=None, line_type="psbk", geo_context=None,
+                                  creative_library=None):
     """
     Modified version of single_line that allows using a custom sheet for placement data
     This is specifically for the _psbk line that needs to use CAN_PSBK sheet
@@ -2771,106 +2685,42 @@ def single_line_with_custom_sheet(client, order_id, line_item_data, line_name, c
     contains_toi = any(site.upper() in ['TOI', 'ETIMES'] for site in site_filter)
     contains_et = any(site.upper() in ['ET'] for site in site_filter)
     
-    placement_data = {}
-    
     timing_checkpoints['placement_lookup_start'] = time.time()
 
-    # Always fetch placements regardless of tag file
+    # Preview the PSBK placements with the sheet single_line will use below; the workbook
+    # read populates the snapshot cache, so single_line's own lookup costs no extra requests
+    psbk_sheet_name = psbk_custom_sheet_name or PLACEMENT_SHEET_NAME_CAN_PSBK
+    site_groups = []
     if contains_toi:
-        toi_sites = [s for s in site_filter if s in ['TOI', 'ETIMES']]
-        custom_sheet_name = line_item_data.get('custom_sheet_name')
-        sheet_name_used = custom_sheet_name if custom_sheet_name else PLACEMENT_SHEET_NAME_TOI
-        print(f"\nFetching TOI placements from sheet: {sheet_name_used}")
-        
-        placement_data_toi = fetch_placements_ids(
-            CREDENTIALS_PATH,
-            SHEET_URL,
-            sheet_name_used,
-            toi_sites,
-            platforms_for_fetch,
-            filtered_size_groups,
-            richmedia_platform_map,
-            line_type
-        )
-        # Merge TOI placement data
-        print(f"🔍 TOI placement_data_toi type: {type(placement_data_toi)}")
-        print(f"🔍 TOI placement_data_toi content: {placement_data_toi}")
-        
-        for size, data in placement_data_toi.items():
-            print(f"🔍 TOI merging - Size: {size}, Data type: {type(data)}, Data: {data}")
-            if size not in placement_data:
-                placement_data[size] = []
-            if isinstance(data, list):
-                placement_data[size].extend(data)
-            else:
-                print(f"⚠️ TOI data for size {size} is not a list: {type(data)}")
-
+        site_groups.append(("TOI", psbk_sheet_name, [s for s in site_filter if s in ['TOI', 'ETIMES']]))
     if contains_et:
-        et_sites = [s for s in site_filter if s.upper() == 'ET']
-        custom_sheet_name = line_item_data.get('custom_sheet_name')
-        et_sheet_name_used = custom_sheet_name if custom_sheet_name else PLACEMENT_SHEET_NAME_ET
-        print(f"\nFetching ET placements for sites: {et_sites} from sheet: {et_sheet_name_used}")
-        
-        placement_data_et = fetch_placements_ids(
-            CREDENTIALS_PATH,
-            SHEET_URL,
-            et_sheet_name_used,
-            et_sites,
-            platforms_for_fetch,
-            filtered_size_groups,
-            richmedia_platform_map,
-            line_type
-        )
-        # Merge ET placement data
-        print(f"🔍 ET placement_data_et type: {type(placement_data_et)}")
-        print(f"🔍 ET placement_data_et content: {placement_data_et}")
-        
-        for size, data in placement_data_et.items():
-            print(f"🔍 ET merging - Size: {size}, Data type: {type(data)}, Data: {data}")
-            if size not in placement_data:
-                placement_data[size] = []
-            if isinstance(data, list):
-                placement_data[size].extend(data)
-            else:
-                print(f"⚠️ ET data for size {size} is not a list: {type(data)}")
-
+        site_groups.append(("ET", psbk_sheet_name, [s for s in site_filter if s.upper() == 'ET']))
     # Fetch from other sites (non-TOI, non-ET)
     other_sites = [s for s in site_filter if s.upper() not in ['TOI', 'ETIMES', 'ET']]
     if other_sites:
-        print(f"\nFetching placements for other sites: {other_sites}")
-        
-        # Use custom sheet if specified (for _psbk line)
-        sheet_name_to_use = custom_sheet_name if custom_sheet_name else PLACEMENT_SHEET_NAME_LANG
-        print(f"🔧 Using sheet: {sheet_name_to_use}")
-        
-        placement_data_other = fetch_placements_ids(
-            CREDENTIALS_PATH,
-            SHEET_URL,
-            sheet_name_to_use,
-            other_sites,
-            platforms_for_fetch,
-            filtered_size_groups,
-            richmedia_platform_map,
-            line_type
-        )
-        # Merge other placement data
-        print(f"🔍 Other placement_data type: {type(placement_data_other)}")
-        print(f"🔍 Other placement_data content: {placement_data_other}")
-        
-        for size, data in placement_data_other.items():
-            print(f"🔍 Other merging - Size: {size}, Data type: {type(data)}, Data: {data}")
-            if size not in placement_data:
-                placement_data[size] = []
-            if isinstance(data, list):
-                placement_data[size].extend(data)
-            else:
-                print(f"⚠️ Other data for size {size} is not a list: {type(data)}")
+        site_groups.append(("Other", psbk_sheet_name, other_sites))
+
+    try:
+        placement_workbook = load_placement_workbook(SHEET_URL, PLACEMENT_WORKBOOK_SHEETS, CREDENTIALS_PATH)
+    except Exception as e:
+        print(f"⚠️ Batched placement sheet read failed, falling back to per-sheet reads: {e}")
+        placement_workbook = {}
+    placement_data = fetch_site_group_placements(
+        SHEET_URL,
+        site_groups,
+        platforms_for_fetch,
+        filtered_size_groups,
+        richmedia_platform_map,
+        line_type,
+        workbook=placement_workbook,
+        credentials_path=CREDENTIALS_PATH
+    )
 
     timing_checkpoints['placement_lookup_end'] = time.time()
     
     print(f"\n🎯 Final placement data summary:")
-    for size, placements in placement_data.items():
-        print(f"  - {size}: {len(placements) if isinstance(placements, list) else 'N/A'} placements")
+    for size, data in placement_data.items():
+        print(f"  - {size}: {len(data.get('placement_ids', []))} placements")
     
     # Continue with the rest of the single_line logic...
     # [Rest of the single_line function logic would be copied here]
@@ -2895,7 +2745,7 @@ def single_line_with_custom_sheet(client, order_id, line_item_data, line_name, c
     
     # Setup geo targeting based on line type
     try:
-        geo_ids, excluded_geo_ids = setup_geo_targeting_for_line_type(client, original_geo, psbk_line_type)
+        geo_ids, excluded_geo_ids = setup_geo_targeting_for_line_type(client, original_geo, psbk_line_type, geo_context)
     except Exception as e:
         print(f"❌ PSBK - Geo setup failed: {e}")
         # Fallback to empty lists
@@ -2907,12 +2757,12 @@ def single_line_with_custom_sheet(client, order_id, line_item_data, line_name, c
     
     # Call the original single_line function with modified data
     print(f"🔍 DEBUG: About to call single_line with line_type: {modified_line_data.get('line_type')}")
-    result = single_line(client, order_id, modified_line_data, line_name)
+    result = single_line(client, order_id, modified_line_data, line_name, creative_library=creative_library)
     
     return result
 
 
-def single_line_nwp(client, order_id, line_item_data, line_name, line_type="nwp"):
+def single_line_nwp(client, order_id, line_item_data, line_name, line_type="nwp", geo_context=None, creative_library=None):
     """
     Special function for _nwp line with hardcoded placement targeting
     Only creates 300x250 and 320x50 creatives with specific placement IDs
@@ -3004,7 +2854,7 @@ def single_line_nwp(client, order_id, line_item_data, line_name, line_type="nwp"
     print(f"🌍 Original geo targeting: {original_geo_targeting}")
     
     # Setup geo targeting for NWP line (India excluding user geo)
-    geo_ids, excluded_geo_ids = setup_geo_targeting_for_line_type(client, original_geo_targeting, line_type)
+    geo_ids, excluded_geo_ids = setup_geo_targeting_for_line_type(client, original_geo_targeting, line_type, geo_context)
     print(f"🎯 NWP Geo IDs to target: {geo_ids}")
     print(f"🚫 NWP Geo IDs to exclude: {excluded_geo_ids}")
     
@@ -3039,6 +2889,21 @@ def single_line_nwp(client, order_id, line_item_data, line_name, line_type="nwp"
     for size, platforms in ad_unit_data.items():
         for platform, ad_units in platforms.items():
             print(f"  - {size} ({platform}): {ad_units}")
+
+    # Drop hardcoded ad units that are no longer active in GAM
+    _, dead_ad_units = validate_inventory_ids(
+        client, [ad_unit for platforms in ad_unit_data.values() for ids in platforms.values() for ad_unit in ids], kind="ad_unit"
+    )
+    if dead_ad_units:
+        ad_unit_data = {
+            size: {platform: [ad_unit for ad_unit in ids if str(ad_unit) not in dead_ad_units] for platform, ids in platforms.items()}
+            for size, platforms in ad_unit_data.items()
+        }
+        ad_unit_data = {
+            size: {platform: ids for platform, ids in platforms.items() if ids}
+            for size, platforms in ad_unit_data.items()
+            if any(platforms.values())
+        }
     
     timing_checkpoints['placement_lookup_end'] = time.time()
     
@@ -3117,19 +2982,11 @@ def single_line_nwp(client, order_id, line_item_data, line_name, line_type="nwp"
         }]
     
     # Check which creative files are actually available before adding placeholders
-    available_nwp_sizes = []
-    for size in ['300x250', '320x50']:
-        width, height = map(int, size.split('x'))
-        size_pattern = f"{width}x{height}"
-        found_files = False
-        for ext in ['jpg', 'jpeg', 'png', 'gif']:
-            pattern = os.path.join(CREATIVES_FOLDER, f"*{size_pattern}*.{ext}")
-            files = glob.glob(pattern)
-            if files:
-                found_files = True
-                break
-        if found_files:
-            available_nwp_sizes.append(size)
+    creative_assets = get_asset_manifest(CREATIVES_FOLDER)
+    available_nwp_sizes = [
+        size for size in ['300x250', '320x50']
+        if creative_assets.files_for_size(size, NWP_IMAGE_EXTENSIONS)
+    ]
     
     print(f"🖼️ Available NWP creative sizes: {available_nwp_sizes}")
     
@@ -3209,6 +3066,7 @@ def single_line_nwp(client, order_id, line_item_data, line_name, line_type="nwp"
         
         try:
             created_line_items = line_item_service.createLineItems([line_item])
+            invalidate_tables('Line_Item')
             print(f"✅ Line item creation API call successful")
         except Exception as api_error:
             print(f"❌ Line item creation API call failed: {api_error}")
@@ -3253,15 +3111,11 @@ def single_line_nwp(client, order_id, line_item_data, line_name, line_type="nwp"
     creative_ids = []
     
     # Check for available creative files in the folder
-    available_creative_files = []
-    for size in ['300x250', '320x50']:
-        width, height = map(int, size.split('x'))
-        # Look for image files matching this size
-        size_pattern = f"{width}x{height}"
-        for ext in ['jpg', 'jpeg', 'png', 'gif']:
-            pattern = os.path.join(CREATIVES_FOLDER, f"*{size_pattern}*.{ext}")
-            files = glob.glob(pattern)
-            available_creative_files.extend([(f, size) for f in files])
+    available_creative_files = [
+        (asset.path, size)
+        for size in ['300x250', '320x50']
+        for asset in creative_assets.files_for_size(size, NWP_IMAGE_EXTENSIONS)
+    ]
     
     print(f"🖼️ Found {len(available_creative_files)} creative files for NWP line")
     
@@ -3298,7 +3152,8 @@ def single_line_nwp(client, order_id, line_item_data, line_name, line_type="nwp"
                             size_name=size,
                             landing_page=destination_url,
                             impression_tracker=impression_tracker,
-                            tracking_tag=tracking_tag
+                            tracking_tag=tracking_tag,
+                            creative_library=creative_library
                         )
                         
                         print(f"🎨 NWP Creative result: {creative_ids_result}")
@@ -3347,6 +3202,7 @@ def single_line_nwp(client, order_id, line_item_data, line_name, line_type="nwp"
         'line_item_id': line_item_id,
         'creative_count': len(creative_ids) if creative_ids else 0,
         'session_id': session_id,
+        'pql_cache': pql_cache_stats(),
         'line_type': 'NWP'
     }, session_id)
     
@@ -0,0 +1,528 @@
+"""
+Reader for the creative tag workbook (tag.xlsx / tags.xlsx / 'TOI Tags (2).xlsx').
+
+The workbook maps creative dimensions to third-party JavaScript, impression/click or
+DoubleClick tags. read_tag_file() parses it at most once per file version: results are
+cached by (path, mtime, size) and returned as an immutable mapping, so the detection
+pass, the creative pass and all three lines of a campaign share one parse. Parse time
+is recorded in tag_file_stats().
+"""
+
+import os
+import re
+import threading
+import time
+import traceback
+from types import MappingProxyType
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from config import CREATIVES_FOLDER, WORKSPACE_ROOT
+
+# Tag workbook names, matched case-insensitively as substrings of file names
+TAG_FILE_PATTERNS = ['tag.xlsx', 'tags.xlsx', 'tag.xls', 'tags.xls', 'TOI Tags (2).xlsx', 'TOI Tags (2).xls']
+
+# Dimension like "300x250" anywhere in a placement/dimension cell
+_DIMENSION_RE = re.compile(r'(\d+x\d+)')
+# Flashtalking <noscript><a href="..."> click-through
+_NOSCRIPT_HREF_RE = re.compile(r'(<a\s+[^>]*?href=")([^"]*)"', re.IGNORECASE)
+# DoubleClick <ins>/<div>: inject the click tracker before class=, else right after the tag name
+_DCM_CLASS_RE = re.compile(r'(<ins|<div)([^>]*?)(\s+class=)', re.IGNORECASE)
+_DCM_OPEN_TAG_RE = re.compile(r'(<ins|<div)(\s)', re.IGNORECASE)
+
+CLICK_MACRO = '%%CLICK_URL_UNESC%%'
+
+# Cell texts pandas.read_excel treats as missing; the streaming reader does the same
+TAG_SHEET_NA_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+# Formatted-but-empty rows at the end of DCM exports can run to row 1,048,576; stop after this many
+TAG_SHEET_MAX_BLANK_ROWS = 500
+
+_cache = {}
+_cache_lock = threading.Lock()
+_stats = {'parses': 0, 'hits': 0, 'last_parse_seconds': None, 'total_parse_seconds': 0.0}
+
+
+def find_tag_file():
+    """Return the path of the first tag workbook in the workspace or creatives folder, or None"""
+    for directory in [WORKSPACE_ROOT, CREATIVES_FOLDER]:
+        if not os.path.exists(directory):
+            continue
+
+        print(f"Checking directory for tag files: {directory}")
+        for file in os.listdir(directory):
+            file_lower = file.lower()
+            if any(pattern.lower() in file_lower for pattern in TAG_FILE_PATTERNS):
+                tag_file_path = os.path.join(directory, file)
+                print(f"Found potential tag file: {tag_file_path}")
+                return tag_file_path
+    return None
+
+
+def find_tag_columns(column_names):
+    """
+    Find the dimension, JavaScript tag, impression tag and click tag columns among a tag sheet's column labels.
+
+    Exact names ('Dimensions'/'PlacementName', 'JavaScript Tag'/'js_https', 'Impression Tag',
+    'Click Tag') win over partial matches. Missing columns are None.
+
+    Returns:
+        tuple: (dimension_col, tag_col, impression_tag_col, click_tag_col)
+    """
+    dimension_col = None
+    tag_col = None
+    impression_tag_col = None
+    click_tag_col = None
+
+    print(f"Available columns: {list(column_names)}")
+    columns = [(col, str(col).lower()) for col in column_names]
+
+    # Look for exact column names first
+    for col, col_str in columns:
+        if col_str == 'dimensions' or col_str == 'placementname':
+            dimension_col = col
+            print(f"Using exact match '{col}' as dimension column")
+        elif col_str == 'javascript tag' or col_str == 'js_https':
+            tag_col = col
+            print(f"Using exact match '{col}' as tag column")
+        elif col_str == 'impression tag (image)' or col_str == 'impression tag':
+            impression_tag_col = col
+            print(f"Using exact match '{col}' as impression tag column")
+        elif col_str == 'click tag':
+            click_tag_col = col
+            print(f"Using exact match '{col}' as click tag column")
+
+    # If needed, look for partial matches
+    if not dimension_col:
+        for col, col_str in columns:
+            if 'dimension' in col_str or 'size' in col_str or 'placement' in col_str:
+                dimension_col = col
+                print(f"Using partial match '{col}' as dimension column")
+                break
+
+    if not tag_col:
+        for col, col_str in columns:
+            if ('javascript' in col_str and 'tag' in col_str) or 'script' in col_str or 'js_' in col_str:
+                tag_col = col
+                print(f"Using partial match '{col}' as tag column")
+                break
+
+    if not impression_tag_col:
+        for col, col_str in columns:
+            if 'impression' in col_str and 'tag' in col_str:
+                impression_tag_col = col
+                print(f"Using partial match '{col}' as impression tag column")
+                break
+
+    if not click_tag_col:
+        for col, col_str in columns:
+            if 'click' in col_str and 'tag' in col_str:
+                click_tag_col = col
+                print(f"Using partial match '{col}' as click tag column")
+                break
+
+    # Final attempt to find tag column
+    if dimension_col and not tag_col and not (impression_tag_col and click_tag_col):
+        for col, col_str in columns:
+            if 'tag' in col_str:
+                tag_col = col
+                print(f"Using fallback '{col}' as tag column")
+                break
+
+    return dimension_col, tag_col, impression_tag_col, click_tag_col
+
+
+def normalize_dimensions(series):
+    """Strip a dimension column and reduce cells like "Banner 300x250 ROS" to "300x250" (column-wise)"""
+    dimensions = series.astype(str).str.strip()
+    return dimensions.str.extract(_DIMENSION_RE, expand=False).fillna(dimensions)
+
+
+def _stripped_column(df, col):
+    """(not-null flags, stripped strings) of a column, or all-missing if there is no such column"""
+    if not col:
+        return [False] * len(df), [None] * len(df)
+    series = df[col]
+    return series.notna().tolist(), series.astype(str).str.strip().tolist()
+
+
+def normalize_js_tag(js_tag, dimension):
+    """
+    Prepare a third-party JavaScript tag for GAM.
+
+    Adds %%CLICK_URL_UNESC%% to Flashtalking <noscript> hrefs and a data-dcm-click-tracker
+    attribute to DoubleClick tags. The tag is lowercased once for all checks.
+
+    Returns:
+        tuple: (tag, is_doubleclick)
+    """
+    js_tag_lower = js_tag.lower()
+
+    # Handle <noscript> tags with <a> href, common in Flashtalking tags
+    if '<noscript>' in js_tag_lower and '<a href' in js_tag_lower:
+        print(f"Detected noscript/a href tag for dimension: {dimension}")
+
+        # Prepend click macro if not already present
+        if CLICK_MACRO not in js_tag:
+            js_tag, replaced = _NOSCRIPT_HREF_RE.subn(r'\1%%CLICK_URL_UNESC%%\2"', js_tag)
+            if replaced:
+                print(f"Added %%CLICK_URL_UNESC%% to href in noscript tag for dimension: {dimension}")
+            else:
+                print(f"Warning: Could not add %%CLICK_URL_UNESC%% to href for dimension: {dimension}")
+        else:
+            print(f"Click macro already present for dimension: {dimension}")
+
+    # Check if this is a DoubleClick tag (contains dcmads or data-dcm attributes).
+    # The href rewrite above never adds or breaks these markers, so the lowercased original still applies.
+    is_doubleclick = False
+    if ('dcmads' in js_tag_lower or 'data-dcm' in js_tag_lower) and ('<ins' in js_tag_lower or '<div' in js_tag_lower):
+        is_doubleclick = True
+        print(f"Detected DoubleClick tag for dimension: {dimension}")
+
+        # Ensure data-dcm-click-tracker is present in the DoubleClick tag
+        if 'data-dcm-click-tracker' not in js_tag:
+            # Add data-dcm-click-tracker attribute before the class attribute
+            modified_tag, replaced = _DCM_CLASS_RE.subn(r"\1\2 data-dcm-click-tracker='%%CLICK_URL_UNESC%%'\3", js_tag)
+
+            # If that didn't work, try adding it after the opening tag
+            if not replaced:
+                modified_tag = _DCM_OPEN_TAG_RE.sub(r"\1 data-dcm-click-tracker='%%CLICK_URL_UNESC%%'\2", js_tag)
+
+            js_tag = modified_tag
+            print(f"Added data-dcm-click-tracker attribute to DoubleClick tag for dimension: {dimension}")
+
+    return js_tag, is_doubleclick
+
+
+def build_tag_dict(df, dimension_col, tag_col=None, impression_tag_col=None, click_tag_col=None):
+    """
+    Build {dimension: tag info} from the columns found by find_tag_columns().
+
+    Impression/click pairs take priority over the JavaScript tag of the same row and
+    overwrite earlier rows of the same dimension; JavaScript/DoubleClick tags of a repeated
+    dimension are kept under "300x250_1", "300x250_2", ...
+    """
+    tag_dict = {}
+    next_counter = {}
+    has_impression_click = impression_tag_col and click_tag_col
+
+    dimension_present = df[dimension_col].notna().tolist()
+    dimensions = normalize_dimensions(df[dimension_col]).tolist()
+    impression_present, impression_tags = _stripped_column(df, impression_tag_col if has_impression_click else None)
+    click_present, click_tags = _stripped_column(df, click_tag_col if has_impression_click else None)
+    js_present, js_tags = _stripped_column(df, tag_col)
+
+    rows = zip(dimension_present, dimensions, impression_present, impression_tags,
+               click_present, click_tags, js_present, js_tags)
+    for has_dimension, dimension, has_impression, impression_tag, has_click, click_tag, has_js, js_tag in rows:
+        if not has_dimension:
+            continue
+
+        # Check for Impression Tag and Click Tag first (new priority)
+        if has_impression and has_click:
+            # Skip empty entries
+            if not dimension or not impression_tag or not click_tag:
+                continue
+
+            # Store both tags in a dictionary
+            tag_dict[dimension] = {
+                'type': 'impression_click',
+                'impression_tag': impression_tag,
+                'click_tag': click_tag
+            }
+            print(f"Added impression/click tags for dimension: {dimension}")
+
+        # Fallback to JavaScript tag if impression/click tags not found
+        elif has_js:
+            # Skip empty entries
+            if not dimension or not js_tag:
+                continue
+
+            js_tag, is_doubleclick = normalize_js_tag(js_tag, dimension)
+
+            # Only add if tag is substantial
+            if 'x' in dimension and len(js_tag.strip()) > 10:
+                # Check if this dimension already exists in the dictionary
+                if dimension in tag_dict:
+                    # It's a duplicate, so append a counter. Keys are never removed, so the
+                    # search can resume where the last duplicate of this dimension stopped.
+                    counter = next_counter.get(dimension, 1)
+                    while f"{dimension}_{counter}" in tag_dict:
+                        counter += 1
+                    next_counter[dimension] = counter + 1
+                    dimension_key = f"{dimension}_{counter}"
+                    print(f"Found duplicate dimension {dimension}, using key {dimension_key}")
+                else:
+                    dimension_key = dimension
+
+                tag_dict[dimension_key] = {
+                    'type': 'doubleclick' if is_doubleclick else 'javascript',
+                    'js_tag': js_tag
+                }
+                print(f"Added {'DoubleClick' if is_doubleclick else 'JavaScript'} tag for dimension: {dimension}")
+
+    return tag_dict
+
+
+def _pandas_header(cells):
+    """Column labels as pandas.read_excel names them: 'Unnamed: N' for blanks, 'X.1' for duplicates"""
+    names = [f"Unnamed: {position}" if cell is None else cell for position, cell in enumerate(cells)]
+    counts = {}
+    for position, name in enumerate(names):
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts.get(name, 0)
+        names[position] = name
+        counts[name] = count + 1
+    return names
+
+
+def _tag_cell(value):
+    """Convert a streamed cell the way pandas.read_excel does (whole floats to int, NA texts to None)"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value in TAG_SHEET_NA_VALUES:
+        return None
+    return value
+
+
+def stream_tag_sheet(tag_file_path):
+    """
+    Read the tag columns of an .xlsx tag workbook without loading the whole workbook.
+
+    The workbook is opened read-only; the 'tags' sheet (case-insensitive, else the first
+    sheet) is picked from the workbook metadata, the header row is matched with
+    find_tag_columns() and only the dimension and tag columns are streamed row by row,
+    stopping after TAG_SHEET_MAX_BLANK_ROWS consecutive blank rows.
+
+    Returns:
+        tuple: (column labels, (dimension_col, tag_col, impression_tag_col, click_tag_col),
+                DataFrame holding only the found tag columns)
+    """
+    workbook = load_workbook(tag_file_path, read_only=True, data_only=True)
+    try:
+        sheet_names = workbook.sheetnames
+        print(f"Available sheets: {sheet_names}")
+        target_sheet = next((name for name in sheet_names if name.lower() == 'tags'), None)
+        if target_sheet is None:
+            target_sheet = sheet_names[0]
+            print(f"No 'tags' sheet found, using first sheet: {target_sheet}")
+        else:
+            print(f"Found 'tags' sheet: {target_sheet}")
+        worksheet = workbook[target_sheet]
+
+        # Row 1 is the header even when blank, like pandas
+        header_cells = next(worksheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        header = _pandas_header([_tag_cell(cell) for cell in header_cells])
+
+        tag_columns = find_tag_columns(header)
+        positions = {col: header.index(col) for col in tag_columns if col is not None}
+        if not positions:
+            return header, tag_columns, pd.DataFrame(columns=header)
+
+        min_col = min(positions.values())
+        max_col = max(positions.values())
+        values = {col: [] for col in positions}
+        pending_blank = 0
+        rows_read = 0
+        for cells in worksheet.iter_rows(min_row=2, min_col=min_col + 1, max_col=max_col + 1, values_only=True):
+            row = {col: _tag_cell(cells[position - min_col]) if position - min_col < len(cells) else None
+                   for col, position in positions.items()}
+            if all(value is None for value in row.values()):
+                pending_blank += 1
+                if pending_blank >= TAG_SHEET_MAX_BLANK_ROWS:
+                    break
+                continue
+            # Blank rows are dropped here; build_tag_dict would skip them anyway
+            pending_blank = 0
+            rows_read += 1
+            for col, value in row.items():
+                values[col].append(value)
+        print(f"📄 Streamed {rows_read} tag rows from sheet '{target_sheet}' ({len(positions)} of {len(header)} columns)")
+        return header, tag_columns, pd.DataFrame(values)
+    finally:
+        workbook.close()
+
+
+def parse_tag_file(tag_file_path):
+    """
+    Parse a tag workbook into {dimension: tag info}.
+
+    Supports:
+    1. JavaScript tags (traditional script tags)
+    2. Impression/click tag combinations
+    3. DoubleClick tags (DCM tags with <ins> elements)
+
+    .xlsx workbooks are streamed with stream_tag_sheet(); .xls files, and .xlsx files the
+    streaming reader cannot open, are loaded with pandas.
+
+    Returns:
+        dict: Dimension keys ("300x250", duplicates as "300x250_1") to tag info dicts,
+              or None if the file has no usable tags or cannot be read.
+    """
+    tag_file_name = os.path.basename(tag_file_path)
+    print(f"Attempting to read tag file at: {tag_file_path}")
+
+    try:
+        def read_excel_with_sheet_selection(file_path, engine=None):
+            """Helper function to read Excel file with preference for 'tags' sheet"""
+            try:
+                # Try to read sheet names first
+                if engine:
+                    excel_file = pd.ExcelFile(file_path, engine=engine)
+                else:
+                    excel_file = pd.ExcelFile(file_path)
+
+                sheet_names = excel_file.sheet_names
+                print(f"Available sheets: {sheet_names}")
+
+                # Check for 'tags' sheet (case insensitive)
+                target_sheet = None
+                for sheet_name in sheet_names:
+                    if sheet_name.lower() == 'tags':
+                        target_sheet = sheet_name
+                        print(f"Found 'tags' sheet: {target_sheet}")
+                        break
+
+                # If no 'tags' sheet found, use the first sheet
+                if target_sheet is None:
+                    target_sheet = sheet_names[0]
+                    print(f"No 'tags' sheet found, using first sheet: {target_sheet}")
+
+                # Read the selected sheet
+                if engine:
+                    df = pd.read_excel(file_path, sheet_name=target_sheet, engine=engine)
+                else:
+                    df = pd.read_excel(file_path, sheet_name=target_sheet)
+
+                return df
+            except Exception as e:
+                print(f"Error reading Excel file with sheet selection: {e}")
+                # Fallback to default behavior
+                if engine:
+                    return pd.read_excel(file_path, engine=engine)
+                else:
+                    return pd.read_excel(file_path)
+
+        df = None
+        if tag_file_path.lower().endswith('.xlsx'):
+            try:
+                column_names, tag_columns, df = stream_tag_sheet(tag_file_path)
+            except Exception as e:
+                print(f"⚠️ Streaming read of {tag_file_name} failed ({e}), loading it with pandas")
+
+        if df is None:
+            if tag_file_path.lower().endswith('.xlsx'):
+                df = read_excel_with_sheet_selection(tag_file_path)
+            else:  # For xls files
+                try:
+                    df = read_excel_with_sheet_selection(tag_file_path, engine='xlrd')
+                except:
+                    try:
+                        df = read_excel_with_sheet_selection(tag_file_path, engine='openpyxl')
+                    except:
+                        raise Exception(f"Failed to read {tag_file_path} with any Excel engine")
+
+            print("\nDataFrame Info:")
+            print(df.info())
+            column_names = list(df.columns)
+            tag_columns = find_tag_columns(column_names)
+
+        dimension_col, tag_col, impression_tag_col, click_tag_col = tag_columns
+        has_columns = dimension_col and (tag_col or (impression_tag_col and click_tag_col))
+
+        if has_columns:
+            tag_dict = build_tag_dict(df, dimension_col, tag_col, impression_tag_col, click_tag_col)
+            if tag_dict:
+                print(f"Successfully read {len(tag_dict)} tags from {tag_file_name}")
+                return tag_dict
+            else:
+                print(f"No valid tag entries found in {tag_file_name}")
+        else:
+            print(f"Couldn't find required columns in {tag_file_name}. Found columns: {column_names}")
+            print("Looking for columns named 'Dimensions' or 'PlacementName' and either 'JavaScript Tag' or 'js_https'")
+
+    except Exception as e:
+        print(f"Error reading file {tag_file_name}: {str(e)}")
+        traceback.print_exc()
+
+
+    return None
+
+
+def _freeze(tag_dict):
+    if tag_dict is None:
+        return None
+    return MappingProxyType({key: MappingProxyType(dict(info)) for key, info in tag_dict.items()})
+
+
+def read_tag_file():
+    """
+    Reads a tag file (Excel format) that contains creative dimensions and their corresponding JavaScript tags.
+
+    This function looks for files with names like 'tag.xlsx', 'tags.xlsx', 'tag.xls', or 'tags.xls'
+    in both the current directory and the 'creatives' directory. The parsed workbook is cached
+    until the file's mtime or size changes.
+
+    Returns:
+        Mapping: A read-only mapping of dimension strings to their tag info,
+                 or None if no valid tag file is found or an error occurs.
+    """
+    try:
+        tag_file_path = find_tag_file()
+        if not tag_file_path:
+            print("No valid tag file found. Not creating simulated tags.")
+            return None
+
+        stat = os.stat(tag_file_path)
+        key = (tag_file_path, stat.st_mtime_ns, stat.st_size)
+        with _cache_lock:
+            if key in _cache:
+                _stats['hits'] += 1
+                print(f"⚡ Using cached tags from {os.path.basename(tag_file_path)}")
+                return _cache[key]
+
+        start = time.perf_counter()
+        tags = _freeze(parse_tag_file(tag_file_path))
+        elapsed = time.perf_counter() - start
+        with _cache_lock:
+            # Only the current version of a file is worth keeping
+            for stale_key in [k for k in _cache if k[0] == tag_file_path]:
+                del _cache[stale_key]
+            _cache[key] = tags
+            _stats['parses'] += 1
+            _stats['last_parse_seconds'] = elapsed
+            _stats['total_parse_seconds'] += elapsed
+        print(f"⏱️ Parsed tag file in {elapsed:.3f}s")
+        if tags is None:
+            print("No valid tag file found. Not creating simulated tags.")
+        return tags
+
+    except Exception as e:
+        print(f"Error in read_tag_file: {str(e)}")
+        print(f"Error type: {type(e)}")
+        traceback.print_exc()
+        return None
+
+
+def clear_tag_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def tag_file_stats():
+    """Parse count, cache hits and parse time (seconds) of the tag workbook"""
+    with _cache_lock:
+        return dict(_stats)
+
+
+if __name__ == "__main__":
+    # Example usage
+    tags = read_tag_file()
+    print(f"Tags: {list(tags) if tags else None}")
+    print(f"📊 Tag file stats: {tag_file_stats()}")
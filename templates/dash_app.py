@@ -8,8 +8,6 @@ import os
 import re
 from typing import List, Dict
 import glob
-import gspread
-from google.oauth2.service_account import Credentials
 from googleads import ad_manager
 import shutil
 import base64
@@ -39,6 +37,7 @@ from DSD.Dsd_Download import Dsd_Download
 from dsd_read import load_dsd
 from fetch_expresso_details import fetch_full_expresso_details
 from authenticate_google_cloud import get_ads_client, setup_authentication
+from sheets_client import get_sheets_client
 from bigquery_fetch import fetch_expresso_data
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.FLATLY], assets_folder=assets_folder)
@@ -83,8 +82,7 @@ submissions = []
 SHEET_ID = "1LvTZELsn6m5NMkvkiEz6NjH01ZxUzHfwRYzSEK3Sphw"
 RANGE = "Sheet1"
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
-credentials = Credentials.from_service_account_file("credentials.json", scopes=SCOPES)
-sheets_client = gspread.authorize(credentials)
+sheets_client = get_sheets_client("credentials.json", SCOPES)
 
 # App Layout
 app.layout = dbc.Container([
@@ -729,6 +727,8 @@ def handle_all_inputs(submit_n, clear_n, order_option_trigger, upload_contents,
                         success_message += " Note: No creatives were created (check creative files)."
                 except LocationNotFoundError as e:
                     error_message = f"Location '{e.location_name}' is not found. Please enter it manually."
+                    if e.suggestions:
+                        error_message += f" Did you mean: {', '.join(e.suggestions)}?"
                     print(error_message)
                     
                     # Log location error